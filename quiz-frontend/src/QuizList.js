@@ -1,19 +1,26 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { fetchQuizzes } from './api'; // Импортируем функцию fetchQuizzes из api.js
+import { fetchQuizzes, searchQuizzes } from './api'; // Импортируем функции fetchQuizzes и searchQuizzes из api.js
 import './QuizList.css';
 
 const QuizList = () => {
     const [quizzes, setQuizzes] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
+    const [query, setQuery] = useState('');
+    // null - показываем обычный список, иначе результаты поиска
+    const [searchResults, setSearchResults] = useState(null);
+    const [searching, setSearching] = useState(false);
 
     useEffect(() => {
         const loadQuizzes = async () => {
             try {
                 setLoading(true);
-                const quizzesData = await fetchQuizzes();
-                setQuizzes(quizzesData);
+                const page = await fetchQuizzes();
+                setQuizzes(page.results);
+                setNextPage(page.next);
                 setError(null);
             } catch (err) {
                 setError('Ошибка при загрузке квизов. Пожалуйста, попробуйте позже.');
@@ -26,6 +33,45 @@ const QuizList = () => {
         loadQuizzes();
     }, []);
 
+    // Догружаем следующую страницу списка по курсору
+    const loadMore = async () => {
+        try {
+            setLoadingMore(true);
+            const page = await fetchQuizzes(nextPage);
+            setQuizzes(prev => prev.concat(page.results));
+            setNextPage(page.next);
+        } catch (err) {
+            setError('Ошибка при загрузке квизов. Пожалуйста, попробуйте позже.');
+            console.error(err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
+    const handleSearch = async (event) => {
+        event.preventDefault();
+        if (!query.trim()) {
+            setSearchResults(null);
+            return;
+        }
+        try {
+            setSearching(true);
+            setSearchResults(await searchQuizzes(query));
+        } catch (err) {
+            setError('Ошибка при поиске квизов. Пожалуйста, попробуйте позже.');
+            console.error(err);
+        } finally {
+            setSearching(false);
+        }
+    };
+
+    const resetSearch = () => {
+        setQuery('');
+        setSearchResults(null);
+    };
+
+    const shownQuizzes = searchResults ?? quizzes;
+
     if (loading) {
         return <div className="loading">Загрузка...</div>;
     }
@@ -37,12 +83,29 @@ const QuizList = () => {
     return (
         <div className="quiz-list-container">
             <h1>Доступные тесты</h1>
-            
-            {quizzes.length === 0 ? (
-                <p className="no-quizzes">Нет доступных тестов</p>
+
+            <form className="quiz-search" onSubmit={handleSearch}>
+                <input
+                    type="search"
+                    value={query}
+                    onChange={(e) => setQuery(e.target.value)}
+                    placeholder="Поиск по названию и вопросам"
+                />
+                <button type="submit" className="view-quiz-button" disabled={searching}>
+                    {searching ? 'Поиск...' : 'Найти'}
+                </button>
+                {searchResults && (
+                    <button type="button" className="view-quiz-button" onClick={resetSearch}>
+                        Все тесты
+                    </button>
+                )}
+            </form>
+
+            {shownQuizzes.length === 0 ? (
+                <p className="no-quizzes">{searchResults ? 'Ничего не найдено' : 'Нет доступных тестов'}</p>
             ) : (
                 <div className="quiz-grid">
-                    {quizzes.map(quiz => (
+                    {shownQuizzes.map(quiz => (
                         <Link to={`/quizzes/${quiz.id}/details`} key={quiz.id} className="quiz-card">
                             <h2>{quiz.title}</h2>
                             <p>Автор: {quiz.author}</p>
@@ -52,6 +115,12 @@ const QuizList = () => {
                     ))}
                 </div>
             )}
+
+            {nextPage && !searchResults && (
+                <button className="view-quiz-button" onClick={loadMore} disabled={loadingMore}>
+                    {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+                </button>
+            )}
         </div>
     );
 };
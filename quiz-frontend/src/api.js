@@ -6,6 +6,12 @@ const API_URL = isProduction
   ? 'https://quiz-app-km8k.onrender.com/api/'
   : 'http://localhost:8000/api/';
 
+// Опубликованные статические файлы квизов (quiz/publishing.py на бэкенде);
+// в разработке их нет, квизы загружаются через API
+const PUBLISHED_URL = isProduction
+  ? 'https://quiz-app-km8k.onrender.com/static/published/quizzes/'
+  : null;
+
 console.log('Окружение:', process.env.NODE_ENV);
 console.log('Используется API URL:', API_URL);
 
@@ -133,11 +139,13 @@ export const checkAuthStatus = async () => {
     }
 };
 
-export const fetchQuizzes = async () => {
+// Список квизов отдаётся страницами с курсором: { next, previous, results }.
+// Чтобы получить следующую страницу, передайте ссылку next из предыдущей.
+export const fetchQuizzes = async (pageUrl = null) => {
     try {
         console.log('Выполняем запрос списка квизов через fetch...');
         
-        const response = await fetch(`${API_URL}quizzes/`, {
+        const response = await fetch(pageUrl || `${API_URL}quizzes/`, {
             method: 'GET',
             headers: {
                 'Content-Type': 'application/json'
@@ -159,6 +167,29 @@ export const fetchQuizzes = async () => {
     }
 };
 
+// Полнотекстовый поиск тестов по названию и вопросам
+export const searchQuizzes = async (query) => {
+    try {
+        const response = await fetch(`${API_URL}quizzes/search/?q=${encodeURIComponent(query)}`, {
+            method: 'GET',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            credentials: 'include' // Для отправки куки сессии
+        });
+
+        if (!response.ok) {
+            throw new Error(`Ошибка при поиске квизов: ${response.status}`);
+        }
+
+        const data = await response.json();
+        return data.results;
+    } catch (error) {
+        console.error('Ошибка при поиске квизов:', error);
+        throw error;
+    }
+};
+
 // Пример POST запроса
 export const createQuiz = async (quizData) => {
     try {
@@ -248,14 +279,47 @@ export const fetchQuizDetails = async (quizId) => {
   }
 };
 
-// Получить вопрос квиза по индексу
-export const fetchQuizQuestion = async (quizId, questionIndex) => {
+// Начать попытку теста со случайной выборкой вопросов (sample_size).
+// Возвращает id попытки и её вопросы; id хранится в sessionStorage, пока
+// тест не начат заново, и по нему загружаются вопросы и сохраняется результат.
+export const startQuizAttempt = async (quizId) => {
   try {
-    const response = await fetch(`${API_URL}quizzes/${quizId}/questions/${questionIndex}/`, {
+    const response = await fetch(`${API_URL}quizzes/${quizId}/attempts/`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'X-CSRFToken': getCookie('csrftoken')
+      },
+      credentials: 'include'
+    });
+
+    if (!response.ok) {
+      throw new Error(`Error: ${response.status}`);
+    }
+
+    const data = await response.json();
+    sessionStorage.setItem(`quiz_${quizId}_attempt`, data.attempt_id);
+    return data;
+  } catch (error) {
+    console.error('Error starting quiz attempt:', error);
+    throw error;
+  }
+};
+
+// Загруженные данные прохождения: квиз (или попытка) загружается один раз,
+// все вопросы и страница результатов берут его отсюда
+const playBundles = new Map();
+
+// Страницы /play/ квиза: большие квизы отдаются частями, догружаем по next_offset
+const fetchPlayPages = async (quizId) => {
+  let bundle = null;
+  let offset = 0;
+
+  while (offset !== null) {
+    const response = await fetch(`${API_URL}quizzes/${quizId}/play/?offset=${offset}`, {
       method: 'GET',
       headers: {
         'Content-Type': 'application/json'
-        // Не используем Authorization
       },
       credentials: 'include'
     });
@@ -264,15 +328,117 @@ export const fetchQuizQuestion = async (quizId, questionIndex) => {
       throw new Error(`Error: ${response.status}`);
     }
 
-    return await response.json();
+    const page = await response.json();
+    if (bundle) {
+      bundle.questions = bundle.questions.concat(page.questions);
+    } else {
+      bundle = page;
+    }
+    offset = page.next_offset;
+  }
+
+  return bundle;
+};
+
+// Опубликованный статический файл квиза в формате /play/ или null, если квиз
+// не опубликован. Указатель index.json кэшируется ненадолго, сам файл с хешем
+// в имени - навсегда.
+const fetchPublishedQuiz = async (quizId) => {
+  const index = await fetch(`${PUBLISHED_URL}${quizId}/index.json`);
+  if (!index.ok) {
+    return null;
+  }
+  const { file } = await index.json();
+  const response = await fetch(`${PUBLISHED_URL}${quizId}/${file}`);
+  return response.ok ? await response.json() : null;
+};
+
+// Квиз целиком: сначала опубликованный файл, без обращения к API и БД,
+// при его отсутствии или ошибке - страницы /play/
+const fetchQuizBundle = async (quizId) => {
+  if (PUBLISHED_URL) {
+    try {
+      const published = await fetchPublishedQuiz(quizId);
+      if (published) {
+        return published;
+      }
+    } catch (error) {
+      console.warn('Опубликованный файл квиза недоступен, загружаем через API:', error);
+    }
+  }
+  return await fetchPlayPages(quizId);
+};
+
+// Все вопросы попытки со случайной выборкой одним запросом
+const fetchAttemptBundle = async (attemptId) => {
+  const response = await fetch(`${API_URL}attempts/${attemptId}/`, {
+    method: 'GET',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    credentials: 'include'
+  });
+
+  if (!response.ok) {
+    throw new Error(`Error: ${response.status}`);
+  }
+
+  return await response.json();
+};
+
+// Получить все вопросы квиза для прохождения (формат /play/). Для попытки со
+// случайной выборкой - вопросы попытки (у каждой попытки своя выборка, поэтому
+// опубликованный файл для неё не подходит). Данные загружаются один раз за попытку.
+export const fetchQuizPlayBundle = async (quizId) => {
+  const attemptId = sessionStorage.getItem(`quiz_${quizId}_attempt`);
+  const key = `${quizId}:${attemptId || ''}`;
+  if (!playBundles.has(key)) {
+    const request = attemptId ? fetchAttemptBundle(attemptId) : fetchQuizBundle(quizId);
+    playBundles.set(key, request);
+    // Неудачную загрузку можно повторить
+    request.catch(() => playBundles.delete(key));
+  }
+
+  try {
+    return await playBundles.get(key);
   } catch (error) {
-    console.error('Error fetching quiz question:', error);
+    console.error('Error fetching quiz play bundle:', error);
     throw error;
   }
 };
 
+// Забыть загруженные данные прохождения квиза: новое прохождение загрузит
+// актуальную версию
+export const clearQuizPlayBundle = (quizId) => {
+  for (const key of playBundles.keys()) {
+    if (key.startsWith(`${quizId}:`)) {
+      playBundles.delete(key);
+    }
+  }
+};
+
+// Ключ попытки прохождения теста. Повторная отправка результата с тем же
+// ключом не создаёт новую запись, а возвращает уже сохранённую.
+export const createAttemptId = () => {
+  if (window.crypto && window.crypto.randomUUID) {
+    return window.crypto.randomUUID();
+  }
+  // randomUUID доступен только в защищённом контексте (https, localhost)
+  const bytes = window.crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
+// Ключ попытки для результата: id попытки со случайной выборкой, если она
+// начата, иначе новый ключ.
+export const getQuizAttemptId = (quizId) => (
+  sessionStorage.getItem(`quiz_${quizId}_attempt`) || createAttemptId()
+);
+
 // Функция для сохранения результата теста
-export const saveQuizResult = async (quizId, score, maxScore, userAnswers = null) => {
+export const saveQuizResult = async (quizId, score, maxScore, userAnswers = null, attemptId = null) => {
   try {
     const response = await fetch(`${API_URL}save-quiz-result/`, {
       method: 'POST',
@@ -285,7 +451,8 @@ export const saveQuizResult = async (quizId, score, maxScore, userAnswers = null
         quiz_id: quizId,
         score: score,
         max_score: maxScore,
-        user_answers: userAnswers
+        user_answers: userAnswers,
+        attempt_id: attemptId
       })
     });
 
@@ -301,10 +468,14 @@ export const saveQuizResult = async (quizId, score, maxScore, userAnswers = null
   }
 };
 
-// Функция для получения всех результатов пользователя
-export const getUserQuizResults = async () => {
+// Функция для получения результатов пользователя.
+// Результаты отдаются страницами с курсором: { next, previous, results }.
+// Для следующей страницы передайте ссылку next из предыдущей.
+// Ответы по вопросам в списке не передаются (answers=none), их загружает
+// getQuizResult при раскрытии карточки.
+export const getUserQuizResults = async (pageUrl = null) => {
   try {
-    const response = await fetch(`${API_URL}quiz-results/`, {
+    const response = await fetch(pageUrl || `${API_URL}quiz-results/?answers=none`, {
       method: 'GET',
       headers: {
         'Content-Type': 'application/json'
@@ -374,12 +545,15 @@ export const getAllUsers = async () => {
   }
 };
 
-// Получить результаты всех пользователей (только для админов)
-export const getAllUsersResults = async (userId = null) => {
+// Получить результаты всех пользователей (только для админов).
+// Ответ постраничный и без ответов по вопросам, как у getUserQuizResults
+export const getAllUsersResults = async (userId = null, pageUrl = null) => {
   try {
-    let url = `${API_URL}admin/quiz-results/`;
-    if (userId) {
-      url += `?user_id=${userId}`;
+    let url = `${API_URL}admin/quiz-results/?answers=none`;
+    if (pageUrl) {
+      url = pageUrl;
+    } else if (userId) {
+      url += `&user_id=${userId}`;
     }
 
     const response = await fetch(url, {
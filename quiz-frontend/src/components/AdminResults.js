@@ -1,13 +1,15 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { getAllUsers, getAllUsersResults } from '../api';
+import { getAllUsers, getAllUsersResults, getAdminQuizResultDetail } from '../api';
 import './QuizResults.css';
 
 const AdminResults = () => {
   const [results, setResults] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [users, setUsers] = useState([]);
   const [selectedUserId, setSelectedUserId] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [expandedResult, setExpandedResult] = useState(null);
   const navigate = useNavigate();
@@ -33,8 +35,9 @@ const AdminResults = () => {
     const fetchResults = async () => {
       try {
         setLoading(true);
-        const resultsData = await getAllUsersResults(selectedUserId);
-        setResults(resultsData);
+        const page = await getAllUsersResults(selectedUserId);
+        setResults(page.results);
+        setNextPage(page.next);
         setError(null);
       } catch (err) {
         setError(`Ошибка при загрузке результатов: ${err.message}`);
@@ -47,6 +50,21 @@ const AdminResults = () => {
     fetchResults();
   }, [selectedUserId]);
 
+  // Догружаем следующую страницу результатов по курсору
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await getAllUsersResults(selectedUserId, nextPage);
+      setResults(prev => prev.concat(page.results));
+      setNextPage(page.next);
+    } catch (err) {
+      setError(`Ошибка при загрузке результатов: ${err.message}`);
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Обработчик изменения фильтра по пользователю
   const handleUserFilter = (e) => {
     const userId = e.target.value === 'all' ? null : parseInt(e.target.value);
@@ -54,8 +72,22 @@ const AdminResults = () => {
   };
 
   // Функция для переключения развернутого/свернутого состояния карточки результата
-  const toggleResultDetails = (resultId) => {
-    setExpandedResult(expandedResult === resultId ? null : resultId);
+  // Ответы по вопросам загружаются при первом раскрытии карточки
+  const toggleResultDetails = async (resultId) => {
+    if (expandedResult === resultId) {
+      setExpandedResult(null);
+      return;
+    }
+    setExpandedResult(resultId);
+    const result = results.find(r => r.id === resultId);
+    if (result && !result.user_answers) {
+      try {
+        const detail = await getAdminQuizResultDetail(resultId);
+        setResults(prev => prev.map(r => (r.id === resultId ? { ...r, user_answers: detail.user_answers } : r)));
+      } catch (err) {
+        console.error(err);
+      }
+    }
   };
 
   // Форматирование даты
@@ -198,6 +230,12 @@ const AdminResults = () => {
         </div>
       )}
       
+      {nextPage && (
+        <button className="retry-button" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+        </button>
+      )}
+      
       <button 
         className="home-button"
         onClick={() => navigate('/')}
@@ -8,6 +8,7 @@ const CreateQuiz = () => {
   const [title, setTitle] = useState('');
   const [hideAnswers, setHideAnswers] = useState(true);
   const [timeLimit, setTimeLimit] = useState(0);
+  const [sampleSize, setSampleSize] = useState(0);
   const [questions, setQuestions] = useState([
     { text: '', answers: [{ text: '', is_correct: false }, { text: '', is_correct: false }] }
   ]);
@@ -134,6 +135,7 @@ const CreateQuiz = () => {
         title,
         hide_answers: hideAnswers,
         time_limit: timeLimit,
+        sample_size: sampleSize,
         questions
       };
 
@@ -214,6 +216,19 @@ const CreateQuiz = () => {
           <small className="form-text">0 - без ограничения времени</small>
         </div>
 
+        <div className="form-group">
+          <label htmlFor="sample-size">Случайных вопросов в попытке:</label>
+          <input
+            type="number"
+            id="sample-size"
+            value={sampleSize}
+            onChange={(e) => setSampleSize(Number(e.target.value))}
+            min="0"
+            placeholder="0 - все вопросы"
+          />
+          <small className="form-text">0 - все вопросы по порядку</small>
+        </div>
+
         <div className="questions-container">
           <h3>Вопросы:</h3>
           
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { fetchQuizDetails } from '../api';
+import { clearQuizPlayBundle, fetchQuizDetails, startQuizAttempt } from '../api';
 import './QuizDetail.css';
 
 const QuizDetail = () => {
@@ -28,7 +28,21 @@ const QuizDetail = () => {
     loadQuizDetails();
   }, [quizId]);
 
-  const startQuiz = () => {
+  const startQuiz = async () => {
+    sessionStorage.removeItem(`quiz_${quizId}_attempt`);
+    // Новое прохождение загружает актуальную версию вопросов
+    clearQuizPlayBundle(quizId);
+    if (quiz.sample_size > 0) {
+      // Сервер выбирает вопросы для новой попытки, ответы прошлой к ней не относятся
+      sessionStorage.removeItem(`quiz_${quizId}_answers`);
+      sessionStorage.removeItem(`quiz_${quizId}_start_time`);
+      try {
+        await startQuizAttempt(quizId);
+      } catch (err) {
+        setError('Не удалось начать тест. Пожалуйста, попробуйте позже.');
+        return;
+      }
+    }
     navigate(`/quizzes/${quizId}/questions/0`);
   };
 
@@ -51,7 +65,7 @@ const QuizDetail = () => {
       <p>Дата создания: {new Date(quiz.created_at).toLocaleDateString()}</p>
       
       <div className="quiz-info">
-        <p>Количество вопросов: {quiz.questions.length}</p>
+        <p>Количество вопросов: {quiz.sample_size > 0 ? Math.min(quiz.sample_size, quiz.questions.length) : quiz.questions.length}</p>
       </div>
 
       <button 
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { fetchQuizQuestion } from '../api';
+import { fetchQuizPlayBundle, getQuizAttemptId } from '../api';
 import './QuizQuestion.css';
 
 const QuizQuestion = () => {
@@ -27,7 +27,23 @@ const QuizQuestion = () => {
     try {
       setLoading(true);
       
-      const data = await fetchQuizQuestion(quizId, questionIndex);
+      // Все вопросы загружаются одним запросом при первом вопросе,
+      // дальше берутся из уже загруженных данных
+      const bundle = await fetchQuizPlayBundle(quizId);
+      const index = parseInt(questionIndex);
+      const question = bundle.questions[index];
+      if (!question) {
+        throw new Error(`Вопрос ${index} не найден`);
+      }
+      const data = {
+        quiz_id: bundle.quiz_id,
+        quiz_title: bundle.quiz_title,
+        current_index: index,
+        total_questions: bundle.questions.length,
+        question,
+        hide_answers: bundle.hide_answers,
+        time_limit: bundle.time_limit
+      };
       setQuestionData(data);
       setError(null);
       
@@ -155,6 +171,7 @@ const QuizQuestion = () => {
     // Переход к результатам с текущими ответами
     navigate(`/quizzes/${quizId}/results`, { 
       state: { 
+        attemptId: getQuizAttemptId(quizId),
         quizId: quizId,
         quizTitle: questionData.quiz_title,
         userAnswers: updatedAnswers,
@@ -249,6 +266,7 @@ const QuizQuestion = () => {
           
           navigate(`/quizzes/${quizId}/results`, { 
             state: { 
+              attemptId: getQuizAttemptId(quizId),
               quizId: quizId,
               quizTitle: questionData.quiz_title,
               userAnswers: updatedAnswers,
@@ -282,6 +300,7 @@ const QuizQuestion = () => {
         
         navigate(`/quizzes/${quizId}/results`, { 
           state: { 
+            attemptId: getQuizAttemptId(quizId),
             quizId: quizId,
             quizTitle: questionData.quiz_title,
             userAnswers: updatedAnswers,
@@ -305,6 +324,7 @@ const QuizQuestion = () => {
       // Перейти к результатам с данными о всех ответах
       navigate(`/quizzes/${quizId}/results`, {
         state: {
+          attemptId: getQuizAttemptId(quizId),
           userAnswers: Object.values(userAnswers).filter(answer => answer), // Убираем пустые элементы
           totalQuestions: questionData.total_questions
         }
@@ -346,14 +366,10 @@ const QuizQuestion = () => {
     // Получаем данные о всех вопросах теста
     const loadAllQuestions = async () => {
       try {
-        const allQuestions = [];
-        const totalQuestions = questionData.total_questions;
-        
-        // Загружаем все вопросы
-        for (let i = 0; i < totalQuestions; i++) {
-          const questionData = await fetchQuizQuestion(quizId, i);
-          allQuestions.push(questionData.question);
-        }
+        // Вопросы уже загружены вместе с первым вопросом, запроса нет
+        const bundle = await fetchQuizPlayBundle(quizId);
+        const allQuestions = bundle.questions;
+        const totalQuestions = allQuestions.length;
         
         // Вычисляем количество правильных ответов
         const updatedUserAnswers = Object.values(userAnswers).filter(answer => answer); // Убираем пустые элементы
@@ -362,6 +378,7 @@ const QuizQuestion = () => {
         // Перенаправляем на страницу результатов
         navigate(`/quizzes/${quizId}/results`, {
           state: {
+            attemptId: getQuizAttemptId(quizId),
             quizId: quizId,
             quizTitle: questionData.quiz_title,
             userAnswers: updatedUserAnswers,
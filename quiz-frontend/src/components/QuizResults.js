@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useLocation, useNavigate } from 'react-router-dom';
 import './QuizResults.css';
-import { saveQuizResult } from '../api';
+import { saveQuizResult, createAttemptId } from '../api';
 
 const QuizResults = () => {
   const location = useLocation();
@@ -13,8 +13,13 @@ const QuizResults = () => {
   const [maxScore, setMaxScore] = useState(initialMaxScore || 0);
   const [resultSaved, setResultSaved] = useState(false);
   const [saveError, setSaveError] = useState(null);
+  // Балл, посчитанный сервером: при скрытых ответах клиент не знает правильных ответов
+  const [serverScore, setServerScore] = useState(null);
   const [hideAnswersState, setHideAnswersState] = useState(hideAnswers);
   const [timeExpiredState, setTimeExpiredState] = useState(timeExpired || false);
+  // Ключ попытки хранится в state навигации, поэтому переживает перезагрузку
+  // страницы: повторное сохранение не создаёт дубликат результата
+  const [attemptId] = useState(() => location.state?.attemptId || createAttemptId());
   
   // Проверяем, что все нужные данные переданы
   useEffect(() => {
@@ -92,6 +97,8 @@ const QuizResults = () => {
           }
           
           answersDetails.push({
+            questionId: userAnswer.questionId,
+            answerId: userAnswer.answerId,
             questionText: questionText,
             userAnswer: answerText,
             correctAnswers,
@@ -133,6 +140,8 @@ const QuizResults = () => {
       
       if (!userAnswer) {
         answersDetails.push({
+          questionId: question.id,
+          answerId: null,
           questionText: question.text,
           userAnswer: 'Не отвечено',
           correctAnswers: question.answers.filter(a => a.is_correct).map(a => a.text).join(', '),
@@ -162,6 +171,8 @@ const QuizResults = () => {
       }
       
       answersDetails.push({
+        questionId: question.id,
+        answerId: userAnswer.answerId,
         questionText: question.text,
         userAnswer: answerText,
         correctAnswers: question.answers.filter(a => a.is_correct).map(a => a.text).join(', '),
@@ -184,9 +195,11 @@ const QuizResults = () => {
   };
   
   const { score: calculatedScore, maxScore: calculatedMaxScore, answersDetails } = calculateResults();
+  const displayScore = serverScore ? serverScore.score : calculatedScore;
+  const displayMaxScore = serverScore ? serverScore.maxScore : calculatedMaxScore;
   
   // Убедимся, что делитель не равен нулю
-  const percentage = calculatedMaxScore > 0 ? Math.round((calculatedScore / calculatedMaxScore) * 100) : 0;
+  const percentage = displayMaxScore > 0 ? Math.round((displayScore / displayMaxScore) * 100) : 0;
   
   // Сохраняем результат в БД
   useEffect(() => {
@@ -200,15 +213,21 @@ const QuizResults = () => {
             answersDetails
           });
 
-          // Преобразуем answersDetails в формат для сохранения
+          // Преобразуем answersDetails в формат для сохранения.
+          // По question_id/answer_id сервер сам проверяет ответы и считает балл
           const detailedAnswers = answersDetails.map(detail => ({
+            question_id: detail.questionId,
+            answer_id: detail.answerId,
             question_text: detail.questionText,
             user_answer: detail.userAnswer,
             correct_answer: detail.correctAnswers,
             is_correct: detail.isCorrect
           }));
           
-          await saveQuizResult(quizId, calculatedScore, calculatedMaxScore, detailedAnswers);
+          const saved = await saveQuizResult(quizId, calculatedScore, calculatedMaxScore, detailedAnswers, attemptId);
+          if (saved && saved.score !== undefined && saved.max_score !== undefined) {
+            setServerScore({ score: saved.score, maxScore: saved.max_score });
+          }
           setResultSaved(true);
         } catch (error) {
           console.error('Ошибка при сохранении результата:', error);
@@ -218,7 +237,7 @@ const QuizResults = () => {
     };
     
     saveResult();
-  }, [quizId, calculatedScore, calculatedMaxScore, resultSaved, answersDetails]);
+  }, [quizId, calculatedScore, calculatedMaxScore, resultSaved, answersDetails, attemptId]);
   
   // Определяем оценку в зависимости от процента правильных ответов
   const getRating = (percent) => {
@@ -237,9 +256,9 @@ const QuizResults = () => {
       <div className="results-summary">
         <div className="score-circle" style={{ borderColor: rating.color }}>
           <div className="score-text">
-            <span className="score-value">{calculatedScore}</span>
+            <span className="score-value">{displayScore}</span>
             <span className="score-divider">/</span>
-            <span className="max-score">{calculatedMaxScore}</span>
+            <span className="max-score">{displayMaxScore}</span>
           </div>
           <div className="score-percentage" style={{ color: rating.color }}>
             {percentage}%
@@ -251,8 +270,8 @@ const QuizResults = () => {
           <div className="rating-value">{rating.grade}</div>
         </div>
         
-        <h3>Ваш результат: {calculatedScore} из {calculatedMaxScore}</h3>
-        <p>Процент правильных ответов: {Math.round((calculatedScore / calculatedMaxScore) * 100)}%</p>
+        <h3>Ваш результат: {displayScore} из {displayMaxScore}</h3>
+        <p>Процент правильных ответов: {percentage}%</p>
         
         {timeExpiredState && (
           <div className="time-expired-message">
@@ -56,7 +56,7 @@ function TestList() {
       })
       .then(response => {
         if (response) {
-          setTests(response.data);
+          setTests(response.data.results);
         }
         setLoading(false);
         setAuthChecked(true);
@@ -1,11 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
-import { getUserQuizResults } from '../api';
+import { getUserQuizResults, getQuizResult } from '../api';
 import './QuizResults.css'; // Используем те же стили
 
 const UserResults = () => {
   const [results, setResults] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [expandedResult, setExpandedResult] = useState(null);
   const navigate = useNavigate();
@@ -14,8 +16,9 @@ const UserResults = () => {
     const fetchResults = async () => {
       try {
         setLoading(true);
-        const resultsData = await getUserQuizResults();
-        setResults(resultsData);
+        const page = await getUserQuizResults();
+        setResults(page.results);
+        setNextPage(page.next);
         setError(null);
       } catch (err) {
         setError('Ошибка при загрузке результатов. Пожалуйста, попробуйте позже.');
@@ -28,6 +31,21 @@ const UserResults = () => {
     fetchResults();
   }, []);
 
+  // Догружаем следующую страницу истории по курсору
+  const loadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const page = await getUserQuizResults(nextPage);
+      setResults(prev => prev.concat(page.results));
+      setNextPage(page.next);
+    } catch (err) {
+      setError('Ошибка при загрузке результатов. Пожалуйста, попробуйте позже.');
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Форматирование даты
   const formatDate = (dateString) => {
     const date = new Date(dateString);
@@ -54,8 +72,22 @@ const UserResults = () => {
   };
 
   // Функция для переключения развернутого/свернутого состояния карточки результата
-  const toggleResultDetails = (resultId) => {
-    setExpandedResult(expandedResult === resultId ? null : resultId);
+  // Ответы по вопросам загружаются при первом раскрытии карточки
+  const toggleResultDetails = async (resultId) => {
+    if (expandedResult === resultId) {
+      setExpandedResult(null);
+      return;
+    }
+    setExpandedResult(resultId);
+    const result = results.find(r => r.id === resultId);
+    if (result && !result.user_answers) {
+      try {
+        const detail = await getQuizResult(resultId);
+        setResults(prev => prev.map(r => (r.id === resultId ? { ...r, user_answers: detail.user_answers } : r)));
+      } catch (err) {
+        console.error(err);
+      }
+    }
   };
 
   if (loading) {
@@ -153,6 +185,12 @@ const UserResults = () => {
         })}
       </div>
       
+      {nextPage && (
+        <button className="retry-button" onClick={loadMore} disabled={loadingMore}>
+          {loadingMore ? 'Загрузка...' : 'Показать ещё'}
+        </button>
+      )}
+      
       <button 
         className="home-button"
         onClick={() => navigate('/')}
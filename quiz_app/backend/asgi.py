@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Фоновый сброс очереди отложенной записи результатов (QUIZ_WRITE_BEHIND)
+from quiz.spool import start_flusher  # noqa: E402
+
+start_flusher()
@@ -17,6 +17,11 @@ DEBUG = os.environ.get('DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'localhost:8000', 'localhost:3000']
 
+# QUIZ_ASYNC_VIEWS=True: асинхронные варианты check_auth, QuizDetail, get_question
+# и SaveQuizResult (quiz/async_views.py) для запуска под ASGI, например
+# uvicorn backend.asgi:application. По умолчанию - синхронные представления под WSGI.
+QUIZ_ASYNC_VIEWS = os.environ.get('QUIZ_ASYNC_VIEWS', 'False') == 'True'
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -38,6 +43,8 @@ ACCOUNT_ADAPTER = 'allauth.account.adapter.DefaultAccountAdapter'
 SOCIALACCOUNT_ADAPTER = 'allauth.socialaccount.adapter.DefaultSocialAccountAdapter'
 
 MIDDLEWARE = [
+    'quiz.middleware.PreflightMiddleware',  # Ответ на CORS preflight до сессий и аутентификации, должен быть первым
+    'quiz.middleware.PerformanceMiddleware',  # Замер времени запроса
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -83,13 +90,18 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
-        'OPTIONS': {
-            'sslmode': os.environ.get('DB_SSL_MODE'),
-        },
-        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'OPTIONS': {},
+        # Под ASGI каждый запрос открывает своё соединение, и постоянные соединения
+        # не переиспользуются, а копятся, поэтому там по умолчанию они отключены
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0 if QUIZ_ASYNC_VIEWS else 60)),
     }
 }
 
+# sslmode понимает только PostgreSQL, поэтому передаём его лишь когда он задан
+# (локально можно работать с DB_ENGINE=django.db.backends.sqlite3)
+if os.environ.get('DB_SSL_MODE'):
+    DATABASES['default']['OPTIONS']['sslmode'] = os.environ.get('DB_SSL_MODE')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -180,13 +192,69 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'quiz.metrics.TimedJSONRenderer',  # JSON с замером времени сериализации
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Сессии читаются из кэша sessions и пишутся в БД (cached_db). Файловый кэш общий
+# для всех процессов сервера на машине, поэтому выход из системы сразу виден всем
+# воркерам; при нескольких машинах укажите общий каталог или другой общий кэш.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SESSION_CACHE_LOCATION', os.path.join(BASE_DIR, 'session_cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('SESSION_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+SESSION_CACHE_ALIAS = 'sessions'
+QUIZ_AUTH_STATUS_TTL = int(os.environ.get('QUIZ_AUTH_STATUS_TTL', 60))  # Секунд, пока check_auth отвечает по подписанной cookie (0 - отключить)
+
+# Кэш скомпилированных снимков квизов (см. quiz/snapshots.py)
+QUIZ_SNAPSHOT_LRU_SIZE = int(os.environ.get('QUIZ_SNAPSHOT_LRU_SIZE', 256))  # Снимков в памяти каждого процесса
+QUIZ_SNAPSHOT_CACHE_TIMEOUT = int(os.environ.get('QUIZ_SNAPSHOT_CACHE_TIMEOUT', 60 * 60 * 24))  # Секунд в общем кэше Django
+QUIZ_PLAY_MAX_PAGE_SIZE = int(os.environ.get('QUIZ_PLAY_MAX_PAGE_SIZE', 500))  # Вопросов на страницу в /play/
+QUIZ_LEADERBOARD_TOP_SIZE = 100  # Сколько первых мест таблицы лидеров хранится в кэше
+QUIZ_LEADERBOARD_CACHE_TIMEOUT = 60 * 10  # Секунд
+QUIZ_RESULT_BATCH_MAX_SIZE = int(os.environ.get('QUIZ_RESULT_BATCH_MAX_SIZE', 500))  # Результатов в одном пакетном запросе
+
+# Полнотекстовый поиск тестов (см. quiz/search.py)
+QUIZ_SEARCH_CONFIG = os.environ.get('QUIZ_SEARCH_CONFIG', 'russian')  # Конфигурация текстового поиска PostgreSQL
+QUIZ_SEARCH_MAX_RESULTS = int(os.environ.get('QUIZ_SEARCH_MAX_RESULTS', 50))  # Наибольший limit в /quizzes/search/
+
+# QUIZ_PUBLISH_ON_SAVE=True: после изменения тест публикуется статическим JSON-файлом
+# в STATIC_ROOT/published/ (см. quiz/publishing.py, команда publish_quizzes)
+QUIZ_PUBLISH_ON_SAVE = os.environ.get('QUIZ_PUBLISH_ON_SAVE', 'False') == 'True'
+
+# QUIZ_WRITE_BEHIND=True: SaveQuizResult ставит результат в локальную очередь
+# и отвечает 202, в основную базу результаты пишутся пачками (см. quiz/spool.py)
+QUIZ_WRITE_BEHIND = os.environ.get('QUIZ_WRITE_BEHIND', 'False') == 'True'
+QUIZ_RESULT_SPOOL_PATH = os.environ.get('QUIZ_RESULT_SPOOL_PATH', os.path.join(BASE_DIR, 'result_spool.sqlite3'))
+QUIZ_RESULT_SPOOL_MAX_DELAY = float(os.environ.get('QUIZ_RESULT_SPOOL_MAX_DELAY', 1.0))  # Секунд до сброса в базу
+QUIZ_RESULT_SPOOL_BATCH_SIZE = int(os.environ.get('QUIZ_RESULT_SPOOL_BATCH_SIZE', 500))  # Результатов в одной транзакции
+QUIZ_RESULT_SPOOL_LEASE = int(os.environ.get('QUIZ_RESULT_SPOOL_LEASE', 30))  # Секунд до повторного сброса пачки упавшего процесса
+QUIZ_RESULT_SPOOL_WAIT_TIMEOUT = float(os.environ.get('QUIZ_RESULT_SPOOL_WAIT_TIMEOUT', 2.0))  # Секунд ожидания очереди при чтении истории
+
+# LOG_ASYNC=True: запись логов в фоновом потоке через очередь (quiz/async_logging.py),
+# LOG_ASYNC=False: прежний синхронный StreamHandler
+LOG_ASYNC = os.environ.get('LOG_ASYNC', 'True') == 'True'
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
         'console': {
+            'class': 'quiz.async_logging.AsyncQueueHandler',
+            'stream': 'ext://sys.stderr',
+        } if LOG_ASYNC else {
             'class': 'logging.StreamHandler',
         },
     },
@@ -199,6 +267,10 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'DEBUG',
         },
+        'quiz': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+        },
     },
 }
 
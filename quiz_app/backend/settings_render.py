@@ -8,8 +8,10 @@ ALLOWED_HOSTS = ['*', 'quiz-app-km8k.onrender.com']
 
 # Добавляем whitenoise для статических файлов
 MIDDLEWARE = [
+    'quiz.middleware.PreflightMiddleware',  # Ответ на CORS preflight до сессий и аутентификации, должен быть первым
+    'quiz.middleware.PerformanceMiddleware',  # Замер времени запроса
     'corsheaders.middleware.CorsMiddleware',  # CORS должен быть первым
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'quiz.middleware.StaticFilesMiddleware',  # WhiteNoise, раздаёт и опубликованные тесты (quiz/publishing.py)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -21,6 +23,9 @@ MIDDLEWARE = [
     'quiz.middleware.CSRFMiddleware',  # Наш собственный middleware
 ]
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Тесты публикуются статическими файлами при каждом изменении; после collectstatic
+# при деплое нужно запустить python manage.py publish_quizzes
+QUIZ_PUBLISH_ON_SAVE = os.environ.get('QUIZ_PUBLISH_ON_SAVE', 'True') == 'True'
 
 # Настройки CORS для продакшн
 CORS_ALLOWED_ORIGINS = [
@@ -0,0 +1,122 @@
+"""
+Пропускная способность под gunicorn (WSGI, синхронные представления) и
+uvicorn (ASGI, QUIZ_ASYNC_VIEWS=True).
+
+Поднимает каждый сервер локально на тестовой базе и запускает заданное
+число одновременных «проходящих тест»: каждый читает все вопросы теста
+через get_question и отправляет результат в SaveQuizResult.
+
+    python -m benchmarks.bench_asgi --clients 100 --workers 2
+
+С SQLite параллельные записи упираются в блокировку файла базы, поэтому
+для сравнения отправки результатов лучше использовать PostgreSQL
+(DB_ENGINE=django.db.backends.postgresql и остальные DB_*).
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.utils import (
+    setup_django, shared_benchmark_database, local_server, login_sessions, summarize, print_table,
+)
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from quiz.models import Quiz, Question, Answer  # noqa: E402
+
+
+def seed(clients, questions, answers):
+    author = User.objects.create(username='bench_author')
+    quiz = Quiz.objects.create(title="Бенчмарк ASGI", author=author)
+    for q in range(questions):
+        question = Question.objects.create(quiz=quiz, text=f"Вопрос {q}", position=q)
+        Answer.objects.bulk_create([
+            Answer(question=question, text=f"Ответ {a}", is_correct=a == 0) for a in range(answers)
+        ])
+
+    sessions = login_sessions(f"bench_taker{i}" for i in range(clients))
+    return quiz.id, sessions
+
+
+def take_quiz(base_url, quiz_id, session_id, questions, latencies):
+    """
+    Один проходящий тест: все вопросы по очереди, затем отправка результата.
+    Возвращает число неуспешных ответов.
+    """
+    errors = 0
+    with requests.Session() as http:
+        http.cookies.set(settings.SESSION_COOKIE_NAME, session_id)
+        token = http.get(f'{base_url}/api/get-csrf-token/').json()['csrfToken']
+        http.headers['X-CSRFToken'] = token
+
+        user_answers = []
+        for index in range(questions):
+            start = time.perf_counter()
+            response = http.get(f'{base_url}/api/quizzes/{quiz_id}/questions/{index}/')
+            latencies['get_question'].append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+                continue
+            question = response.json()['question']
+            user_answers.append({'question_id': question['id'], 'answer_id': question['answers'][0]['id']})
+
+        start = time.perf_counter()
+        response = http.post(f'{base_url}/api/save-quiz-result/', json={'quiz_id': quiz_id, 'user_answers': user_answers})
+        latencies['save_result'].append((time.perf_counter() - start) * 1000)
+        if response.status_code != 201:
+            errors += 1
+    return errors
+
+
+def run_server(name, args, quiz_id, sessions):
+    with local_server(name, args.workers, args.port) as base_url:
+        latencies = {'get_question': [], 'save_result': []}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+            errors = sum(pool.map(
+                lambda session_id: take_quiz(base_url, quiz_id, session_id, args.questions, latencies),
+                sessions,
+            ))
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in latencies.values())
+    rows = []
+    for endpoint, samples in latencies.items():
+        stats = summarize(samples)
+        rows.append((name, endpoint, f"{stats['p50']:.1f}", f"{stats['p95']:.1f}", f"{stats['p99']:.1f}"))
+    return rows, total / elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50, help="Одновременных проходящих тест")
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--answers', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=2, help="Процессов сервера")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, shared_benchmark_database(tmp):
+        quiz_id, sessions = seed(args.clients, args.questions, args.answers)
+        connection.close()
+
+        rows, summary = [], []
+        for name in ('gunicorn', 'uvicorn'):
+            server_rows, rps, errors = run_server(name, args, quiz_id, sessions)
+            rows.extend(server_rows)
+            summary.append((name, f"{rps:.0f}", errors))
+
+    print(f"Клиентов: {args.clients}, вопросов: {args.questions}, воркеров: {args.workers}")
+    print_table(('server', 'endpoint', 'p50_ms', 'p95_ms', 'p99_ms'), rows)
+    print()
+    print_table(('server', 'requests_per_s', 'errors'), summary)
+
+
+if __name__ == '__main__':
+    main()
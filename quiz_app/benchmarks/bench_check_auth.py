@@ -0,0 +1,63 @@
+"""
+Время ответа /api/auth/check/ - эндпоинта, который фронтенд опрашивает чаще всех.
+
+Замеряет последовательные запросы через тестовый клиент Django для
+вошедшего пользователя (клиент сохраняет cookie между запросами, как
+браузер) и для анонимного, а также число SQL-запросов на один ответ.
+Тестовая база SQLite создаётся в файле, а не в памяти, чтобы обращение к
+сессии стоило хотя бы чтения с диска.
+
+    python -m benchmarks.bench_check_auth --requests 2000
+
+Для сравнения с проверкой через сессию в БД на каждый запрос:
+
+    QUIZ_AUTH_STATUS_TTL=0 SESSION_ENGINE=django.contrib.sessions.backends.db \\
+        python -m benchmarks.bench_check_auth
+"""
+import argparse
+import tempfile
+
+from benchmarks.utils import setup_django, shared_benchmark_database, measure, summarize, print_table
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+
+
+def run(client, requests):
+    samples, queries = [], 0
+    for _ in range(requests):
+        with measure() as m:
+            response = client.get('/api/auth/check/')
+        assert response.status_code == 200, response.status_code
+        samples.append(m['ms'])
+        queries += m['queries']
+    return samples, queries / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir, shared_benchmark_database(tmp_dir):
+        user_client = Client()
+        user_client.force_login(User.objects.create(username='bench', email='bench@example.com'))
+
+        rows = []
+        for name, client in (('authenticated', user_client), ('anonymous', Client())):
+            run(client, 20)  # прогрев
+            samples, queries = run(client, args.requests)
+            stats = summarize(samples)
+            rows.append((
+                name, f"{stats['p50']:.3f}", f"{stats['p95']:.3f}", f"{stats['p99']:.3f}", f"{queries:.2f}",
+            ))
+        print(f"SESSION_ENGINE={settings.SESSION_ENGINE} "
+              f"QUIZ_AUTH_STATUS_TTL={getattr(settings, 'QUIZ_AUTH_STATUS_TTL', None)}")
+        print_table(('scenario', 'p50_ms', 'p95_ms', 'p99_ms', 'queries'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Время ответа таблицы лидеров: топ-K и место отдельного пользователя.
+
+Заполняет таблицу лидеров одного теста заданным числом пользователей
+(пакетными вставками, минуя QuizResult) и замеряет get_top и get_rank.
+
+    python -m benchmarks.bench_leaderboard --users 1000000 --lookups 500
+"""
+import argparse
+import random
+
+from benchmarks.utils import setup_django, benchmark_database, measure, summarize, print_table
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from quiz import leaderboard  # noqa: E402
+from quiz.models import Quiz, LeaderboardEntry, LeaderboardScoreBucket  # noqa: E402
+
+
+def seed(quiz, users, max_score, chunk_size=10000):
+    rng = random.Random(42)
+    now = timezone.now()
+    buckets = {}
+    for start in range(0, users, chunk_size):
+        count = min(chunk_size, users - start)
+        created = User.objects.bulk_create(
+            [User(username=f"bench{start + i}") for i in range(count)]
+        )
+        entries = []
+        for user in created:
+            score = rng.randint(0, max_score)
+            buckets[score] = buckets.get(score, 0) + 1
+            entries.append(LeaderboardEntry(
+                quiz=quiz, user=user, best_score=score, max_score=max_score, achieved_at=now,
+            ))
+        LeaderboardEntry.objects.bulk_create(entries)
+    LeaderboardScoreBucket.objects.bulk_create([
+        LeaderboardScoreBucket(quiz=quiz, score=score, users=count) for score, count in buckets.items()
+    ])
+    return list(User.objects.filter(username__startswith='bench').values_list('id', flat=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--max-score', type=int, default=50)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        author = User.objects.create(username='author')
+        quiz = Quiz.objects.create(title="Бенчмарк", author=author)
+        user_ids = seed(quiz, args.users, args.max_score)
+        rng = random.Random(7)
+
+        top_cold, top_warm, rank = [], [], []
+        for _ in range(args.lookups):
+            cache.delete(leaderboard.top_cache_key(quiz.id, leaderboard.current_version(quiz.id)))
+            with measure() as m:
+                leaderboard.get_top(quiz.id, 10)
+            top_cold.append(m['ms'])
+            with measure() as m:
+                leaderboard.get_top(quiz.id, 10)
+            top_warm.append(m['ms'])
+            with measure() as m:
+                leaderboard.get_rank(quiz.id, rng.choice(user_ids))
+            rank.append(m['ms'])
+
+        rows = []
+        for name, samples in (('top10 (без кэша)', top_cold), ('top10 (кэш)', top_warm), ('rank', rank)):
+            stats = summarize(samples)
+            rows.append((name, f"{stats['p50']:.2f}", f"{stats['p95']:.2f}", f"{stats['p99']:.2f}"))
+        print(f"Пользователей в таблице лидеров: {args.users}")
+        print_table(('операция', 'p50_ms', 'p95_ms', 'p99_ms'), rows)
+
+
+if __name__ == '__main__':
+    main()
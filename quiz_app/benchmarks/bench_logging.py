@@ -0,0 +1,114 @@
+"""
+Пропускная способность запросов при разных режимах логирования.
+
+Гоняет через тестовый клиент Django проверку авторизации, создание теста
+и сохранение результата и сравнивает:
+
+- sync  - logging.StreamHandler, запись в файл в потоке запроса;
+- async - quiz.async_logging.AsyncQueueHandler, запись в фоновом потоке.
+
+Каждый режим замеряется при уровне логгера quiz DEBUG (подробный вывод,
+как раньше шёл на INFO) и INFO. Логи пишутся во временный файл.
+
+    python -m benchmarks.bench_logging --requests 500
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+from benchmarks.utils import setup_django, benchmark_database, print_table
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.test import Client  # noqa: E402
+from quiz.async_logging import AsyncQueueHandler  # noqa: E402
+from quiz.models import Quiz  # noqa: E402
+
+QUESTIONS = 10
+ANSWERS = 4
+
+
+def quiz_payload(index):
+    return {
+        'title': f"Бенчмарк {index}",
+        'description': "",
+        'questions': [
+            {
+                'text': f"Вопрос {q}",
+                'answers': [{'text': f"Ответ {a}", 'is_correct': a == 0} for a in range(ANSWERS)],
+            }
+            for q in range(QUESTIONS)
+        ],
+    }
+
+
+def run(client, requests):
+    """
+    Возвращает число запросов в секунду для каждого сценария.
+    """
+    client.post('/api/quizzes/', quiz_payload(0), content_type='application/json')
+    quiz_id = Quiz.objects.latest('id').id
+    questions = client.get(f'/api/quizzes/{quiz_id}/play/').json()['questions']
+    user_answers = [
+        {'question_id': question['id'], 'answer_id': question['answers'][0]['id']}
+        for question in questions
+    ]
+
+    scenarios = (
+        ('check_auth', lambda i: client.get('/api/auth/check/')),
+        ('create_quiz', lambda i: client.post('/api/quizzes/', quiz_payload(i), content_type='application/json')),
+        ('save_result', lambda i: client.post(
+            '/api/save-quiz-result/', {'quiz_id': quiz_id, 'user_answers': user_answers},
+            content_type='application/json',
+        )),
+    )
+    rates = {}
+    for name, send in scenarios:
+        start = time.perf_counter()
+        for i in range(requests):
+            send(i)
+        rates[name] = requests / (time.perf_counter() - start)
+    return rates
+
+
+def configure(mode, level, path):
+    logger = logging.getLogger('quiz')
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    if mode == 'async':
+        handler = AsyncQueueHandler(open(path, 'a', encoding='utf-8'))
+    else:
+        handler = logging.StreamHandler(open(path, 'a', encoding='utf-8'))
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    with benchmark_database(), tempfile.NamedTemporaryFile(suffix='.log') as log_file:
+        user = User.objects.create_user(username='bench', password='bench')
+        client = Client()
+        client.force_login(user)
+
+        rows = []
+        for level in ('DEBUG', 'INFO'):
+            for mode in ('sync', 'async'):
+                handler = configure(mode, level, log_file.name)
+                rates = run(client, args.requests)
+                handler.close()
+                rows.append((mode, level, *(f"{rate:.0f}" for rate in rates.values())))
+        print(f"Запросов на сценарий: {args.requests}")
+        print_table(('handler', 'level', 'check_auth_rps', 'create_quiz_rps', 'save_result_rps'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Время создания квиза в зависимости от его размера.
+
+Сравнивает прежнюю построчную вставку (INSERT на каждый вопрос и ответ)
+с пакетной вставкой QuizCreateSerializer.
+
+    python -m benchmarks.bench_quiz_create --sizes 10 100 300 1000 --answers 4
+"""
+import argparse
+
+from benchmarks.utils import setup_django, benchmark_database, measure, print_table
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import transaction  # noqa: E402
+from quiz.models import Quiz, Question, Answer  # noqa: E402
+from quiz.serializers import QuizCreateSerializer  # noqa: E402
+
+
+def make_payload(size, answers):
+    return {
+        'title': f"Бенчмарк {size}",
+        'hide_answers': True,
+        'time_limit': 0,
+        'questions': [
+            {
+                'text': f"Вопрос {i}",
+                'answers': [{'text': f"Ответ {j}", 'is_correct': j == 0} for j in range(answers)],
+            }
+            for i in range(size)
+        ],
+    }
+
+
+def create_row_by_row(payload, author):
+    # Прежняя реализация QuizCreateSerializer.create
+    data = dict(payload)
+    questions_data = data.pop('questions')
+    with transaction.atomic():
+        quiz = Quiz.objects.create(author=author, **data)
+        for position, question_data in enumerate(questions_data):
+            question = Question.objects.create(quiz=quiz, text=question_data['text'], position=position)
+            for answer_data in question_data['answers']:
+                Answer.objects.create(question=question, **answer_data)
+    return quiz
+
+
+def create_bulk(payload, author):
+    serializer = QuizCreateSerializer(data=payload)
+    serializer.is_valid(raise_exception=True)
+    return serializer.save(author=author)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 50, 100, 300, 1000])
+    parser.add_argument('--answers', type=int, default=4)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        author = User.objects.create(username='bench')
+        rows = []
+        for size in args.sizes:
+            payload = make_payload(size, args.answers)
+            with measure() as old:
+                create_row_by_row(payload, author)
+            with measure() as new:
+                create_bulk(payload, author)
+            rows.append((
+                size, size * args.answers,
+                f"{old['ms']:.1f}", old['queries'],
+                f"{new['ms']:.1f}", new['queries'],
+                f"{old['ms'] / new['ms']:.1f}x",
+            ))
+        print_table(
+            ('questions', 'answers', 'row_ms', 'row_queries', 'bulk_ms', 'bulk_queries', 'speedup'),
+            rows,
+        )
+
+
+if __name__ == '__main__':
+    main()
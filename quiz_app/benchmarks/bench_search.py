@@ -0,0 +1,110 @@
+"""
+Время полнотекстового поиска тестов (quiz/search.py).
+
+Заполняет базу тестами и вопросами из случайных русских слов (частоты
+слов распределены по Ципфу, как в живом тексте), строит поисковый индекс
+и замеряет search() для запросов из редких и частых слов, префиксов и
+нескольких слов сразу.
+
+    python -m benchmarks.bench_search --quizzes 100000 --questions 10 --lookups 200
+"""
+import argparse
+import itertools
+import random
+import time
+
+from benchmarks.utils import setup_django, benchmark_database, measure, summarize, print_table
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from quiz import search  # noqa: E402
+from quiz.models import Quiz, Question  # noqa: E402
+
+SYLLABLES = [
+    'ба', 'ве', 'ги', 'до', 'жу', 'за', 'ки', 'ло', 'ма', 'не', 'ор', 'пра', 'ри', 'ст', 'ту',
+    'фи', 'ха', 'це', 'чо', 'ша', 'эк', 'юр', 'ян', 'гра', 'кон', 'мет', 'пол', 'тер', 'ин', 'об',
+]
+ENDINGS = ['', 'а', 'ы', 'у', 'ой', 'ами', 'ах', 'ия', 'ии', 'ение', 'ный', 'ная', 'ное', 'ские']
+
+
+def vocabulary(rng, size):
+    """
+    Слова из случайных основ с окончаниями, около десяти форм на основу,
+    в случайном порядке: позиция слова - его ранг по частоте.
+    """
+    stems = set()
+    while len(stems) < size // 10:
+        stems.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    words = sorted({stem + ending for stem in stems for ending in rng.sample(ENDINGS, 10)})
+    rng.shuffle(words)
+    return words[:size], sorted(stems)
+
+
+def seed(quizzes, questions, vocab, chunk_size=2000):
+    rng = random.Random(42)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+    author = User.objects.create(username='author')
+
+    def sentence(size):
+        return ' '.join(rng.choices(vocab, cum_weights=weights, k=size)).capitalize()
+
+    for start in range(0, quizzes, chunk_size):
+        count = min(chunk_size, quizzes - start)
+        created = Quiz.objects.bulk_create([
+            Quiz(title=sentence(rng.randint(2, 5)), author=author, question_count=questions)
+            for _ in range(count)
+        ])
+        Question.objects.bulk_create([
+            Question(quiz=quiz, text=sentence(rng.randint(5, 12)) + '?', position=n)
+            for quiz in created
+            for n in range(questions)
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quizzes', type=int, default=20000)
+    parser.add_argument('--questions', type=int, default=10)
+    parser.add_argument('--vocabulary', type=int, default=20000)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        vocab, stems = vocabulary(random.Random(1), args.vocabulary)
+        seed(args.quizzes, args.questions, vocab)
+        started = time.perf_counter()
+        search.rebuild()
+        print(f"vendor={connection.vendor} quizzes={args.quizzes} questions={args.quizzes * args.questions} "
+              f"index_build_s={time.perf_counter() - started:.1f}")
+
+        rng = random.Random(7)
+        # Первые по частоте слова в живом тексте - служебные, поиск их
+        # отбрасывает (search.STOP_WORDS), поэтому частые слова берутся ниже
+        scenarios = {
+            'frequent word': lambda: vocab[rng.randrange(10, 100)],
+            'rare word': lambda: vocab[rng.randrange(len(vocab) // 2, len(vocab))],
+            'prefix': lambda: rng.choice(stems)[:4],
+            'two words': lambda: ' '.join(rng.sample(vocab[:2000], 2)),
+            'three words': lambda: ' '.join(rng.sample(vocab[:500], 3)),
+        }
+
+        rows = []
+        for name, make_query in scenarios.items():
+            samples, found = [], 0
+            for _ in range(args.lookups):
+                query = make_query()
+                with measure() as m:
+                    found += len(search.search(query))
+                samples.append(m['ms'])
+            stats = summarize(samples)
+            rows.append((
+                name, f"{stats['p50']:.3f}", f"{stats['p95']:.3f}", f"{stats['p99']:.3f}",
+                f"{found / args.lookups:.1f}",
+            ))
+        print_table(('query', 'p50_ms', 'p95_ms', 'p99_ms', 'avg_found'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""
+Нагрузочный тест API с сохранением базовых результатов и поиском регрессий.
+
+Поднимает локальный сервер (gunicorn или uvicorn) на тестовой базе SQLite
+или PostgreSQL из настроек DB_*, заполняет её тестами и пользователями и
+запускает одновременных «проходящих тест». Каждый из них в цикле смотрит
+список тестов, читает все вопросы случайного теста, отправляет результат
+и открывает историю результатов. Сеть не нужна, данные детерминированы (--seed).
+
+Для каждого эндпоинта выводятся p50/p95/p99, запросы в секунду и среднее
+число SQL-запросов на запрос (из заголовка Server-Timing).
+
+    python -m benchmarks.load_test run --clients 20 --save baseline.json
+    python -m benchmarks.load_test run --clients 20 --baseline baseline.json
+    python -m benchmarks.load_test compare baseline.json current.json --threshold 15
+
+При сравнении регрессией считается рост p95 или падение пропускной
+способности больше чем на --threshold процентов, а также любой рост числа
+SQL-запросов на запрос. Если регрессии есть, команда завершается с кодом 1.
+"""
+import argparse
+import json
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.utils import (
+    setup_django, shared_benchmark_database, local_server, login_sessions, summarize, print_table,
+)
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from quiz.models import Quiz, Question, Answer  # noqa: E402
+
+ENDPOINTS = ('quiz_list', 'get_question', 'save_result', 'history')
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def seed(quizzes, questions, answers):
+    """
+    Тесты с вопросами; возвращает список (id теста, число вопросов).
+    """
+    author = User.objects.create(username='load_author')
+    created = []
+    for index in range(quizzes):
+        quiz = Quiz.objects.create(title=f"Нагрузочный тест {index}", author=author)
+        question_objs = Question.objects.bulk_create(
+            [Question(quiz=quiz, text=f"Вопрос {q}", position=q) for q in range(questions)]
+        )
+        Answer.objects.bulk_create([
+            Answer(question=question, text=f"Ответ {a}", is_correct=a == 0)
+            for question in question_objs
+            for a in range(answers)
+        ])
+        Quiz.objects.filter(pk=quiz.pk).update(question_count=questions)
+        created.append((quiz.id, questions))
+    return created
+
+
+class Recorder:
+    """
+    Собирает задержки и число SQL-запросов по эндпоинтам из всех потоков.
+    """
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, endpoint, send, expected=200):
+        start = time.perf_counter()
+        response = send()
+        self.latencies[endpoint].append((time.perf_counter() - start) * 1000)
+        match = QUERIES_RE.search(response.headers.get('Server-Timing', ''))
+        if match:
+            self.queries[endpoint].append(int(match.group(1)))
+        if response.status_code != expected:
+            self.errors[endpoint] += 1
+            return None
+        return response.json()
+
+
+def quiz_taker(base_url, session_id, quizzes, iterations, seed_value, recorder):
+    rng = random.Random(seed_value)
+    with requests.Session() as http:
+        http.cookies.set(settings.SESSION_COOKIE_NAME, session_id)
+        http.headers['X-CSRFToken'] = http.get(f'{base_url}/api/get-csrf-token/').json()['csrfToken']
+
+        for _ in range(iterations):
+            recorder.call('quiz_list', lambda: http.get(f'{base_url}/api/quizzes/'))
+
+            quiz_id, questions = rng.choice(quizzes)
+            user_answers = []
+            for index in range(questions):
+                data = recorder.call(
+                    'get_question', lambda: http.get(f'{base_url}/api/quizzes/{quiz_id}/questions/{index}/')
+                )
+                if data is not None:
+                    question = data['question']
+                    answer = rng.choice(question['answers'])
+                    user_answers.append({'question_id': question['id'], 'answer_id': answer['id']})
+
+            recorder.call('save_result', lambda: http.post(
+                f'{base_url}/api/save-quiz-result/',
+                json={
+                    'quiz_id': quiz_id,
+                    'user_answers': user_answers,
+                    'attempt_id': str(uuid.UUID(int=rng.getrandbits(128))),
+                },
+            ), expected=201)
+            recorder.call('history', lambda: http.get(f'{base_url}/api/quiz-results/'))
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp, shared_benchmark_database(tmp):
+        quizzes = seed(args.quizzes, args.questions, args.answers)
+        sessions = login_sessions(f"load_taker{i}" for i in range(args.clients))
+        vendor = connection.vendor
+        connection.close()
+
+        recorder = Recorder()
+        with local_server(args.server, args.workers, args.port) as base_url:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.clients) as pool:
+                futures = [
+                    pool.submit(quiz_taker, base_url, session_id, quizzes, args.iterations, args.seed + i, recorder)
+                    for i, session_id in enumerate(sessions)
+                ]
+                for future in futures:
+                    future.result()
+            elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for endpoint in ENDPOINTS:
+        samples = recorder.latencies[endpoint]
+        queries = recorder.queries[endpoint]
+        stats = summarize(samples)
+        endpoints[endpoint] = {
+            'requests': len(samples),
+            'errors': recorder.errors[endpoint],
+            'throughput': len(samples) / elapsed,
+            'p50_ms': stats['p50'],
+            'p95_ms': stats['p95'],
+            'p99_ms': stats['p99'],
+            'queries_per_request': sum(queries) / len(queries) if queries else None,
+        }
+    return {
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'database': vendor,
+        'params': {
+            name: getattr(args, name)
+            for name in ('server', 'workers', 'clients', 'iterations', 'quizzes', 'questions', 'answers', 'seed')
+        },
+        'elapsed_s': elapsed,
+        'endpoints': endpoints,
+    }
+
+
+def print_report(report):
+    params = report['params']
+    print(
+        f"{params['server']} x{params['workers']}, {report['database']}, клиентов {params['clients']}, "
+        f"итераций {params['iterations']}, время {report['elapsed_s']:.1f} с"
+    )
+    rows = []
+    for endpoint, stats in report['endpoints'].items():
+        queries = stats['queries_per_request']
+        rows.append((
+            endpoint, stats['requests'], stats['errors'], f"{stats['throughput']:.1f}",
+            f"{stats['p50_ms']:.1f}", f"{stats['p95_ms']:.1f}", f"{stats['p99_ms']:.1f}",
+            '-' if queries is None else f"{queries:.1f}",
+        ))
+    print_table(('endpoint', 'requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'queries'), rows)
+
+
+def compare(baseline, current, threshold):
+    """
+    Возвращает список найденных регрессий в виде строк.
+    """
+    regressions = []
+    for endpoint, base in baseline['endpoints'].items():
+        stats = current['endpoints'].get(endpoint)
+        if stats is None or not base['requests']:
+            continue
+        if base['p95_ms'] and stats['p95_ms'] > base['p95_ms'] * (1 + threshold / 100):
+            regressions.append(
+                f"{endpoint}: p95 {base['p95_ms']:.1f} -> {stats['p95_ms']:.1f} мс "
+                f"(+{(stats['p95_ms'] / base['p95_ms'] - 1) * 100:.0f}%)"
+            )
+        if base['throughput'] and stats['throughput'] < base['throughput'] * (1 - threshold / 100):
+            regressions.append(
+                f"{endpoint}: пропускная способность {base['throughput']:.1f} -> {stats['throughput']:.1f} запр/с"
+            )
+        base_queries, queries = base['queries_per_request'], stats['queries_per_request']
+        if base_queries is not None and queries is not None and queries > base_queries:
+            regressions.append(f"{endpoint}: SQL-запросов на запрос {base_queries:.1f} -> {queries:.1f}")
+    return regressions
+
+
+def report_comparison(baseline, current, threshold):
+    if baseline['params'] != current['params'] or baseline['database'] != current['database']:
+        print("Внимание: параметры прогона отличаются от базового, сравнение может быть неточным")
+    regressions = compare(baseline, current, threshold)
+    if regressions:
+        print(f"Регрессии (порог {threshold}%):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"Регрессий нет (порог {threshold}%)")
+    return 0
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Прогнать нагрузку")
+    run_parser.add_argument('--server', choices=('gunicorn', 'uvicorn'), default='gunicorn')
+    run_parser.add_argument('--workers', type=int, default=2)
+    run_parser.add_argument('--port', type=int, default=8766)
+    run_parser.add_argument('--clients', type=int, default=10, help="Одновременных проходящих тест")
+    run_parser.add_argument('--iterations', type=int, default=5, help="Тестов на каждого клиента")
+    run_parser.add_argument('--quizzes', type=int, default=20)
+    run_parser.add_argument('--questions', type=int, default=10)
+    run_parser.add_argument('--answers', type=int, default=4)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--save', help="Записать результат в JSON-файл")
+    run_parser.add_argument('--baseline', help="Сравнить с сохранённым результатом")
+    run_parser.add_argument('--threshold', type=float, default=10.0, help="Допустимое ухудшение, %%")
+
+    compare_parser = subparsers.add_parser('compare', help="Сравнить два сохранённых результата")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=10.0, help="Допустимое ухудшение, %%")
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        sys.exit(report_comparison(load(args.baseline), load(args.current), args.threshold))
+
+    report = run(args)
+    print_report(report)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результат сохранён в {args.save}")
+    if args.baseline:
+        sys.exit(report_comparison(load(args.baseline), report, args.threshold))
+
+
+if __name__ == '__main__':
+    main()
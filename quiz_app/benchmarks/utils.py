@@ -0,0 +1,159 @@
+"""
+Общие помощники для скриптов бенчмарков.
+
+Скрипты запускаются из каталога quiz_app, например:
+
+    DB_ENGINE=django.db.backends.sqlite3 DB_NAME=bench.sqlite3 python -m benchmarks.bench_quiz_create
+
+Каждый бенчмарк работает в отдельной тестовой базе, которая создаётся
+и удаляется автоматически, поэтому рабочие данные не затрагиваются.
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Создаёт тестовую базу на время бенчмарка и удаляет её после.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextmanager
+def measure():
+    """
+    Замеряет время (в мс) и число SQL-запросов внутри блока.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    stats = {}
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        yield stats
+        stats['ms'] = (time.perf_counter() - start) * 1000
+    stats['queries'] = len(ctx.captured_queries)
+
+
+def percentile(samples, pct):
+    """
+    Перцентиль по методу ближайшего ранга.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'mean': statistics.fmean(samples) if samples else 0.0,
+    }
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(v).rjust(w) for v, w in zip(row, widths)))
+
+
+# Команды запуска локального сервера: QUIZ_ASYNC_VIEWS и аргументы командной строки
+SERVERS = {
+    'gunicorn': ('False', ['gunicorn', 'backend.wsgi:application', '--workers', '{workers}',
+                           '--bind', '127.0.0.1:{port}']),
+    'uvicorn': ('True', [sys.executable, '-m', 'uvicorn', 'backend.asgi:application', '--workers', '{workers}',
+                         '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning']),
+}
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"Сервер не поднялся на порту {port}")
+
+
+@contextmanager
+def local_server(name, workers, port):
+    """
+    Запускает сервер из SERVERS на текущей (тестовой) базе и отдаёт его адрес.
+    """
+    from django.db import connection
+
+    async_views, command = SERVERS[name]
+    env = dict(
+        os.environ,
+        DB_NAME=connection.settings_dict['NAME'],
+        QUIZ_ASYNC_VIEWS=async_views,
+        DEBUG='False',
+        LOG_LEVEL='WARNING',
+    )
+    command = [part.format(workers=workers, port=port) for part in command]
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+@contextmanager
+def shared_benchmark_database(tmp_dir):
+    """
+    benchmark_database, доступная и другим процессам: тестовая база SQLite
+    по умолчанию создаётся в памяти, поэтому для неё задаётся файл в tmp_dir.
+    """
+    from django.db import connection
+
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tmp_dir, 'benchmark.sqlite3')
+    with benchmark_database():
+        yield
+
+
+def login_sessions(usernames):
+    """
+    Создаёт пользователей и возвращает id их сессий для cookie.
+    """
+    from django.conf import settings
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    sessions = []
+    for username in usernames:
+        client = Client()
+        client.force_login(User.objects.create(username=username))
+        sessions.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+    return sessions
@@ -1,8 +1,12 @@
 from django.contrib import admin
-from .models import Quiz, Question, Answer, QuizResult
+from .models import Quiz, Question, Answer, QuizResult, QuestionStatistic, AnswerStatistic, LeaderboardEntry, QuizAttempt
 
 admin.site.register(Quiz)
 admin.site.register(Question)
 admin.site.register(Answer)
 admin.site.register(QuizResult)
+admin.site.register(QuestionStatistic)
+admin.site.register(AnswerStatistic)
+admin.site.register(LeaderboardEntry)
+admin.site.register(QuizAttempt)
 # Register your models here.
@@ -0,0 +1,91 @@
+"""
+Компактное хранение ответов пользователя в QuizResult.user_answers.
+
+Фронтенд присылает по каждому вопросу подробную запись (question_id,
+answer_id, question_text, user_answer, correct_answer, is_correct): тексты
+повторяют содержимое теста и занимают большую часть строки результата.
+В базе запись хранится как [id вопроса, [id выбранных ответов], 1 или 0 -
+засчитан ли вопрос], JSON пишется без пробелов и \\u-экранирования
+(models.CompactJSONEncoder). Тексты восстанавливаются при чтении из снимка
+теста (quiz/snapshots.py), поэтому API отдаёт прежний формат. Признак
+верности фиксируется при проверке и не меняется при последующих правках
+теста.
+
+Тексты берутся из текущей версии теста, а не из той, по которой
+проходили: это осознанная плата за размер строки. После правки вопроса
+или ответа старые результаты показывают новый текст, удалённые вопрос или
+ответ заменяются пометками DELETED_QUESTION и DELETED_ANSWER, удалённый
+тест - пометками у всех вопросов. Балл, максимальный балл, id выбранных
+ответов и признак верности каждого вопроса при этом не меняются.
+
+Записи, которые не удалось сопоставить вопросам теста, хранятся как есть и
+отдаются без изменений; так же читаются строки в прежнем подробном формате.
+"""
+from .grading import is_correct, resolve_entry
+from .snapshots import get_snapshot_question
+
+UNANSWERED = 'Не отвечено'
+DELETED_QUESTION = 'Вопрос удалён из теста'
+DELETED_ANSWER = 'Ответ удалён из теста'
+
+
+def is_compact(entry):
+    return isinstance(entry, list) and len(entry) == 3
+
+
+def encode(key, user_answers):
+    """
+    Переводит ответы в компактный формат по ключу ответов теста
+    (см. grading.build_answer_key). Порядок записей сохраняется.
+    """
+    if not user_answers:
+        return user_answers
+    entries = user_answers.values() if isinstance(user_answers, dict) else user_answers
+
+    encoded = []
+    for entry in entries:
+        resolved = resolve_entry(key, entry)
+        if resolved is None:
+            encoded.append(entry)
+            continue
+        question_id, selected = resolved
+        encoded.append([question_id, sorted(selected), int(is_correct(key, question_id, selected))])
+    return encoded
+
+
+def _expand_entry(snapshot, entry):
+    question_id, answer_ids, correct = entry
+    question = get_snapshot_question(snapshot, question_id) if snapshot is not None else None
+    if question is None:
+        question_text, user_answer, correct_answer = DELETED_QUESTION, '', ''
+    else:
+        texts = {answer.id: answer.text for answer in question.answers}
+        question_text = question.text
+        user_answer = ', '.join(texts[a] for a in answer_ids if a in texts)
+        if not user_answer:
+            user_answer = DELETED_ANSWER if answer_ids else UNANSWERED
+        correct_answer = ', '.join(answer.text for answer in question.answers if answer.is_correct)
+
+    expanded = {
+        'question_id': question_id,
+        'answer_id': answer_ids[0] if len(answer_ids) == 1 else None,
+        'question_text': question_text,
+        'user_answer': user_answer,
+        'correct_answer': correct_answer,
+        'is_correct': bool(correct),
+    }
+    if len(answer_ids) > 1:
+        expanded['answer_ids'] = answer_ids
+    return expanded
+
+
+def expand(snapshot, stored):
+    """
+    Восстанавливает подробный формат ответов по снимку теста (snapshot
+    может быть None, если тест удалён). Тексты - из этого снимка, то есть
+    из текущей версии теста (см. описание модуля). Вопросы ищутся по
+    словарю, который строится один раз на версию теста (get_snapshot_question).
+    """
+    if not stored or not isinstance(stored, list):
+        return stored
+    return [_expand_entry(snapshot, entry) if is_compact(entry) else entry for entry in stored]
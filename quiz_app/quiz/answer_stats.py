@@ -0,0 +1,186 @@
+"""
+Инкрементальная статистика ответов по вопросам.
+
+Таблицы QuestionStatistic и AnswerStatistic хранят счётчики по каждому
+вопросу (ответов всего / верных) и по каждому варианту ответа (сколько
+раз выбран). Они обновляются в той же транзакции, что и сохранение
+результата, поэтому эндпоинт статистики читает готовые числа и не
+разбирает JSON user_answers из истории.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from .grading import is_correct, resolve_selections
+from .models import QuestionStatistic, AnswerStatistic, QuizResult
+
+
+def _ensure_rows(key, question_ids, answer_ids):
+    # Строки счётчиков создаются при первом обращении; конфликт означает, что строка уже есть
+    QuestionStatistic.objects.bulk_create(
+        [QuestionStatistic(quiz_id=key.quiz_id, question_id=question_id) for question_id in question_ids],
+        ignore_conflicts=True,
+    )
+    AnswerStatistic.objects.bulk_create(
+        [
+            AnswerStatistic(quiz_id=key.quiz_id, question_id=key.answer_question[answer_id], answer_id=answer_id)
+            for answer_id in answer_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+# Строк в одном UPDATE с CASE: два параметра на строку, с запасом до лимита SQLite
+INCREMENT_CHUNK_SIZE = 400
+
+
+def _increment(model, key_field, field, counter):
+    """
+    Прибавляет counter[id] к полю field строк model с key_field=id. Равные
+    приращения - один UPDATE с F() + n, разные - один UPDATE с CASE на
+    каждые INCREMENT_CHUNK_SIZE строк.
+    """
+    if not counter:
+        return
+    deltas = set(counter.values())
+    if len(deltas) == 1:
+        model.objects.filter(**{f'{key_field}__in': list(counter)}).update(**{field: F(field) + deltas.pop()})
+        return
+    items = sorted(counter.items())
+    for start in range(0, len(items), INCREMENT_CHUNK_SIZE):
+        chunk = items[start:start + INCREMENT_CHUNK_SIZE]
+        delta = Case(
+            *[When(**{key_field: object_id}, then=Value(count)) for object_id, count in chunk],
+            default=Value(0),
+        )
+        model.objects.filter(**{f'{key_field}__in': [object_id for object_id, _ in chunk]}).update(
+            **{field: F(field) + delta}
+        )
+
+
+def record_attempt(key, selections):
+    """
+    Добавляет одну попытку к счётчикам. Вызывается внутри транзакции сохранения результата.
+
+    selections - id вопроса -> frozenset выбранных id ответов (см. grading.resolve_selections).
+    Все приращения равны единице, поэтому каждая таблица обновляется одним UPDATE.
+    """
+    record_attempts(key, [selections])
+
+
+def record_attempts(key, selections_list):
+    """
+    Добавляет к счётчикам несколько попыток одного квиза (пакетная отправка
+    результатов). Каждая таблица обновляется одним UPDATE, поэтому число
+    запросов не зависит от числа попыток.
+    """
+    attempts = Counter()
+    correct = Counter()
+    selected = Counter()
+    for selections in selections_list:
+        for question_id, answer_ids in selections.items():
+            attempts[question_id] += 1
+            if is_correct(key, question_id, answer_ids):
+                correct[question_id] += 1
+            selected.update(answer_ids)
+    if not attempts:
+        return
+
+    _ensure_rows(key, list(attempts), sorted(selected))
+    _increment(QuestionStatistic, 'question_id', 'attempts', attempts)
+    _increment(QuestionStatistic, 'question_id', 'correct_count', correct)
+    _increment(AnswerStatistic, 'answer_id', 'selected_count', selected)
+
+
+def rebuild_quiz_statistics(key, chunk_size=2000):
+    """
+    Пересчитывает статистику квиза по всей истории результатов.
+
+    Результаты читаются потоком порциями по chunk_size, в памяти держатся
+    только счётчики (их число ограничено числом вопросов и ответов).
+    Возвращает число обработанных результатов.
+    """
+    attempts = Counter()
+    correct = Counter()
+    selected = Counter()
+    processed = 0
+
+    results = (
+        QuizResult.objects.filter(quiz_id=key.quiz_id)
+        .exclude(user_answers=None)
+        .values_list('user_answers', flat=True)
+        .order_by('id')
+    )
+    for user_answers in results.iterator(chunk_size=chunk_size):
+        processed += 1
+        selections, _ = resolve_selections(key, user_answers)
+        for question_id, answer_ids in selections.items():
+            attempts[question_id] += 1
+            if is_correct(key, question_id, answer_ids):
+                correct[question_id] += 1
+            selected.update(answer_ids)
+
+    with transaction.atomic():
+        QuestionStatistic.objects.filter(quiz_id=key.quiz_id).delete()
+        AnswerStatistic.objects.filter(quiz_id=key.quiz_id).delete()
+        QuestionStatistic.objects.bulk_create(
+            [
+                QuestionStatistic(
+                    quiz_id=key.quiz_id, question_id=question_id,
+                    attempts=count, correct_count=correct[question_id],
+                )
+                for question_id, count in attempts.items()
+            ],
+            batch_size=chunk_size,
+        )
+        AnswerStatistic.objects.bulk_create(
+            [
+                AnswerStatistic(
+                    quiz_id=key.quiz_id, question_id=key.answer_question[answer_id],
+                    answer_id=answer_id, selected_count=count,
+                )
+                for answer_id, count in selected.items()
+            ],
+            batch_size=chunk_size,
+        )
+    return processed
+
+
+def quiz_statistics_data(snapshot):
+    """
+    Статистика квиза для API: доля верных ответов по каждому вопросу и
+    частота выбора каждого варианта. Два запроса к таблицам счётчиков,
+    тексты берутся из снимка квиза.
+    """
+    question_stats = {
+        question_id: (attempts, correct_count)
+        for question_id, attempts, correct_count in QuestionStatistic.objects.filter(
+            quiz_id=snapshot.id
+        ).values_list('question_id', 'attempts', 'correct_count')
+    }
+    answer_stats = dict(
+        AnswerStatistic.objects.filter(quiz_id=snapshot.id).values_list('answer_id', 'selected_count')
+    )
+
+    questions = []
+    for question in snapshot.questions:
+        attempts, correct_count = question_stats.get(question.id, (0, 0))
+        questions.append({
+            'id': question.id,
+            'text': question.text,
+            'attempts': attempts,
+            'correct_count': correct_count,
+            'correct_rate': correct_count / attempts if attempts else None,
+            'answers': [
+                {
+                    'id': answer.id,
+                    'text': answer.text,
+                    'is_correct': answer.is_correct,
+                    'selected_count': answer_stats.get(answer.id, 0),
+                    'frequency': answer_stats.get(answer.id, 0) / attempts if attempts else None,
+                }
+                for answer in question.answers
+            ],
+        })
+    return {'quiz_id': snapshot.id, 'quiz_title': snapshot.title, 'questions': questions}
@@ -0,0 +1,75 @@
+"""
+Неблокирующий вывод логов.
+
+AsyncQueueHandler кладёт записи в ограниченную очередь, а запись в поток
+(и форматирование сообщения) выполняет фоновый QueueListener. Поток
+запроса тратит время только на проверку уровня и put в очередь; при
+переполнении очереди записи отбрасываются, а не блокируют запрос.
+
+Подключается в LOGGING (backend/settings.py) вместо logging.StreamHandler.
+"""
+import atexit
+import logging
+import logging.config
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_QUEUE_SIZE = 10000
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler со своим StreamHandler и фоновым QueueListener.
+
+    stream принимает те же значения, что и в LOGGING ('ext://sys.stderr').
+    Форматтер и уровень, заданные в LOGGING, применяются к целевому
+    обработчику в фоновом потоке.
+    """
+    def __init__(self, stream=None, queue_size=DEFAULT_QUEUE_SIZE):
+        if isinstance(stream, str):
+            stream = logging.config.BaseConfigurator({}).convert(stream)
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = logging.StreamHandler(stream)
+        self.dropped = 0
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self._stop_listener)
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Форматирование откладывается до фонового потока. Аргументы
+        # приводятся к строке заранее только если это не простые значения,
+        # чтобы изменяемые объекты не успели поменяться до записи.
+        if record.args and not _is_plain(record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _stop_listener(self):
+        # Дописывает оставшиеся в очереди записи; повторный вызов ничего не делает
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self):
+        self._stop_listener()
+        super().close()
+
+
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+def _is_plain(args):
+    values = args.values() if isinstance(args, dict) else args
+    return all(isinstance(value, _PLAIN_TYPES) for value in values)
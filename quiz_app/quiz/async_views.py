@@ -0,0 +1,199 @@
+"""
+Асинхронные варианты самых нагруженных эндпоинтов для запуска под ASGI.
+
+Включаются настройкой QUIZ_ASYNC_VIEWS (см. quiz/urls.py). Пока запрос
+ждёт БД, воркер uvicorn обслуживает другие запросы, поэтому один процесс
+выдерживает сотни одновременно проходящих тест пользователей.
+
+Ответы совпадают с синхронными представлениями из quiz/views.py. Чтение
+идёт через асинхронный ORM; транзакция сохранения результата и загрузка
+пользователя из сессии выполняются в потоке через sync_to_async.
+"""
+import functools
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework import exceptions, status
+
+from .auth_status import fast_path
+from .conditional import aquiz_state, not_modified, quiz_validators, set_validators
+from .results import AttemptConflict, QuizNotFound, save_result
+from .spool import WRITE_BEHIND, enqueue
+from .serializers import QuizResultSerializer
+from .snapshots import aget_quiz_snapshot, question_data, quiz_detail_data
+from .views import auth_status_response
+
+logger = logging.getLogger(__name__)
+
+
+def _json(request, data, status=200):
+    # JSON кодируется здесь, а не в рендерере DRF, поэтому время сериализации пишем сами
+    start = time.perf_counter()
+    response = JsonResponse(data, status=status, encoder=DjangoJSONEncoder, json_dumps_params={'ensure_ascii': False})
+    metrics = getattr(request, 'perf_metrics', None)
+    if metrics is not None:
+        metrics.serialize_time += time.perf_counter() - start
+    return response
+
+
+def _require_method(method):
+    # django.views.decorators.http.require_http_methods в Django 4.2 не поддерживает async-представления
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != method:
+                return HttpResponseNotAllowed([method])
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def _get_user(request):
+    # request.user ленивый и читает сессию и пользователя из БД, поэтому загружаем его в потоке
+    return await sync_to_async(get_user)(request)
+
+
+async def _authenticated_user(request):
+    """
+    Пользователь запроса или None, если он не аутентифицирован.
+    """
+    user = await _get_user(request)
+    return user if user.is_authenticated else None
+
+
+def _not_authenticated(request):
+    return _json(request, {'detail': str(exceptions.NotAuthenticated.default_detail)}, status.HTTP_403_FORBIDDEN)
+
+
+def _not_found(request):
+    return _json(request, {'detail': str(exceptions.NotFound.default_detail)}, status.HTTP_404_NOT_FOUND)
+
+
+@fast_path
+@_require_method('GET')
+async def check_auth(request):
+    """
+    Асинхронный вариант views.check_auth.
+    """
+    user = await _get_user(request)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[check_auth] authenticated=%s session=%s cookies=%s",
+                     user.is_authenticated, request.session.session_key, request.COOKIES)
+
+    # Проверка наличия сессии
+    if not request.session.session_key:
+        await sync_to_async(request.session.save)()
+        logger.debug("[check_auth] Created new session: %s", request.session.session_key)
+
+    return auth_status_response(request, user)
+
+
+@_require_method('GET')
+async def quiz_detail(request, pk):
+    """
+    Асинхронный вариант views.QuizDetail.
+    """
+    if await _authenticated_user(request) is None:
+        return _not_authenticated(request)
+    state = await aquiz_state(pk)
+    if state is None:
+        return _not_found(request)
+    validators = quiz_validators(pk, state, 'detail')
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    snapshot = await aget_quiz_snapshot(pk, state.version)
+    if snapshot is None:
+        return _not_found(request)
+    return set_validators(_json(request, quiz_detail_data(snapshot)), validators)
+
+
+@_require_method('GET')
+async def get_question(request, quiz_id, question_index):
+    """
+    Асинхронный вариант views.get_question.
+    """
+    if await _authenticated_user(request) is None:
+        return _not_authenticated(request)
+    state = await aquiz_state(quiz_id)
+    if state is None:
+        return _not_found(request)
+    validators = quiz_validators(quiz_id, state, 'question', question_index)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    snapshot = await aget_quiz_snapshot(quiz_id, state.version)
+    if snapshot is None:
+        return _not_found(request)
+    questions = snapshot.questions
+
+    if question_index < 0 or question_index >= len(questions):
+        return _json(request, {"error": "Индекс вопроса вне допустимого диапазона"}, status.HTTP_400_BAD_REQUEST)
+
+    return set_validators(_json(request, {
+        "quiz_id": quiz_id,
+        "quiz_title": snapshot.title,
+        "current_index": question_index,
+        "total_questions": len(questions),
+        "question": question_data(questions[question_index]),
+        "hide_answers": snapshot.hide_answers,
+        "time_limit": snapshot.time_limit
+    }), validators)
+
+
+def _save_result_data(user, data):
+    # Сериализатор читает снимок теста и версию из БД (get_user_answers),
+    # поэтому ответ собирается в том же потоке, что и сохранение
+    quiz_result, created = save_result(user, data)
+    return QuizResultSerializer(quiz_result).data, created
+
+
+@_require_method('POST')
+async def save_quiz_result(request):
+    """
+    Асинхронный вариант views.SaveQuizResult. CSRF проверяет CsrfViewMiddleware,
+    как SessionAuthentication в синхронном варианте.
+    """
+    user = await _authenticated_user(request)
+    if user is None:
+        return _not_authenticated(request)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return _json(request, {"error": "Некорректный JSON"}, status.HTTP_400_BAD_REQUEST)
+    if not isinstance(data, dict):
+        data = {}
+    quiz_id = data.get('quiz_id')
+    score = data.get('score')
+    max_score = data.get('max_score')
+    user_answers = data.get('user_answers')
+
+    logger.debug("[save_quiz_result] save quiz_id=%s score=%s max_score=%s user=%s user_answers=%s",
+                 quiz_id, score, max_score, user.username, user_answers)
+
+    if WRITE_BEHIND:
+        try:
+            ack = await sync_to_async(enqueue)(user, data)
+        except QuizNotFound as exc:
+            return _json(request, {"error": str(exc)}, status.HTTP_404_NOT_FOUND)
+        except ValueError as exc:
+            return _json(request, {"error": str(exc)}, status.HTTP_400_BAD_REQUEST)
+        return _json(request, ack, status.HTTP_202_ACCEPTED)
+
+    try:
+        result_data, created = await sync_to_async(_save_result_data)(user, data)
+    except QuizNotFound as exc:
+        return _json(request, {"error": str(exc)}, status.HTTP_404_NOT_FOUND)
+    except AttemptConflict as exc:
+        return _json(request, {"error": str(exc)}, status.HTTP_409_CONFLICT)
+    except ValueError as exc:
+        return _json(request, {"error": str(exc)}, status.HTTP_400_BAD_REQUEST)
+    return _json(request, result_data, status.HTTP_201_CREATED if created else status.HTTP_200_OK)
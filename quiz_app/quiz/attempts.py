@@ -0,0 +1,96 @@
+"""
+Попытки прохождения теста со случайной выборкой вопросов.
+
+Если у теста задан sample_size, для каждой попытки из всех его вопросов
+случайно выбирается sample_size штук. Выборка делается в памяти по id
+вопросов из снимка теста (quiz/snapshots.py) без ORDER BY RANDOM() и
+сохраняется в QuizAttempt упакованным массивом id в порядке показа
+(8 байт на вопрос). Дальше вопрос попытки по номеру - один запрос по
+первичному ключу попытки (вместе с версией теста для снимка), текст и
+ответы берутся из снимка. Изменение теста во время попытки её не ломает:
+удалённый вопрос просто не отдаётся.
+
+id попытки клиент передаёт как attempt_id при сохранении результата, и
+проверка ответов (quiz/grading.py) считает максимальный балл по вопросам
+попытки, а не по всему тесту.
+"""
+import random
+import struct
+
+from .models import QuizAttempt
+from .snapshots import get_snapshot_question, question_data
+
+# Случайность не из общего генератора: выборку нельзя предсказать по
+# предыдущим попыткам
+_random = random.SystemRandom()
+
+
+def pack_ids(ids):
+    return struct.pack(f'<{len(ids)}q', *ids)
+
+
+def unpack_ids(data):
+    data = bytes(data)
+    return struct.unpack(f'<{len(data) // 8}q', data)
+
+
+def start_attempt(user, snapshot):
+    """
+    Создаёт попытку со случайной выборкой вопросов снимка.
+    """
+    pool = [question.id for question in snapshot.questions]
+    question_ids = _random.sample(pool, min(snapshot.sample_size, len(pool)))
+    return QuizAttempt.objects.create(quiz_id=snapshot.id, user=user, question_ids=pack_ids(question_ids))
+
+
+def attempt_data(snapshot, attempt_id, question_ids):
+    """
+    Все вопросы попытки в формате /play/ и id попытки. Вопросы, удалённые
+    из теста после начала попытки, не отдаются.
+    """
+    include_correct = not snapshot.hide_answers
+    questions = [get_snapshot_question(snapshot, question_id) for question_id in question_ids]
+    questions = [question for question in questions if question is not None]
+    return {
+        "attempt_id": str(attempt_id),
+        "quiz_id": snapshot.id,
+        "quiz_title": snapshot.title,
+        "total_questions": len(questions),
+        "offset": 0,
+        "next_offset": None,
+        "questions": [question_data(question, include_correct) for question in questions],
+        "hide_answers": snapshot.hide_answers,
+        "time_limit": snapshot.time_limit
+    }
+
+
+def get_attempt(user, attempt_id):
+    """
+    (id теста, версия теста, id вопросов) попытки пользователя одним
+    запросом по первичному ключу или None.
+    """
+    row = (
+        QuizAttempt.objects.filter(pk=attempt_id, user=user)
+        .values_list('quiz_id', 'quiz__version', 'question_ids')
+        .first()
+    )
+    if row is None:
+        return None
+    quiz_id, version, packed = row
+    return quiz_id, version, unpack_ids(packed)
+
+
+def attempts_question_ids(keys):
+    """
+    Вопросы попыток по парам (id пользователя, id попытки) одним запросом:
+    словарь пара -> (id теста, id вопросов). Для проверки результатов.
+    """
+    attempt_ids = {attempt_id for _, attempt_id in keys}
+    if not attempt_ids:
+        return {}
+    rows = QuizAttempt.objects.filter(id__in=attempt_ids).values_list('user_id', 'id', 'quiz_id', 'question_ids')
+    return {
+        (user_id, attempt_id): (quiz_id, unpack_ids(packed))
+        for user_id, attempt_id, quiz_id, packed in rows
+        if (user_id, attempt_id) in keys
+    }
@@ -0,0 +1,167 @@
+"""
+Быстрый ответ /api/auth/check/ без обращения к базе.
+
+Фронтенд опрашивает check_auth чаще всех остальных эндпоинтов, и раньше
+каждый вызов читал сессию и пользователя из БД. Теперь полный ответ,
+собранный по сессии, дополнительно выдаётся клиенту в подписанной cookie
+auth_status (django.core.signing, HttpOnly) на QUIZ_AUTH_STATUS_TTL
+секунд. Пока cookie действительна, check_auth отвечает по ней, не трогая
+сессию, пользователя и DRF-аутентификацию.
+
+Статус привязан к cookie сессии: в подписанных данных хранится хеш
+ключа сессии, и при другой (или отсутствующей) cookie сессии ответ
+собирается заново. Дополнительно проверяется, что сессия ещё есть в кэше
+сессий (SESSION_CACHE_ALIAS, backends.cached_db): выход из системы удаляет
+её из общего кэша, поэтому старая пара cookie перестаёт приниматься во
+всех процессах сразу, а не через TTL. logout_view удаляет и саму cookie.
+"""
+import functools
+import hashlib
+from importlib import import_module
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.urls import reverse
+
+TTL = getattr(settings, 'QUIZ_AUTH_STATUS_TTL', 60)
+COOKIE_NAME = 'auth_status'
+SALT = 'quiz.auth_status'
+
+# Префикс ключей сессий в кэше; у движков без кэша (db, signed_cookies) его нет
+SESSION_CACHE_PREFIX = getattr(import_module(settings.SESSION_ENGINE).SessionStore, 'cache_key_prefix', None)
+
+
+def _digest(session_key):
+    return hashlib.sha256((session_key or '').encode()).hexdigest()[:32]
+
+
+def _session_alive(session_key):
+    """
+    Сессия не удалена выходом из системы. Проверяется только по кэшу
+    сессий; без кэшируемого движка статус ограничен лишь сроком жизни.
+    """
+    if not session_key or SESSION_CACHE_PREFIX is None:
+        return True
+    return caches[settings.SESSION_CACHE_ALIAS].get(SESSION_CACHE_PREFIX + session_key) is not None
+
+
+def status_data(request, user):
+    """
+    Тело ответа check_auth без ключа сессии - его подставляет status_response.
+    """
+    if user.is_authenticated:
+        return {
+            'authenticated': True,
+            'username': user.username,
+            'email': user.email,
+            'is_staff': user.is_staff,
+            'is_superuser': user.is_superuser,
+        }
+    return {
+        'authenticated': False,
+        'session_exists': bool(request.session.session_key),
+    }
+
+
+def status_response(data, session_key):
+    """
+    Ответ check_auth по данным status_data и ключу сессии.
+    """
+    if data['authenticated']:
+        # Если у нас есть аутентифицированный пользователь, но нет cookie
+        # установим cookie, чтобы frontend мог проверить статус аутентификации
+        response = JsonResponse({**data, 'sessionid': session_key})
+
+        # Устанавливаем cookie для JS доступа
+        response.set_cookie(
+            'is_authenticated', 'true',
+            httponly=False,
+            secure=True,
+            samesite='None',
+            max_age=2592000  # 30 дней
+        )
+
+        # Добавляем CORS заголовки
+        response["Access-Control-Allow-Origin"] = "https://dimenicetry.github.io"
+        response["Access-Control-Allow-Credentials"] = "true"
+
+        return response
+    else:
+        return JsonResponse(data)
+
+
+def issue(response, request, data):
+    """
+    Выдаёт подписанный статус вместе с ответом, собранным по сессии.
+    """
+    if TTL <= 0:
+        return
+    # Ключ, который браузер пришлёт в следующем запросе: для пустой сессии
+    # SessionMiddleware cookie не выставляет
+    session_key = '' if request.session.is_empty() else request.session.session_key
+    value = signing.dumps({'s': _digest(session_key), 'd': data}, salt=SALT, compress=True)
+    response.set_cookie(
+        COOKIE_NAME, value,
+        max_age=TTL,
+        path=reverse('check-auth'),
+        domain=settings.SESSION_COOKIE_DOMAIN,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite=settings.SESSION_COOKIE_SAMESITE,
+    )
+
+
+def revoke(response):
+    """
+    Удаляет подписанный статус у клиента (выход из системы).
+    """
+    response.delete_cookie(
+        COOKIE_NAME,
+        path=reverse('check-auth'),
+        domain=settings.SESSION_COOKIE_DOMAIN,
+        samesite=settings.SESSION_COOKIE_SAMESITE,
+    )
+
+
+def cached_response(request):
+    """
+    Ответ check_auth по действительной cookie auth_status или None.
+    """
+    value = request.COOKIES.get(COOKIE_NAME)
+    if TTL <= 0 or not value:
+        return None
+    try:
+        payload = signing.loads(value, salt=SALT, max_age=TTL)
+    except signing.BadSignature:
+        return None
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+    if payload.get('s') != _digest(session_key) or not _session_alive(session_key):
+        return None
+    return status_response(payload['d'], session_key)
+
+
+def fast_path(view):
+    """
+    Отвечает на GET по cookie auth_status, не вызывая представление.
+    Подходит и для асинхронных представлений: проверка не обращается к БД,
+    а чтение кэша сессий - один небольшой локальный файл.
+    """
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            response = cached_response(request) if request.method == 'GET' else None
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return response
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = cached_response(request) if request.method == 'GET' else None
+        if response is None:
+            response = view(request, *args, **kwargs)
+        return response
+    return wrapper
@@ -0,0 +1,85 @@
+"""
+Условные GET-запросы (ETag / Last-Modified) для содержимого тестов.
+
+Валидаторы теста - пара (version, updated_at), которую сигналы меняют при
+любом изменении теста, его вопросов или ответов (см. quiz/signals.py).
+Она читается одним запросом по первичному ключу до сборки ответа; если
+у клиента актуальная копия, сразу возвращается 304 без снимка и
+сериализации. Иначе прочитанная версия передаётся в get_quiz_snapshot,
+чтобы не читать её повторно.
+
+Ответы помечаются Cache-Control: private, no-cache - браузер хранит копию,
+но каждый раз перепроверяет её условным запросом.
+"""
+import hashlib
+from collections import namedtuple
+
+from django.db.models import Subquery
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Quiz, QuizListState
+
+Validators = namedtuple('Validators', 'etag last_modified')
+QuizState = namedtuple('QuizState', 'version updated_at')
+
+
+def _timestamp(dt):
+    return int(dt.timestamp()) if dt is not None else None
+
+
+def quiz_state(quiz_id):
+    """
+    (version, updated_at) теста одним запросом по первичному ключу или None.
+    """
+    row = Quiz.objects.filter(pk=quiz_id).values_list('version', 'updated_at').first()
+    return QuizState(*row) if row else None
+
+
+async def aquiz_state(quiz_id):
+    row = await Quiz.objects.filter(pk=quiz_id).values_list('version', 'updated_at').afirst()
+    return QuizState(*row) if row else None
+
+
+def quiz_validators(quiz_id, state, *parts):
+    """
+    ETag и Last-Modified содержимого теста. parts различают представления
+    одного теста (например, номер вопроса).
+    """
+    tag = '-'.join(str(part) for part in ('quiz', quiz_id, state.version) + parts)
+    return Validators(f'"{tag}"', _timestamp(state.updated_at))
+
+
+def quiz_list_validators(queryset, request):
+    """
+    ETag и Last-Modified страницы списка тестов: последнее изменение теста
+    (первая строка индекса updated_at) и счётчик удалённых тестов
+    (QuizListState, удаление не меняет updated_at остальных) одним запросом.
+    Ответ зависит от страницы, поэтому в ETag входит и полный путь запроса.
+    """
+    deleted = QuizListState.objects.filter(pk=QuizListState.PK).values('deleted')
+    row = (
+        queryset.order_by('-updated_at')
+        .annotate(deleted=Subquery(deleted))
+        .values_list('updated_at', 'deleted')
+        .first()
+    )
+    updated_at, deleted = row or (None, None)
+    key = f"{updated_at}|{deleted or 0}|{request.get_full_path()}"
+    return Validators(f'"quizzes-{hashlib.md5(key.encode()).hexdigest()}"', _timestamp(updated_at))
+
+
+def not_modified(request, validators):
+    """
+    Ответ 304 (или 412 для If-Match), если копия клиента актуальна, иначе None.
+    """
+    return get_conditional_response(request, etag=validators.etag, last_modified=validators.last_modified)
+
+
+def set_validators(response, validators):
+    if 200 <= response.status_code < 300:
+        response.headers.setdefault('ETag', validators.etag)
+        if validators.last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(validators.last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,223 @@
+"""
+Генерация синтетических данных для нагрузочных тестов и планирования мощностей.
+
+Пользователи, тесты, вопросы и ответы создаются пакетными bulk_create;
+даты создания тестов (auto_now_add) проставляются после вставки пакетным
+bulk_update. Результаты пишутся в обход моделей: пакетным INSERT
+(executemany) или, на PostgreSQL, через COPY, а JSON user_answers
+склеивается из заранее сериализованных записей. Все значения (включая время прохождения)
+выводятся из random.Random(seed), поэтому при одинаковых параметрах на
+пустой базе получается один и тот же набор данных.
+
+user_answers записываются в компактном формате хранения
+(quiz/answer_codec.py): [id вопроса, [id ответа], верно]. Популярность
+тестов распределена по Ципфу, у каждого пользователя своя доля правильных
+ответов.
+"""
+import csv
+import io
+import itertools
+import json
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from .models import CompactJSONEncoder, Quiz, Question, Answer, QuizResult
+from .search import index_quizzes
+
+# Доля вопросов, оставленных без ответа
+SKIP_RATE = 0.03
+# Показатель распределения популярности тестов (Ципф)
+POPULARITY_EXPONENT = 0.8
+# Начало периода, в котором распределяются результаты и даты создания тестов
+DEFAULT_START = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+TOPICS = (
+    "Python", "JavaScript", "SQL", "Алгоритмы", "Сети", "Linux", "История",
+    "География", "Математика", "Физика", "Химия", "Биология", "Литература",
+)
+
+# Заранее подготовленные записи user_answers для одного вопроса (компактная
+# запись и её JSON-строка). Записи общие для всех результатов.
+AnswerEntry = namedtuple('AnswerEntry', 'data json')
+QuestionPlan = namedtuple('QuestionPlan', 'correct wrong skipped')
+QuizPlan = namedtuple('QuizPlan', 'id questions')
+
+
+def _entry(data):
+    return AnswerEntry(data, json.dumps(data, cls=CompactJSONEncoder))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class DatasetGenerator:
+    """
+    Генератор набора данных. Методы вызываются по порядку:
+    create_users, create_quizzes, create_results.
+    """
+    def __init__(self, seed=42, batch_size=5000, prefix='synth', start=DEFAULT_START, days=365, use_copy=True):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.start = start
+        self.period = timedelta(days=days)
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.user_ids = []
+        self.abilities = []
+        self.quizzes = []
+
+    def create_users(self, count):
+        for batch in _batches(range(count), self.batch_size):
+            created = User.objects.bulk_create([
+                # '!' - непригодный пароль: синтетические пользователи не могут войти
+                User(username=f"{self.prefix}{i}", password='!', email=f"{self.prefix}{i}@example.com")
+                for i in batch
+            ])
+            self.user_ids.extend(user.id for user in created)
+        # Доля правильных ответов каждого пользователя
+        self.abilities = [self.rng.uniform(0.35, 0.95) for _ in self.user_ids]
+        return len(self.user_ids)
+
+    def create_quizzes(self, count, questions, answers):
+        # Даты по возрастанию: как и в жизни, id тестов идут в порядке создания
+        created = sorted(self.start + self.period * self.rng.random() for _ in range(count))
+        with transaction.atomic():
+            for batch in _batches(range(count), max(1, self.batch_size // max(1, questions * answers))):
+                quizzes = Quiz.objects.bulk_create([
+                    Quiz(
+                        title=f"{TOPICS[i % len(TOPICS)]}: тест {i + 1}",
+                        author_id=self.rng.choice(self.user_ids),
+                        updated_at=created[i],
+                        hide_answers=self.rng.random() < 0.5,
+                        time_limit=self.rng.choice((0, 0, 5, 10, 20)),
+                        question_count=questions,
+                    )
+                    for i in batch
+                ])
+                # auto_now_add заменяет created_at при вставке, заданные даты пишутся отдельно
+                for i, quiz in zip(batch, quizzes):
+                    quiz.created_at = created[i]
+                Quiz.objects.bulk_update(quizzes, ['created_at'])
+                question_objs = Question.objects.bulk_create([
+                    Question(quiz=quiz, text=f"{quiz.title}, вопрос {n + 1}", position=n)
+                    for quiz in quizzes
+                    for n in range(questions)
+                ])
+                answer_objs = Answer.objects.bulk_create([
+                    Answer(question=question, text=f"Вариант {k + 1}", is_correct=k == correct)
+                    for question in question_objs
+                    for correct in (self.rng.randrange(answers),)
+                    for k in range(answers)
+                ])
+                # bulk_create не вызывает сигналы, поисковые документы собираем явно
+                index_quizzes([quiz.id for quiz in quizzes])
+                self._plan(quizzes, question_objs, answer_objs, answers)
+        return len(self.quizzes)
+
+    def _plan(self, quizzes, question_objs, answer_objs, answers):
+        question_iter = iter(question_objs)
+        answer_iter = iter(answer_objs)
+        questions = len(question_objs) // len(quizzes)
+        for quiz in quizzes:
+            plans = []
+            for question in itertools.islice(question_iter, questions):
+                options = list(itertools.islice(answer_iter, answers))
+                entries = [_entry([question.id, [option.id], int(option.is_correct)]) for option in options]
+                plans.append(QuestionPlan(
+                    correct=next(e for e in entries if e.data[2]),
+                    wrong=[e for e in entries if not e.data[2]],
+                    skipped=_entry([question.id, [], 0]),
+                ))
+            self.quizzes.append(QuizPlan(quiz.id, plans))
+
+    def _attempt(self, quiz, ability):
+        rng = self.rng
+        score = 0
+        entries = []
+        for question in quiz.questions:
+            roll = rng.random()
+            if roll < SKIP_RATE:
+                entries.append(question.skipped)
+            elif rng.random() < ability or not question.wrong:
+                entries.append(question.correct)
+                score += 1
+            else:
+                entries.append(rng.choice(question.wrong))
+        return score, entries
+
+    def iter_results(self, count):
+        """
+        Кортежи (quiz_id, user_id, score, max_score, completed_at, entries)
+        в хронологическом порядке. Каждый результат получает свой интервал
+        времени.
+        """
+        weights = [1 / (rank + 1) ** POPULARITY_EXPONENT for rank in range(len(self.quizzes))]
+        cum_weights = list(itertools.accumulate(weights))
+        slot = self.period / max(1, count)
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            quiz_indexes = self.rng.choices(range(len(self.quizzes)), cum_weights=cum_weights, k=size)
+            user_indexes = self.rng.choices(range(len(self.user_ids)), k=size)
+            for offset, (qi, ui) in enumerate(zip(quiz_indexes, user_indexes)):
+                quiz = self.quizzes[qi]
+                score, entries = self._attempt(quiz, self.abilities[ui])
+                completed_at = self.start + slot * (start + offset + self.rng.random())
+                yield quiz.id, self.user_ids[ui], score, len(quiz.questions), completed_at, entries
+
+    def create_results(self, count, progress=None):
+        write = self._copy_results if self.use_copy else self._insert_results
+        created = 0
+        for batch in _batches(self.iter_results(count), self.batch_size):
+            with transaction.atomic():
+                write(batch)
+            created += len(batch)
+            if progress:
+                progress(created)
+        return created
+
+    def _columns(self):
+        opts = QuizResult._meta
+        return ', '.join(
+            connection.ops.quote_name(opts.get_field(name).column)
+            for name in ('quiz', 'user', 'score', 'max_score', 'completed_at', 'user_answers')
+        )
+
+    def _insert_results(self, batch):
+        # Пакетный INSERT в обход моделей: JSON ответов уже собран из готовых строк
+        table = connection.ops.quote_name(QuizResult._meta.db_table)
+        adapt_datetime = connection.ops.adapt_datetimefield_value
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} ({self._columns()}) VALUES (%s, %s, %s, %s, %s, %s)",
+                [
+                    (
+                        quiz_id, user_id, score, max_score, adapt_datetime(completed_at),
+                        '[' + ','.join(entry.json for entry in entries) + ']',
+                    )
+                    for quiz_id, user_id, score, max_score, completed_at, entries in batch
+                ],
+            )
+
+    def _copy_results(self, batch):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for quiz_id, user_id, score, max_score, completed_at, entries in batch:
+            writer.writerow((
+                quiz_id, user_id, score, max_score, completed_at.isoformat(),
+                '[' + ','.join(entry.json for entry in entries) + ']',
+            ))
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(QuizResult._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table} ({self._columns()}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
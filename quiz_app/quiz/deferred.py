@@ -0,0 +1,56 @@
+"""
+Отложенные действия после фиксации транзакции, собранные в пакеты.
+
+Сигналы вызываются на каждую сохранённую строку: сохранение теста со
+многими вопросами в одной транзакции регистрировало бы столько же
+transaction.on_commit, и каждый пересобирал бы тест целиком. on_commit_batch
+копит id в множестве, привязанном к соединению и функции, и регистрирует
+один on_commit на транзакцию; после фиксации функция вызывается один раз
+со всеми накопленными id.
+
+После отката транзакции (или точки сохранения, в которой был
+зарегистрирован пакет) Django выбрасывает его on_commit; такой пакет больше
+не используется, и следующий вызов начинает новый.
+"""
+from weakref import WeakKeyDictionary
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Соединение -> {функция -> ожидающий пакет}. Соединения свои у каждого
+# потока (и асинхронного контекста), поэтому пакеты не пересекаются.
+_pending = WeakKeyDictionary()
+
+
+class _Batch:
+    def __init__(self, func, batches):
+        self.func = func
+        self.ids = set()
+        self.batches = batches
+
+    def __call__(self):
+        if self.batches.get(self.func) is self:
+            del self.batches[self.func]
+        self.func(sorted(self.ids))
+
+
+def _is_registered(connection, batch):
+    # Записи run_on_commit: (id точек сохранения, функция, robust)
+    return any(entry[1] is batch for entry in connection.run_on_commit)
+
+
+def on_commit_batch(func, item_id, using=DEFAULT_DB_ALIAS):
+    """
+    Вызывает func(список id) после фиксации текущей транзакции, один раз на
+    транзакцию со всеми переданными в ней id. Вне транзакции func
+    вызывается сразу.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        func([item_id])
+        return
+    batches = _pending.setdefault(connection, {})
+    batch = batches.get(func)
+    if batch is None or not _is_registered(connection, batch):
+        batch = batches[func] = _Batch(func, batches)
+        transaction.on_commit(batch, using=using)
+    batch.ids.add(item_id)
@@ -0,0 +1,173 @@
+"""
+Потоковая выгрузка результатов тестов в CSV и NDJSON.
+
+Строки читаются из БД порциями через .iterator(chunk_size=...) и сразу
+отдаются клиенту (StreamingHttpResponse) или пишутся в файл, поэтому
+расход памяти не зависит от числа результатов. Используется эндпоинтом
+администратора и командой export_quiz_results.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .answer_codec import expand as expand_answers
+from .models import QuizResult
+from .snapshots import get_quiz_snapshot
+
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+RESULT_FIELDS = (
+    'id', 'quiz_id', 'quiz_title', 'user_id', 'username',
+    'score', 'max_score', 'completed_at',
+)
+ANSWER_FIELDS = (
+    'answer_index', 'question_id', 'answer_id', 'question_text',
+    'user_answer', 'correct_answer', 'is_correct',
+)
+
+
+def _date_filter(lookup, value):
+    """
+    Условие на completed_at по границе выгрузки. Дата без времени
+    превращается в начало суток (для верхней границы - следующих суток,
+    не включая его) в текущем часовом поясе: сравнение самого поля, а не
+    completed_at__date, использует индексы по completed_at.
+    """
+    try:
+        day = parse_date(value)
+        dt = None if day else parse_datetime(value)
+    except ValueError:
+        day = dt = None
+    if day is not None:
+        if lookup == 'lte':
+            day += timedelta(days=1)
+            lookup = 'lt'
+        return {f'completed_at__{lookup}': timezone.make_aware(datetime.combine(day, time.min))}
+    if dt is not None:
+        if timezone.is_naive(dt):
+            dt = timezone.make_aware(dt)
+        return {f'completed_at__{lookup}': dt}
+    raise ValueError(f"Неверная дата: {value}")
+
+
+def filter_results(queryset, user_id=None, quiz_id=None, date_from=None, date_to=None):
+    """
+    Применяет фильтры выгрузки и списка результатов администратора.
+    Даты принимаются в ISO-формате (дата или дата со временем), границы включаются.
+    """
+    if user_id:
+        queryset = queryset.filter(user_id=user_id)
+    if quiz_id:
+        queryset = queryset.filter(quiz_id=quiz_id)
+    if date_from:
+        queryset = queryset.filter(**_date_filter('gte', date_from))
+    if date_to:
+        queryset = queryset.filter(**_date_filter('lte', date_to))
+    return queryset
+
+
+def export_queryset(**filters):
+    return filter_results(
+        QuizResult.objects.select_related('quiz', 'user').only(
+            'id', 'score', 'max_score', 'completed_at', 'user_answers',
+            'quiz__id', 'quiz__title', 'quiz__version', 'user__id', 'user__username',
+        ).order_by('id'),
+        **filters
+    )
+
+
+def field_names(flatten_answers):
+    if flatten_answers:
+        return RESULT_FIELDS + ANSWER_FIELDS
+    return RESULT_FIELDS + ('user_answers',)
+
+
+def iter_rows(queryset, flatten_answers=False, chunk_size=2000):
+    """
+    Строки выгрузки. При flatten_answers каждая запись user_answers
+    становится отдельной строкой с полями результата.
+    """
+    for result in queryset.iterator(chunk_size=chunk_size):
+        # Ответы хранятся компактно, тексты берутся из снимка теста
+        user_answers = expand_answers(get_quiz_snapshot(result.quiz.id, result.quiz.version), result.user_answers)
+        row = {
+            'id': result.id,
+            'quiz_id': result.quiz.id,
+            'quiz_title': result.quiz.title,
+            'user_id': result.user.id,
+            'username': result.user.username,
+            'score': result.score,
+            'max_score': result.max_score,
+            'completed_at': result.completed_at,
+        }
+        if not flatten_answers:
+            row['user_answers'] = user_answers
+            yield row
+            continue
+
+        answers = user_answers or []
+        if isinstance(answers, dict):
+            answers = list(answers.values())
+        if not answers:
+            yield row
+        for index, answer in enumerate(answers):
+            answer = answer if isinstance(answer, dict) else {}
+            yield {
+                **row,
+                'answer_index': index,
+                'question_id': answer.get('question_id'),
+                'answer_id': answer.get('answer_id'),
+                'question_text': answer.get('question_text'),
+                'user_answer': answer.get('user_answer'),
+                'correct_answer': answer.get('correct_answer'),
+                'is_correct': answer.get('is_correct'),
+            }
+
+
+class _Echo:
+    """
+    Псевдо-файл для csv.writer: write() просто возвращает строку.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        values = []
+        for field in fields:
+            value = row.get(field)
+            if field == 'user_answers' and value is not None:
+                value = json.dumps(value, ensure_ascii=False)
+            elif hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        yield writer.writerow(values)
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def iter_export(output_format, flatten_answers=False, chunk_size=2000, **filters):
+    """
+    Текстовые фрагменты выгрузки в формате output_format ('csv' или 'ndjson').
+    Фильтры проверяются сразу, до начала потока, чтобы ошибку можно было вернуть как 400.
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Неизвестный формат: {output_format}")
+    rows = iter_rows(export_queryset(**filters), flatten_answers, chunk_size)
+    if output_format == 'csv':
+        return iter_csv(rows, field_names(flatten_answers))
+    return iter_ndjson(rows)
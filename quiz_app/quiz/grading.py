@@ -0,0 +1,180 @@
+"""
+Серверная проверка ответов.
+
+Для каждой версии квиза из его снимка (quiz/snapshots.py) один раз строится
+компактный ключ ответов: множества id правильных ответов по вопросам и
+обратные индексы для старого текстового формата user_answers. Проверка
+попытки выполняется в памяти за O(число ответов) без запросов к БД.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+
+from .snapshots import SnapshotLRU, aget_quiz_snapshot, get_quiz_snapshot
+
+AnswerKey = namedtuple(
+    'AnswerKey',
+    'quiz_id version sample_size correct answer_question question_by_text answer_by_text',
+)
+GradeResult = namedtuple('GradeResult', 'score max_score unresolved selections')
+
+_keys = SnapshotLRU(getattr(settings, 'QUIZ_SNAPSHOT_LRU_SIZE', 256))
+
+
+def build_answer_key(snapshot):
+    """
+    Строит ключ ответов из снимка квиза.
+
+    correct          - id вопроса -> frozenset id правильных ответов
+    answer_question  - id ответа -> id вопроса
+    question_by_text - текст вопроса -> id вопроса
+    answer_by_text   - (id вопроса, текст ответа) -> id ответа
+    """
+    correct = {}
+    answer_question = {}
+    question_by_text = {}
+    answer_by_text = {}
+    for question in snapshot.questions:
+        correct[question.id] = frozenset(a.id for a in question.answers if a.is_correct)
+        question_by_text.setdefault(question.text, question.id)
+        for answer in question.answers:
+            answer_question[answer.id] = question.id
+            answer_by_text.setdefault((question.id, answer.text), answer.id)
+    return AnswerKey(
+        quiz_id=snapshot.id,
+        version=snapshot.version,
+        sample_size=snapshot.sample_size,
+        correct=correct,
+        answer_question=answer_question,
+        question_by_text=question_by_text,
+        answer_by_text=answer_by_text,
+    )
+
+
+def get_answer_key(quiz_id):
+    """
+    Возвращает ключ ответов актуальной версии квиза или None, если квиз не существует.
+    """
+    snapshot = get_quiz_snapshot(quiz_id)
+    if snapshot is None:
+        return None
+    return _answer_key_for(snapshot)
+
+
+async def aget_answer_key(quiz_id):
+    """
+    Асинхронный вариант get_answer_key.
+    """
+    snapshot = await aget_quiz_snapshot(quiz_id)
+    if snapshot is None:
+        return None
+    return _answer_key_for(snapshot)
+
+
+def _answer_key_for(snapshot):
+    cache_key = (snapshot.id, snapshot.version)
+    key = _keys.get(cache_key)
+    if key is None:
+        key = build_answer_key(snapshot)
+        _keys.set(cache_key, key)
+    return key
+
+
+def _first(entry, *names):
+    for name in names:
+        value = entry.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def resolve_entry(key, entry):
+    """
+    Определяет (id вопроса, множество выбранных id ответов) для одной записи user_answers.
+
+    Поддерживаются записи с id (question_id/answer_id/answer_ids, а также
+    questionId/answerId из фронтенда) и старый текстовый формат
+    (question_text/user_answer), а также компактные записи
+    [id вопроса, [id ответов], верно] из базы (см. quiz/answer_codec.py).
+    Возвращает None, если вопрос определить нельзя.
+    """
+    if isinstance(entry, list) and len(entry) == 3:
+        question_id, answer_ids = entry[0], entry[1] or ()
+        if question_id not in key.correct:
+            return None
+        return question_id, frozenset(a for a in answer_ids if key.answer_question.get(a) == question_id)
+    if not isinstance(entry, dict):
+        return None
+
+    question_id = _first(entry, 'question_id', 'questionId')
+    answer_ids = _first(entry, 'answer_ids', 'answerIds')
+    if answer_ids is None:
+        answer_id = _first(entry, 'answer_id', 'answerId')
+        answer_ids = [] if answer_id is None else [answer_id]
+
+    if question_id is None and answer_ids:
+        question_id = key.answer_question.get(answer_ids[0])
+    if question_id is None:
+        question_id = key.question_by_text.get(_first(entry, 'question_text', 'questionText'))
+    if question_id not in key.correct:
+        return None
+
+    if not answer_ids:
+        answer_text = _first(entry, 'user_answer', 'answerText')
+        answer_id = key.answer_by_text.get((question_id, answer_text))
+        answer_ids = [] if answer_id is None else [answer_id]
+
+    # Ответы, не относящиеся к этому вопросу, игнорируем
+    selected = frozenset(a for a in answer_ids if key.answer_question.get(a) == question_id)
+    return question_id, selected
+
+
+def resolve_selections(key, user_answers):
+    """
+    Сопоставляет записи user_answers вопросам квиза.
+
+    user_answers - список записей или словарь записей (как во фронтенде).
+    Возвращает (id вопроса -> frozenset выбранных id ответов, число
+    записей, для которых вопрос определить не удалось).
+    """
+    entries = user_answers.values() if isinstance(user_answers, dict) else user_answers or ()
+
+    selections = {}
+    unresolved = 0
+    for entry in entries:
+        resolved = resolve_entry(key, entry)
+        if resolved is None:
+            unresolved += 1
+            continue
+        question_id, selected = resolved
+        selections[question_id] = selected
+    return selections, unresolved
+
+
+def is_correct(key, question_id, selected):
+    return bool(selected) and selected == key.correct[question_id]
+
+
+def grade(key, user_answers, question_ids=None):
+    """
+    Оценивает попытку по ключу ответов.
+
+    Вопрос засчитывается, если выбранное множество ответов совпадает с
+    множеством правильных. Максимальный балл равен числу вопросов квиза,
+    а для попытки со случайной выборкой (question_ids, см. quiz/attempts.py) -
+    числу её вопросов, которые ещё есть в квизе; ответы на другие вопросы
+    не учитываются.
+    """
+    selections, unresolved = resolve_selections(key, user_answers)
+    max_score = len(key.correct)
+    if question_ids is not None:
+        drawn = {question_id for question_id in question_ids if question_id in key.correct}
+        selections = {question_id: selected for question_id, selected in selections.items() if question_id in drawn}
+        max_score = len(drawn)
+    score = sum(1 for question_id, selected in selections.items() if is_correct(key, question_id, selected))
+    return GradeResult(
+        score=score,
+        max_score=max_score,
+        unresolved=unresolved,
+        selections=selections,
+    )
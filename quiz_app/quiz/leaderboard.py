@@ -0,0 +1,194 @@
+"""
+Таблица лидеров по тесту.
+
+Учитываются только результаты с баллом, посчитанным на сервере по ключу
+ответов (quiz/results.py): балл, присланный клиентом, не проверить.
+
+LeaderboardEntry хранит лучший результат каждого пользователя, а
+LeaderboardScoreBucket - сколько пользователей имеют каждый лучший балл.
+Обе таблицы обновляются в транзакции сохранения результата.
+
+- Топ-K читается по индексу (quiz, -best_score, achieved_at) и кэшируется
+  в кэше Django под ключом с версией из LeaderboardState. Версия хранится в
+  базе, поэтому кэш каждого процесса (LocMemCache) перестаёт использоваться
+  сразу, а не по истечении таймаута. Она увеличивается после фиксации
+  улучшения результата (transaction.on_commit), вне транзакции сохранения:
+  строка версии не блокируется на время транзакции, а строка Quiz не
+  затрагивается вовсе. Топ, прочитанный до фиксации, остаётся под старой
+  версией и после увеличения не используется.
+- Место пользователя = 1 + число пользователей с большим лучшим баллом:
+  поиск его записи по уникальному ключу и сумма по корзинам, число которых
+  ограничено числом различных баллов, а не числом результатов.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import LeaderboardEntry, LeaderboardScoreBucket, LeaderboardState, QuizResult
+
+TOP_SIZE = getattr(settings, 'QUIZ_LEADERBOARD_TOP_SIZE', 100)
+TOP_CACHE_TIMEOUT = getattr(settings, 'QUIZ_LEADERBOARD_CACHE_TIMEOUT', 60 * 10)
+
+
+def top_cache_key(quiz_id, version):
+    return f'quiz:leaderboard:{quiz_id}:top:{version}'
+
+
+def current_version(quiz_id):
+    """Версия таблицы лидеров теста, 0 - таблица ещё не менялась."""
+    version = LeaderboardState.objects.filter(pk=quiz_id).values_list('version', flat=True).first()
+    return version or 0
+
+
+def _bump_version(quiz_id):
+    # Строка создаётся при первом увеличении, как корзины таблицы лидеров
+    LeaderboardState.objects.bulk_create([LeaderboardState(quiz_id=quiz_id)], ignore_conflicts=True)
+    LeaderboardState.objects.filter(pk=quiz_id).update(version=F('version') + 1)
+
+
+def bump_version(quiz_id):
+    """
+    Увеличивает версию таблицы лидеров после фиксации текущей транзакции
+    (сразу, если транзакции нет).
+    """
+    transaction.on_commit(partial(_bump_version, quiz_id))
+
+
+def _add_to_bucket(quiz_id, score, delta):
+    if delta > 0:
+        LeaderboardScoreBucket.objects.bulk_create(
+            [LeaderboardScoreBucket(quiz_id=quiz_id, score=score)], ignore_conflicts=True
+        )
+    LeaderboardScoreBucket.objects.filter(quiz_id=quiz_id, score=score).update(users=F('users') + delta)
+
+
+def record_score(quiz_id, user_id, score, max_score, achieved_at):
+    """
+    Учитывает новый результат пользователя. Вызывается внутри транзакции
+    сохранения результата; запись пользователя блокируется до её конца.
+    Улучшение результата после фиксации увеличивает версию таблицы и тем
+    сбрасывает закэшированный топ во всех процессах.
+    """
+    entry = (
+        LeaderboardEntry.objects.select_for_update()
+        .filter(quiz_id=quiz_id, user_id=user_id)
+        .first()
+    )
+    if entry is None:
+        try:
+            with transaction.atomic():
+                LeaderboardEntry.objects.create(
+                    quiz_id=quiz_id, user_id=user_id, best_score=score,
+                    max_score=max_score, achieved_at=achieved_at,
+                )
+        except IntegrityError:
+            # Параллельная отправка того же пользователя успела создать запись
+            return record_score(quiz_id, user_id, score, max_score, achieved_at)
+    elif score > entry.best_score:
+        _add_to_bucket(quiz_id, entry.best_score, -1)
+        entry.best_score, entry.max_score, entry.achieved_at = score, max_score, achieved_at
+        entry.save(update_fields=['best_score', 'max_score', 'achieved_at'])
+    else:
+        return
+    _add_to_bucket(quiz_id, score, 1)
+    bump_version(quiz_id)
+
+
+def get_top(quiz_id, limit):
+    """
+    Первые limit мест (не больше QUIZ_LEADERBOARD_TOP_SIZE). Равные баллы
+    делят место, следующее место пропускается (1, 2, 2, 4).
+    """
+    key = top_cache_key(quiz_id, current_version(quiz_id))
+    top = cache.get(key)
+    if top is None:
+        entries = (
+            LeaderboardEntry.objects.filter(quiz_id=quiz_id)
+            .order_by('-best_score', 'achieved_at')
+            .values_list('user_id', 'user__username', 'best_score', 'max_score', 'achieved_at')[:TOP_SIZE]
+        )
+        top = []
+        for position, (user_id, username, best_score, max_score, achieved_at) in enumerate(entries, start=1):
+            rank = top[-1]['rank'] if top and top[-1]['score'] == best_score else position
+            top.append({
+                'rank': rank,
+                'user_id': user_id,
+                'username': username,
+                'score': best_score,
+                'max_score': max_score,
+                'achieved_at': achieved_at,
+            })
+        cache.set(key, top, TOP_CACHE_TIMEOUT)
+    return top[:limit]
+
+
+def get_rank(quiz_id, user_id):
+    """
+    Место и лучший результат пользователя или None, если он ещё не проходил тест.
+    """
+    entry = (
+        LeaderboardEntry.objects.filter(quiz_id=quiz_id, user_id=user_id)
+        .values('best_score', 'max_score', 'achieved_at')
+        .first()
+    )
+    if entry is None:
+        return None
+    above = LeaderboardScoreBucket.objects.filter(
+        quiz_id=quiz_id, score__gt=entry['best_score']
+    ).aggregate(total=Sum('users'))['total'] or 0
+    return {
+        'rank': above + 1,
+        'score': entry['best_score'],
+        'max_score': entry['max_score'],
+        'achieved_at': entry['achieved_at'],
+    }
+
+
+def rebuild_leaderboard(quiz_id, chunk_size=2000):
+    """
+    Пересобирает таблицу лидеров теста из истории результатов.
+
+    Результаты читаются потоком в порядке (пользователь, балл по убыванию,
+    время), поэтому первая строка каждого пользователя - его лучший результат.
+    Результаты без ответов (балл прислал клиент) не учитываются.
+    Возвращает число пользователей в таблице.
+    """
+    results = (
+        QuizResult.objects.filter(quiz_id=quiz_id, user_answers__isnull=False)
+        .order_by('user_id', '-score', 'completed_at')
+        .values_list('user_id', 'score', 'max_score', 'completed_at')
+    )
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(quiz_id=quiz_id).delete()
+        LeaderboardScoreBucket.objects.filter(quiz_id=quiz_id).delete()
+
+        buckets = {}
+        batch = []
+        total = 0
+        last_user_id = None
+        for user_id, score, max_score, completed_at in results.iterator(chunk_size=chunk_size):
+            if user_id == last_user_id:
+                continue
+            last_user_id = user_id
+            batch.append(LeaderboardEntry(
+                quiz_id=quiz_id, user_id=user_id, best_score=score,
+                max_score=max_score, achieved_at=completed_at,
+            ))
+            buckets[score] = buckets.get(score, 0) + 1
+            if len(batch) >= chunk_size:
+                LeaderboardEntry.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        LeaderboardEntry.objects.bulk_create(batch)
+        total += len(batch)
+
+        LeaderboardScoreBucket.objects.bulk_create([
+            LeaderboardScoreBucket(quiz_id=quiz_id, score=score, users=users)
+            for score, users in buckets.items()
+        ])
+        bump_version(quiz_id)
+    return total
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.export import FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковая выгрузка результатов тестов в CSV или NDJSON. "
+        "Память не зависит от числа результатов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv', dest='output_format')
+        parser.add_argument('--output', '-o', help="Файл для записи (по умолчанию stdout)")
+        parser.add_argument('--user-id', type=int)
+        parser.add_argument('--quiz-id', type=int)
+        parser.add_argument('--date-from', help="ISO-дата или дата со временем, включительно")
+        parser.add_argument('--date-to', help="ISO-дата или дата со временем, включительно")
+        parser.add_argument('--flatten-answers', action='store_true', help="Каждый ответ из user_answers отдельной строкой")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, output_format, output, flatten_answers, chunk_size, **options):
+        try:
+            chunks = iter_export(
+                output_format, flatten_answers, chunk_size,
+                user_id=options['user_id'], quiz_id=options['quiz_id'],
+                date_from=options['date_from'], date_to=options['date_to'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        stream = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+        try:
+            for chunk in chunks:
+                stream.write(chunk)
+        finally:
+            if output:
+                stream.close()
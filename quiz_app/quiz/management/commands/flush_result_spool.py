@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from quiz.spool import SPOOL_PATH, drain, spool
+
+
+class Command(BaseCommand):
+    help = (
+        "Сбрасывает очередь отложенной записи результатов (QUIZ_WRITE_BEHIND) "
+        "в основную базу, например после остановки или падения сервера."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Очередь {SPOOL_PATH}: записей {spool.size()}")
+        flushed = drain()
+        self.stdout.write(self.style.SUCCESS(f"Сохранено результатов: {flushed}"))
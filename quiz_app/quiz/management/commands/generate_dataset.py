@@ -0,0 +1,77 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.dataset import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует синтетических пользователей, тесты с вопросами и ответами "
+        "и результаты прохождения для нагрузочных тестов. На PostgreSQL "
+        "результаты пишутся через COPY. Одинаковый --seed на пустой базе "
+        "даёт одинаковые данные."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--quizzes', type=int, default=100)
+        parser.add_argument('--questions', type=int, default=10, help="Вопросов в каждом тесте")
+        parser.add_argument('--answers', type=int, default=4, help="Вариантов ответа в каждом вопросе")
+        parser.add_argument('--results', type=int, default=100000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--days', type=int, default=365, help="Период, по которому распределяются результаты")
+        parser.add_argument('--prefix', default='synth', help="Префикс имён пользователей")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--no-copy', action='store_true', help="Не использовать COPY даже на PostgreSQL")
+        parser.add_argument(
+            '--rebuild-derived', action='store_true',
+            help="Пересобрать таблицы лидеров и статистику ответов по созданным тестам",
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['quizzes'] < 1 or options['questions'] < 1 or options['answers'] < 2:
+            raise CommandError("Нужны хотя бы 1 пользователь, 1 тест, 1 вопрос и 2 варианта ответа")
+        if User.objects.filter(username__startswith=options['prefix']).exists():
+            raise CommandError(
+                f"Пользователи с префиксом '{options['prefix']}' уже существуют, укажите другой --prefix"
+            )
+
+        generator = DatasetGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            prefix=options['prefix'],
+            days=options['days'],
+            use_copy=not options['no_copy'],
+        )
+        started = time.monotonic()
+
+        users = generator.create_users(options['users'])
+        self.stdout.write(f"Пользователей: {users}")
+
+        quizzes = generator.create_quizzes(options['quizzes'], options['questions'], options['answers'])
+        self.stdout.write(
+            f"Тестов: {quizzes}, вопросов: {quizzes * options['questions']}, "
+            f"ответов: {quizzes * options['questions'] * options['answers']}"
+        )
+
+        total = options['results']
+        report_every = max(options['batch_size'], total // 20)
+
+        def progress(created):
+            if created % report_every < options['batch_size'] or created == total:
+                rate = created / max(time.monotonic() - started, 1e-9)
+                self.stdout.write(f"Результатов: {created}/{total} ({rate:.0f}/с)")
+
+        method = 'COPY' if generator.use_copy else 'пакетный INSERT'
+        self.stdout.write(f"Запись результатов через {method}")
+        generator.create_results(total, progress)
+
+        if options['rebuild_derived']:
+            quiz_ids = [str(quiz.id) for quiz in generator.quizzes]
+            call_command('rebuild_leaderboard', *quiz_ids, stdout=self.stdout)
+            call_command('rebuild_answer_stats', *quiz_ids, stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(f"Готово за {time.monotonic() - started:.1f} с"))
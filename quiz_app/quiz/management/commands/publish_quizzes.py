@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.publishing import publish_all, publish_quiz
+
+
+class Command(BaseCommand):
+    help = (
+        "Публикует тесты статическими JSON-файлами в STATIC_ROOT (см. quiz/publishing.py). "
+        "Без аргументов публикуются все тесты, удалённые снимаются с публикации. "
+        "Запускайте после collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int)
+
+    def handle(self, *args, quiz_ids, **options):
+        if not quiz_ids:
+            total = publish_all(progress=lambda done: self.stdout.write(f"Опубликовано тестов: {done}"))
+            self.stdout.write(self.style.SUCCESS(f"Публикация завершена, тестов: {total}"))
+            return
+
+        for quiz_id in quiz_ids:
+            index = publish_quiz(quiz_id)
+            if index is None:
+                raise CommandError(f"Тест {quiz_id} не найден")
+            self.stdout.write(f"Тест {quiz_id}: версия {index['version']}, файл {index['file']}")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.answer_stats import rebuild_quiz_statistics
+from quiz.grading import get_answer_key
+from quiz.models import Quiz
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает статистику ответов по вопросам из истории результатов. "
+        "Без аргументов обрабатываются все тесты."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, quiz_ids, chunk_size, **options):
+        if not quiz_ids:
+            quiz_ids = list(Quiz.objects.order_by('id').values_list('id', flat=True))
+
+        for quiz_id in quiz_ids:
+            key = get_answer_key(quiz_id)
+            if key is None:
+                raise CommandError(f"Тест {quiz_id} не найден")
+            processed = rebuild_quiz_statistics(key, chunk_size=chunk_size)
+            self.stdout.write(f"Тест {quiz_id}: обработано результатов {processed}")
+
+        self.stdout.write(self.style.SUCCESS("Статистика пересобрана"))
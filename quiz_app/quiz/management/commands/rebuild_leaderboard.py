@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from quiz.leaderboard import rebuild_leaderboard
+from quiz.models import Quiz
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает таблицы лидеров из истории результатов. "
+        "Без аргументов обрабатываются все тесты."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', type=int)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, quiz_ids, chunk_size, **options):
+        if not quiz_ids:
+            quiz_ids = list(Quiz.objects.order_by('id').values_list('id', flat=True))
+
+        for quiz_id in quiz_ids:
+            users = rebuild_leaderboard(quiz_id, chunk_size=chunk_size)
+            self.stdout.write(f"Тест {quiz_id}: пользователей в таблице лидеров {users}")
+
+        self.stdout.write(self.style.SUCCESS("Таблицы лидеров пересобраны"))
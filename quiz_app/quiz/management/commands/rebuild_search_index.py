@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quiz.search import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает поисковые документы всех тестов (см. quiz/search.py). "
+        "Поиск во время перестройки продолжает работать."
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild(progress=lambda done: self.stdout.write(f"Проиндексировано тестов: {done}"))
+        self.stdout.write(self.style.SUCCESS(f"Поисковый индекс пересобран, тестов: {total}"))
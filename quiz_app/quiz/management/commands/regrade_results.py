@@ -0,0 +1,85 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quiz.answer_codec import encode as encode_answers
+from quiz.answer_stats import rebuild_quiz_statistics
+from quiz.attempts import attempts_question_ids
+from quiz.grading import get_answer_key, grade
+from quiz.leaderboard import rebuild_leaderboard
+from quiz.models import QuizResult
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает score/max_score и признаки верности ответов всех сохранённых "
+        "результатов квиза по серверному ключу ответов. Результаты читаются и "
+        "обновляются порциями. Если результаты изменились, таблица лидеров и "
+        "статистика ответов теста пересобираются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_id', type=int)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help="Только посчитать изменения, не сохранять")
+
+    def handle(self, *args, quiz_id, chunk_size, dry_run, **options):
+        key = get_answer_key(quiz_id)
+        if key is None:
+            raise CommandError(f"Тест {quiz_id} не найден")
+
+        results = (
+            QuizResult.objects.filter(quiz_id=quiz_id)
+            .exclude(user_answers=None)
+            .only('id', 'user_id', 'attempt_id', 'score', 'max_score', 'user_answers')
+            .order_by('id')
+        )
+
+        seen = changed = skipped = 0
+        batch = []
+        rows = results.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            # Для теста с выборкой балл считается по вопросам попытки
+            attempts = attempts_question_ids({
+                (result.user_id, result.attempt_id) for result in chunk if result.attempt_id
+            }) if key.sample_size else {}
+            for result in chunk:
+                seen += 1
+                attempt = attempts.get((result.user_id, result.attempt_id))
+                question_ids = attempt[1] if attempt and attempt[0] == quiz_id else None
+                graded = grade(key, result.user_answers, question_ids)
+                if graded.unresolved:
+                    # Ответы ссылаются на вопросы, которых уже нет: не портим исторический балл
+                    skipped += 1
+                    continue
+                # Признаки верности в компактных ответах пересчитываются вместе с баллом
+                user_answers = encode_answers(key, result.user_answers)
+                if (result.score, result.max_score, result.user_answers) == (graded.score, graded.max_score, user_answers):
+                    continue
+                result.score, result.max_score, result.user_answers = graded.score, graded.max_score, user_answers
+                batch.append(result)
+                if len(batch) >= chunk_size:
+                    changed += self._flush(batch, dry_run)
+        changed += self._flush(batch, dry_run)
+
+        if changed and not dry_run:
+            # Лучшие баллы и счётчики ответов считались по старым баллам;
+            # пересборка таблицы лидеров увеличивает её версию и сбрасывает топ
+            users = rebuild_leaderboard(quiz_id, chunk_size=chunk_size)
+            processed = rebuild_quiz_statistics(key, chunk_size=chunk_size)
+            self.stdout.write(
+                f"Тест {quiz_id}: пользователей в таблице лидеров {users}, "
+                f"результатов в статистике {processed}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Тест {quiz_id} (версия {key.version}): просмотрено {seen}, "
+            f"{'будет изменено' if dry_run else 'изменено'} {changed}, пропущено {skipped}"
+        ))
+
+    def _flush(self, batch, dry_run):
+        count = len(batch)
+        if count and not dry_run:
+            QuizResult.objects.bulk_update(batch, ['score', 'max_score', 'user_answers'])
+        batch.clear()
+        return count
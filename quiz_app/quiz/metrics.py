@@ -0,0 +1,157 @@
+"""
+Метрики производительности запросов.
+
+PerformanceMiddleware (quiz/middleware.py) собирает для каждого запроса
+число SQL-запросов, время в БД, время сериализации ответа и общее время,
+отдаёт их в заголовке Server-Timing и складывает в гистограммы по
+эндпоинтам. Гистограммы доступны в текстовом формате Prometheus на
+/api/metrics/ (только для администраторов).
+
+Гистограммы хранятся в памяти процесса: при нескольких воркерах gunicorn
+каждый воркер отдаёт свои значения.
+"""
+import threading
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+# Границы корзин гистограмм длительности, в секундах
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Границы корзин гистограммы числа SQL-запросов
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+
+
+class RequestMetrics:
+    """
+    Метрики одного запроса. Хранятся в request.perf_metrics.
+    """
+    __slots__ = ('start', 'db_queries', 'db_time', 'serialize_time')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def server_timing(self, total):
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries", '
+            f'serialize;dur={self.serialize_time * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        """
+        Кумулятивные значения корзин в порядке границ, последней идёт +Inf.
+        """
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield bound, cumulative
+
+
+METRICS = (
+    # имя, описание, границы корзин, атрибут записи
+    ('quiz_request_duration_seconds', "Общее время обработки запроса", DURATION_BUCKETS, 'total'),
+    ('quiz_request_db_duration_seconds', "Время выполнения SQL-запросов", DURATION_BUCKETS, 'db_time'),
+    ('quiz_request_serialize_duration_seconds', "Время сериализации ответа", DURATION_BUCKETS, 'serialize_time'),
+    ('quiz_request_db_queries', "Число SQL-запросов на запрос", QUERY_BUCKETS, 'db_queries'),
+)
+
+
+class MetricsRegistry:
+    """
+    Потокобезопасное хранилище гистограмм по (view, method, status).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, labels, metrics, total):
+        values = {
+            'total': total,
+            'db_time': metrics.db_time,
+            'serialize_time': metrics.serialize_time,
+            'db_queries': metrics.db_queries,
+        }
+        with self._lock:
+            histograms = self._histograms.get(labels)
+            if histograms is None:
+                histograms = {name: Histogram(buckets) for name, _, buckets, _ in METRICS}
+                self._histograms[labels] = histograms
+            for name, _, _, attr in METRICS:
+                histograms[name].observe(values[attr])
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        """
+        Текстовый формат экспозиции Prometheus.
+        """
+        with self._lock:
+            snapshot = {
+                labels: {name: (list(h.samples()), h.sum, h.count) for name, h in histograms.items()}
+                for labels, histograms in self._histograms.items()
+            }
+
+        lines = []
+        for name, description, _, _ in METRICS:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} histogram')
+            for (view, method, status), histograms in sorted(snapshot.items()):
+                samples, total, count = histograms[name]
+                labels = f'view="{view}",method="{method}",status="{status}"'
+                for bound, cumulative in samples:
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{labels}}} {total}')
+                lines.append(f'{name}_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, записывающий время сериализации в метрики запроса.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            request = (renderer_context or {}).get('request')
+            metrics = getattr(getattr(request, '_request', request), 'perf_metrics', None)
+            if metrics is not None:
+                metrics.serialize_time += time.perf_counter() - start
@@ -1,55 +1,253 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from corsheaders.conf import conf as cors_conf
 from django.utils.deprecation import MiddlewareMixin
 from django.middleware.csrf import get_token
 from django.http import HttpResponse
+from django.conf import settings
+from django.db import connections
+from contextlib import ExitStack
+from urllib.parse import urlsplit
+from whitenoise.middleware import WhiteNoiseMiddleware
+from whitenoise.responders import MissingFileError
 import logging
+import os
+import re
+
+from . import publishing
+from .metrics import RequestMetrics, registry
 
 logger = logging.getLogger(__name__)
 
+class PreflightMiddleware:
+    """
+    Middleware для ответа на CORS preflight до сессий, CSRF и
+    аутентификации: без обращения к БД и сессии. Preflight - это OPTIONS с
+    заголовками Origin и Access-Control-Request-Method; остальные
+    OPTIONS-запросы (например, метаданные DRF) проходят дальше как обычно.
+    Заголовки CORS собираются один раз из настроек django-cors-headers
+    (CORS_ALLOWED_ORIGINS, CORS_ALLOW_HEADERS, CORS_PREFLIGHT_MAX_AGE и т.д.),
+    на каждый запрос остаются только проверка пути и Origin. Сигнал
+    check_request_enabled не учитывается. Должен стоять первым в MIDDLEWARE.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+        self.urls_regex = re.compile(cors_conf.CORS_URLS_REGEX)
+        self.allowed_origins = {self._origin_key(origin) for origin in cors_conf.CORS_ALLOWED_ORIGINS}
+        self.origin_regexes = [re.compile(pattern) for pattern in cors_conf.CORS_ALLOWED_ORIGIN_REGEXES]
+        # С cookie браузер не принимает Access-Control-Allow-Origin: *
+        self.allow_any_origin = cors_conf.CORS_ALLOW_ALL_ORIGINS and not cors_conf.CORS_ALLOW_CREDENTIALS
+
+        self.denied_headers = {'Content-Length': '0', 'Vary': 'origin'}
+        self.allowed_headers = {
+            **self.denied_headers,
+            'Access-Control-Allow-Headers': ', '.join(cors_conf.CORS_ALLOW_HEADERS),
+            'Access-Control-Allow-Methods': ', '.join(cors_conf.CORS_ALLOW_METHODS),
+        }
+        if cors_conf.CORS_ALLOW_CREDENTIALS:
+            self.allowed_headers['Access-Control-Allow-Credentials'] = 'true'
+        if cors_conf.CORS_EXPOSE_HEADERS:
+            self.allowed_headers['Access-Control-Expose-Headers'] = ', '.join(cors_conf.CORS_EXPOSE_HEADERS)
+        if cors_conf.CORS_PREFLIGHT_MAX_AGE:
+            self.allowed_headers['Access-Control-Max-Age'] = str(cors_conf.CORS_PREFLIGHT_MAX_AGE)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self._preflight(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+
+    async def __acall__(self, request):
+        response = self._preflight(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+    @staticmethod
+    def _origin_key(origin):
+        url = urlsplit(origin)
+        return url.scheme, url.netloc
+
+    def _origin_allowed(self, origin):
+        if cors_conf.CORS_ALLOW_ALL_ORIGINS:
+            return True
+        if origin == 'null':
+            return origin in cors_conf.CORS_ALLOWED_ORIGINS
+        try:
+            key = self._origin_key(origin)
+        except ValueError:
+            return False
+        return key in self.allowed_origins or any(regex.match(origin) for regex in self.origin_regexes)
+
+    def _preflight(self, request):
+        if request.method != 'OPTIONS' or not self.urls_regex.match(request.path_info):
+            return None
+        origin = request.headers.get('origin')
+        if not origin or 'access-control-request-method' not in request.headers:
+            return None
+        if not self._origin_allowed(origin):
+            return HttpResponse(headers=self.denied_headers)
+
+        response = HttpResponse(headers=self.allowed_headers)
+        response['Access-Control-Allow-Origin'] = '*' if self.allow_any_origin else origin
+        if (
+            cors_conf.CORS_ALLOW_PRIVATE_NETWORK
+            and request.headers.get('access-control-request-private-network') == 'true'
+        ):
+            response['Access-Control-Allow-Private-Network'] = 'true'
+        return response
+
+
 class CSRFMiddleware(MiddlewareMixin):
     """
     Middleware для добавления CSRF-токена в заголовок ответа.
     Это помогает клиенту получить токен даже при CORS-запросах.
+    CORS preflight сюда не доходит: на него отвечает PreflightMiddleware.
     """
     def process_request(self, request):
-        # Пропускаем OPTIONS запросы без проверки CSRF
-        if request.method == 'OPTIONS':
-            logger.info(f"[CSRFMiddleware] Пропускаем OPTIONS запрос")
-            return HttpResponse(status=200)
-            
         # Получаем CSRF-токен и сразу же устанавливаем в cookie
         csrf_token = get_token(request)
-        logger.info(f"[CSRFMiddleware] Установлен CSRF-токен: {csrf_token}")
-        logger.info(f"[CSRFMiddleware] Метод запроса: {request.method}")
+        # Тот же токен уйдёт в заголовке ответа: повторный get_token
+        # заново маскировал бы секрет
+        request.csrf_header_token = csrf_token
         
-        if request.method == 'POST':
-            csrf_header = request.META.get('HTTP_X_CSRFTOKEN', None)
-            logger.info(f"[CSRFMiddleware] CSRF-токен в заголовке: {csrf_header}")
-            logger.info(f"[CSRFMiddleware] CSRF-токен совпадает: {csrf_header == csrf_token}")
-            logger.info(f"[CSRFMiddleware] Пользователь аутентифицирован: {request.user.is_authenticated}")
-            logger.info(f"[CSRFMiddleware] Запрос от: {request.META.get('HTTP_ORIGIN', 'unknown')}")
-            
-            # Для отладки выводим все заголовки запроса
-            for key, value in request.META.items():
-                if key.startswith('HTTP_'):
-                    logger.debug(f"[CSRFMiddleware] Header {key}: {value}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[CSRFMiddleware] csrf_token=%s method=%s", csrf_token, request.method)
+            if request.method == 'POST':
+                csrf_header = request.META.get('HTTP_X_CSRFTOKEN', None)
+                logger.debug("[CSRFMiddleware] header_token=%s matches=%s authenticated=%s origin=%s",
+                             csrf_header, csrf_header == csrf_token, request.user.is_authenticated,
+                             request.META.get('HTTP_ORIGIN', 'unknown'))
+                
+                # Для отладки выводим все заголовки запроса
+                for key, value in request.META.items():
+                    if key.startswith('HTTP_'):
+                        logger.debug("[CSRFMiddleware] Header %s: %s", key, value)
         
         return None
         
     def process_response(self, request, response):
-        # Получаем CSRF-токен
-        csrf_token = get_token(request)
-        
-        # Добавляем его в заголовок ответа
-        response['X-CSRFToken'] = csrf_token
+        # Добавляем токен, полученный в process_request, в заголовок ответа
+        csrf_token = getattr(request, 'csrf_header_token', None)
+        if csrf_token is not None:
+            response['X-CSRFToken'] = csrf_token
         
         # Дополнительные заголовки для CORS
         response['Access-Control-Expose-Headers'] = 'X-CSRFToken, Content-Type'
         
-        # Для OPTIONS запросов добавляем все необходимые CORS заголовки
-        if request.method == 'OPTIONS':
-            response['Access-Control-Allow-Headers'] = 'X-CSRFToken, Content-Type, Authorization'
-            response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
-            response['Access-Control-Allow-Credentials'] = 'true'
-            response['Access-Control-Max-Age'] = '86400'  # 24 часа
-        
-        return response 
\ No newline at end of file
+        return response 
+
+
+class PerformanceMiddleware:
+    """
+    Middleware для замера производительности запросов.
+    Считает SQL-запросы и время в БД (через connection.execute_wrapper),
+    время сериализации (см. quiz.metrics.TimedJSONRenderer) и общее время,
+    добавляет заголовок Server-Timing и пополняет гистограммы по эндпоинтам.
+    Должен стоять в MIDDLEWARE первым после PreflightMiddleware, чтобы
+    учитывать работу остальных.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self._start(request)
+        with ExitStack() as stack:
+            self._wrap_connections(stack, metrics)
+            response = self.get_response(request)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self._start(request)
+        with ExitStack() as stack:
+            self._wrap_connections(stack, metrics)
+            response = await self.get_response(request)
+        return self._finish(request, response, metrics)
+
+    def _start(self, request):
+        metrics = RequestMetrics()
+        request.perf_metrics = metrics
+        return metrics
+
+    def _wrap_connections(self, stack, metrics):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics.execute_wrapper))
+
+    def _finish(self, request, response, metrics):
+        total = metrics.elapsed()
+        response['Server-Timing'] = metrics.server_timing(total)
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unmatched'
+        registry.observe((view, request.method, response.status_code), metrics, total)
+        return response
+
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, который раздаёт и тесты, опубликованные после запуска
+    процесса (quiz/publishing.py). Обычный WhiteNoise знает только файлы,
+    найденные в STATIC_ROOT при старте, а опубликованные файлы появляются
+    и меняются во время работы.
+
+    Файлы с хешем в имени неизменяемы: их описание кэшируется, отдаются они
+    с бессрочным Cache-Control. Указатели index.json перезаписываются на
+    месте, поэтому читаются с диска на каждый запрос (несколько stat).
+    """
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.published_root = publishing.publish_root()
+        self.published_prefix = self.static_prefix + publishing.PUBLISH_DIR + '/'
+
+    def __call__(self, request):
+        url = request.path_info
+        if self.autorefresh or not url.startswith(self.published_prefix):
+            return super().__call__(request)
+
+        immutable = publishing.HASHED_NAME_RE.search(url) is not None
+        static_file = self.files.get(url) if immutable else None
+        if static_file is None:
+            static_file = self.find_published_file(url)
+            if static_file is None:
+                return self.get_response(request)
+            if immutable:
+                self.files[url] = static_file
+        try:
+            return self.serve(static_file, request)
+        except FileNotFoundError:
+            # Старая версия удалена после публикации новой
+            self.files.pop(url, None)
+            return self.get_response(request)
+
+    def find_published_file(self, url):
+        if not self.url_is_canonical(url):
+            return None
+        path = os.path.join(self.published_root, *url[len(self.published_prefix):].split('/'))
+        if self.is_compressed_variant(path):
+            return None
+        try:
+            return self.get_static_file(path, url)
+        except MissingFileError:
+            return None
+
+    def immutable_file_test(self, path, url):
+        # Вызывается и при сканировании STATIC_ROOT в __init__ базового класса,
+        # когда published_prefix ещё не задан
+        if url.startswith(self.static_prefix + publishing.PUBLISH_DIR + '/'):
+            return publishing.HASHED_NAME_RE.search(url) is not None
+        return super().immutable_file_test(path, url)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0005_quizresult_user_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Версия содержимого теста, увеличивается при любом изменении теста, вопросов или ответов'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_question_count(apps, schema_editor):
+    Quiz = apps.get_model('quiz', 'Quiz')
+    Question = apps.get_model('quiz', 'Question')
+    counts = (
+        Question.objects.filter(quiz=OuterRef('pk'))
+        .order_by()
+        .values('quiz')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    Quiz.objects.update(question_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0006_quiz_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Количество вопросов в тесте'),
+        ),
+        migrations.RunPython(backfill_question_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['created_at', 'id'], name='quiz_created_at_id_idx'),
+        ),
+    ]
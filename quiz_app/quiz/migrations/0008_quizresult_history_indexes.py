@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0007_quiz_question_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['user', 'completed_at'], name='quizresult_user_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['quiz', 'completed_at'], name='quizresult_quiz_completed_idx'),
+        ),
+    ]
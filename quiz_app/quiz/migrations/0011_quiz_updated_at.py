@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:40
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_updated_at(apps, schema_editor):
+    Quiz = apps.get_model('quiz', 'Quiz')
+    Quiz.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0010_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Время последнего изменения теста, вопросов или ответов'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['updated_at'], name='quiz_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('quiz', '0011_quiz_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='quizresult',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='quizresult',
+            name='attempt_id',
+            field=models.UUIDField(blank=True, editable=False, help_text='Ключ попытки от клиента: повторная отправка не создаёт дубликат (см. quiz/results.py)', null=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='quizresult',
+            unique_together={('user', 'attempt_id')},
+        ),
+    ]
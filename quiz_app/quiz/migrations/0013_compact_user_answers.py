@@ -0,0 +1,183 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:29
+
+from django.db import migrations, models, transaction
+import quiz.models
+
+CHUNK_SIZE = 2000
+
+# Логика кодека ответов (quiz/answer_codec.py, quiz/grading.py) на момент
+# этой миграции. Скопирована, а не импортирована: миграция должна работать
+# одинаково, как бы ни менялся код приложения.
+UNANSWERED = 'Не отвечено'
+DELETED_QUESTION = 'Вопрос удалён из теста'
+DELETED_ANSWER = 'Ответ удалён из теста'
+
+
+def _load_quiz(apps, quiz_id):
+    """
+    Вопросы теста из исторических моделей: id вопроса -> (текст,
+    [(id ответа, текст, верный ли)]), в порядке id.
+    """
+    Question = apps.get_model('quiz', 'Question')
+    Answer = apps.get_model('quiz', 'Answer')
+    questions = {
+        question_id: (text, [])
+        for question_id, text in Question.objects.filter(quiz_id=quiz_id).order_by('id').values_list('id', 'text')
+    }
+    answers = (
+        Answer.objects.filter(question__quiz_id=quiz_id).order_by('id')
+        .values_list('question_id', 'id', 'text', 'is_correct')
+    )
+    for question_id, answer_id, text, correct in answers:
+        questions[question_id][1].append((answer_id, text, correct))
+    return questions
+
+
+def _first(entry, *names):
+    for name in names:
+        value = entry.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def _make_encoder(questions):
+    correct = {}
+    answer_question = {}
+    question_by_text = {}
+    answer_by_text = {}
+    for question_id, (text, answers) in questions.items():
+        correct[question_id] = frozenset(answer_id for answer_id, _, is_correct in answers if is_correct)
+        question_by_text.setdefault(text, question_id)
+        for answer_id, answer_text, _ in answers:
+            answer_question[answer_id] = question_id
+            answer_by_text.setdefault((question_id, answer_text), answer_id)
+
+    def resolve(entry):
+        if not isinstance(entry, dict):
+            return None
+        question_id = _first(entry, 'question_id', 'questionId')
+        answer_ids = _first(entry, 'answer_ids', 'answerIds')
+        if answer_ids is None:
+            answer_id = _first(entry, 'answer_id', 'answerId')
+            answer_ids = [] if answer_id is None else [answer_id]
+        if question_id is None and answer_ids:
+            question_id = answer_question.get(answer_ids[0])
+        if question_id is None:
+            question_id = question_by_text.get(_first(entry, 'question_text', 'questionText'))
+        if question_id not in correct:
+            return None
+        if not answer_ids:
+            answer_id = answer_by_text.get((question_id, _first(entry, 'user_answer', 'answerText')))
+            answer_ids = [] if answer_id is None else [answer_id]
+        return question_id, frozenset(a for a in answer_ids if answer_question.get(a) == question_id)
+
+    def encode(user_answers):
+        if not user_answers:
+            return user_answers
+        entries = user_answers.values() if isinstance(user_answers, dict) else user_answers
+        encoded = []
+        for entry in entries:
+            # Уже сжатые записи и записи без вопроса теста остаются как есть
+            resolved = resolve(entry)
+            if resolved is None:
+                encoded.append(entry)
+                continue
+            question_id, selected = resolved
+            encoded.append([question_id, sorted(selected), int(bool(selected) and selected == correct[question_id])])
+        return encoded
+
+    return encode
+
+
+def _make_expander(questions):
+    def expand_entry(entry):
+        question_id, answer_ids, correct = entry
+        question = questions.get(question_id)
+        if question is None:
+            question_text, user_answer, correct_answer = DELETED_QUESTION, '', ''
+        else:
+            question_text, answers = question
+            texts = {answer_id: text for answer_id, text, _ in answers}
+            user_answer = ', '.join(texts[a] for a in answer_ids if a in texts)
+            if not user_answer:
+                user_answer = DELETED_ANSWER if answer_ids else UNANSWERED
+            correct_answer = ', '.join(text for _, text, is_correct in answers if is_correct)
+        expanded = {
+            'question_id': question_id,
+            'answer_id': answer_ids[0] if len(answer_ids) == 1 else None,
+            'question_text': question_text,
+            'user_answer': user_answer,
+            'correct_answer': correct_answer,
+            'is_correct': bool(correct),
+        }
+        if len(answer_ids) > 1:
+            expanded['answer_ids'] = answer_ids
+        return expanded
+
+    def expand(stored):
+        if not stored or not isinstance(stored, list):
+            return stored
+        return [
+            expand_entry(entry) if isinstance(entry, list) and len(entry) == 3 else entry
+            for entry in stored
+        ]
+
+    return expand
+
+
+def _convert(apps, make_transform):
+    """
+    Переписывает user_answers всех результатов порциями по CHUNK_SIZE, каждая
+    порция в своей транзакции. Преобразование не меняет уже преобразованные
+    записи, поэтому прерванную миграцию можно просто запустить снова.
+    """
+    Quiz = apps.get_model('quiz', 'Quiz')
+    QuizResult = apps.get_model('quiz', 'QuizResult')
+    for quiz_id in Quiz.objects.order_by('id').values_list('id', flat=True).iterator():
+        transform = make_transform(_load_quiz(apps, quiz_id))
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(
+                    QuizResult.objects.filter(quiz_id=quiz_id, id__gt=last_id, user_answers__isnull=False)
+                    .only('id', 'user_answers')
+                    .order_by('id')[:CHUNK_SIZE]
+                )
+                if not chunk:
+                    break
+                changed = []
+                for result in chunk:
+                    value = transform(result.user_answers)
+                    if value != result.user_answers:
+                        result.user_answers = value
+                        changed.append(result)
+                QuizResult.objects.bulk_update(changed, ['user_answers'], batch_size=500)
+                last_id = chunk[-1].id
+
+
+def compact_user_answers(apps, schema_editor):
+    _convert(apps, _make_encoder)
+
+
+def expand_user_answers(apps, schema_editor):
+    _convert(apps, _make_expander)
+
+
+class Migration(migrations.Migration):
+    # Порции фиксируются по отдельности, чтобы не держать одну транзакцию
+    # на всю таблицу результатов
+    atomic = False
+
+    dependencies = [
+        ('quiz', '0012_quizresult_attempt_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quizresult',
+            name='user_answers',
+            field=models.JSONField(blank=True, encoder=quiz.models.CompactJSONEncoder, help_text='Ответы пользователя в компактном формате (см. quiz/answer_codec.py)', null=True),
+        ),
+        migrations.RunPython(compact_user_answers, expand_user_answers),
+    ]
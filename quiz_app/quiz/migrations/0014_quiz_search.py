@@ -0,0 +1,79 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:05
+
+from django.conf import settings
+from django.db import migrations
+
+CHUNK_SIZE = 500
+
+# Поисковые документы тестов (см. quiz/search.py); таблица зависит от СУБД
+CREATE_SQL = {
+    'postgresql': [
+        """
+        CREATE TABLE quiz_search (
+            quiz_id bigint PRIMARY KEY,
+            document tsvector NOT NULL
+        )
+        """,
+        "CREATE INDEX quiz_search_document_idx ON quiz_search USING gin (document)",
+    ],
+    'sqlite': [
+        """
+        CREATE VIRTUAL TABLE quiz_search USING fts5(
+            title, questions, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5'
+        )
+        """,
+    ],
+}
+
+INDEX_SQL = {
+    'postgresql': """
+        INSERT INTO quiz_search (quiz_id, document)
+        SELECT q.id,
+               setweight(to_tsvector(%s::regconfig, q.title), 'A')
+               || setweight(to_tsvector(%s::regconfig, coalesce(string_agg(qq.text, ' '), '')), 'B')
+        FROM quiz_quiz q LEFT JOIN quiz_question qq ON qq.quiz_id = q.id
+        WHERE q.id > %s AND q.id <= %s
+        GROUP BY q.id
+    """,
+    'sqlite': """
+        INSERT INTO quiz_search (rowid, title, questions)
+        SELECT q.id, q.title,
+               coalesce((SELECT group_concat(qq.text, char(10)) FROM quiz_question qq
+                         WHERE qq.quiz_id = q.id), '')
+        FROM quiz_quiz q
+        WHERE q.id > %s AND q.id <= %s
+    """,
+}
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE_SQL:
+        return
+    for statement in CREATE_SQL[vendor]:
+        schema_editor.execute(statement)
+
+    config = getattr(settings, 'QUIZ_SEARCH_CONFIG', 'russian')
+    Quiz = apps.get_model('quiz', 'Quiz')
+    ids = list(Quiz.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[start:start + CHUNK_SIZE]
+        bounds = [chunk[0] - 1, chunk[-1]]
+        params = [config, config, *bounds] if vendor == 'postgresql' else bounds
+        schema_editor.execute(INDEX_SQL[vendor], params)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE_SQL:
+        schema_editor.execute("DROP TABLE quiz_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0013_compact_user_answers'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:03
+
+from django.db import migrations, models, transaction
+from django.db.models import Q
+
+CHUNK_SIZE = 2000
+
+
+def fill_positions(apps, schema_editor):
+    """
+    Нумерует вопросы каждого теста с нуля в прежнем порядке показа (по id).
+    Вопросы читаются по (quiz_id, id) порциями, каждая порция обновляется
+    в своей транзакции.
+    """
+    Question = apps.get_model('quiz', 'Question')
+    quiz_id = question_id = position = 0
+    while True:
+        chunk = list(
+            Question.objects.filter(Q(quiz_id__gt=quiz_id) | Q(quiz_id=quiz_id, id__gt=question_id))
+            .order_by('quiz_id', 'id')
+            .values_list('quiz_id', 'id')[:CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        batch = []
+        for row_quiz_id, question_id in chunk:
+            if row_quiz_id != quiz_id:
+                quiz_id, position = row_quiz_id, 0
+            if position:
+                # У первого вопроса теста номер 0 уже стоит по умолчанию
+                batch.append(Question(id=question_id, position=position))
+            position += 1
+        with transaction.atomic():
+            Question.objects.bulk_update(batch, ['position'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0015_quiz_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='position',
+            field=models.PositiveIntegerField(blank=True, default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_positions, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='question',
+            unique_together={('quiz', 'position')},
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0016_question_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizListState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deleted', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
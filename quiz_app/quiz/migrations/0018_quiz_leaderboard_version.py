@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0017_quiz_list_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='leaderboard_version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Версия таблицы лидеров, увеличивается при каждом улучшении результата и пересборке'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0018_quiz_leaderboard_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='quiz',
+            name='quiz_created_at_id_idx',
+        ),
+    ]
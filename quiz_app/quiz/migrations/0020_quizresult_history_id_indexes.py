@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0019_remove_quiz_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='quizresult',
+            name='quizresult_user_completed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['user', 'id'], name='quizresult_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizresult',
+            index=models.Index(fields=['quiz', 'id'], name='quizresult_quiz_id_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_leaderboard_versions(apps, schema_editor):
+    # Версии продолжают расти с прежних значений: топ, закэшированный под
+    # старой версией, не совпадёт с новой
+    Quiz = apps.get_model('quiz', 'Quiz')
+    LeaderboardState = apps.get_model('quiz', 'LeaderboardState')
+    rows = Quiz.objects.values_list('pk', 'leaderboard_version').iterator(chunk_size=2000)
+    batch = []
+    for quiz_id, version in rows:
+        batch.append(LeaderboardState(quiz_id=quiz_id, version=version))
+        if len(batch) >= 2000:
+            LeaderboardState.objects.bulk_create(batch)
+            batch = []
+    LeaderboardState.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0020_quizresult_history_id_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardState',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='leaderboard_state', serialize=False, to='quiz.quiz')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(copy_leaderboard_versions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='quiz',
+            name='leaderboard_version',
+        ),
+    ]
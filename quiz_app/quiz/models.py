@@ -1,5 +1,19 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
+import json
+import uuid
+
+
+class CompactJSONEncoder(json.JSONEncoder):
+    """
+    JSON без пробелов после разделителей и с кириллицей как есть
+    (компактные ответы QuizResult.user_answers, см. quiz/answer_codec.py).
+    """
+    def __init__(self, *args, **kwargs):
+        kwargs['separators'] = (',', ':')
+        kwargs['ensure_ascii'] = False
+        super().__init__(*args, **kwargs)
 
 class Quiz(models.Model):
     title = models.CharField(max_length=200)
@@ -7,13 +21,72 @@ class Quiz(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     hide_answers = models.BooleanField(default=True, help_text="Скрывать правильные ответы до завершения теста")
     time_limit = models.IntegerField(default=0, help_text="Ограничение времени в минутах (0 - без ограничения)")
+    sample_size = models.PositiveIntegerField(default=0, help_text="Сколько вопросов случайно выбирается для каждой попытки (0 - все вопросы по порядку)")
+    version = models.PositiveIntegerField(default=1, editable=False, help_text="Версия содержимого теста, увеличивается при любом изменении теста, вопросов или ответов")
+    question_count = models.PositiveIntegerField(default=0, editable=False, help_text="Количество вопросов в тесте")
+    updated_at = models.DateTimeField(default=timezone.now, editable=False, help_text="Время последнего изменения теста, вопросов или ответов")
+
+    # Поля, которые меняются только атомарным UPDATE
+    # (см. quiz/signals.py)
+    SIGNAL_FIELDS = ('version', 'question_count', 'updated_at')
+
+    class Meta:
+        indexes = [
+            # Last-Modified списка тестов (см. quiz/conditional.py)
+            models.Index(fields=['updated_at'], name='quiz_updated_at_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # При обновлении не перезаписываем поля сигналов устаревшими значениями из памяти
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.SIGNAL_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
 
+class QuizListState(models.Model):
+    """
+    Состояние списка тестов для условных запросов (см. quiz/conditional.py).
+    Одна строка со счётчиком удалённых тестов: создание и изменение теста
+    видны по наибольшему Quiz.updated_at, а удаление - только здесь.
+    """
+    # Первичный ключ единственной строки
+    PK = 1
+
+    deleted = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def record_deletion(cls):
+        # Строка создаётся при первом удалении, как корзины таблицы лидеров
+        cls.objects.bulk_create([cls(pk=cls.PK)], ignore_conflicts=True)
+        cls.objects.filter(pk=cls.PK).update(deleted=models.F('deleted') + 1)
+
 class Question(models.Model):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='questions')
     text = models.TextField()
+    # Порядковый номер вопроса в тесте, по нему вопросы показываются
+    # (см. quiz/snapshots.py). После удаления вопросов возможны пропуски,
+    # reorder_questions нумерует заново с нуля.
+    position = models.PositiveIntegerField(blank=True)
+
+    class Meta:
+        # Уникальный индекс заодно служит для выборки вопросов теста по порядку
+        unique_together = ['quiz', 'position']
+
+    def save(self, *args, **kwargs):
+        # Сигнал post_save меняет Quiz.question_count в той же транзакции, что и INSERT
+        with transaction.atomic(using=kwargs.get('using')):
+            if self.position is None:
+                # Новый вопрос без номера - в конец теста. Строка теста
+                # блокируется, чтобы одновременные вставки не взяли один номер
+                Quiz.objects.select_for_update().filter(pk=self.quiz_id).exists()
+                last = Question.objects.filter(quiz_id=self.quiz_id).aggregate(last=models.Max('position'))['last']
+                self.position = 0 if last is None else last + 1
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return self.text
@@ -32,10 +105,120 @@ class QuizResult(models.Model):
     score = models.IntegerField()
     max_score = models.IntegerField()
     completed_at = models.DateTimeField(auto_now_add=True)
-    user_answers = models.JSONField(null=True, blank=True, help_text="Ответы пользователя в формате JSON")
+    user_answers = models.JSONField(
+        null=True, blank=True, encoder=CompactJSONEncoder,
+        help_text="Ответы пользователя в компактном формате (см. quiz/answer_codec.py)",
+    )
+    attempt_id = models.UUIDField(
+        null=True, blank=True, editable=False,
+        help_text="Ключ попытки от клиента: повторная отправка не создаёт дубликат (см. quiz/results.py)",
+    )
     
     class Meta:
-        unique_together = ['quiz', 'user', 'completed_at']
+        # Ключ попытки уникален в пределах пользователя; результаты без ключа
+        # (NULL) ограничению не подлежат
+        unique_together = ['user', 'attempt_id']
+        indexes = [
+            # История результатов пользователя и администратора (см. quiz/pagination.py)
+            models.Index(fields=['user', 'id'], name='quizresult_user_id_idx'),
+            models.Index(fields=['quiz', 'id'], name='quizresult_quiz_id_idx'),
+            # Выгрузка результатов теста за период (см. quiz/export.py)
+            models.Index(fields=['quiz', 'completed_at'], name='quizresult_quiz_completed_idx'),
+        ]
         
     def __str__(self):
-        return f"{self.user.username} - {self.quiz.title} - {self.score}/{self.max_score}"
\ No newline at end of file
+        return f"{self.user.username} - {self.quiz.title} - {self.score}/{self.max_score}"
+
+class QuizAttempt(models.Model):
+    """
+    Попытка прохождения теста со случайной выборкой вопросов (см. quiz/attempts.py).
+    Выбранные вопросы в порядке показа хранятся упакованным массивом id,
+    поэтому вопрос попытки по номеру берётся одним запросом по первичному ключу.
+    id попытки клиент передаёт как attempt_id при сохранении результата.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_attempts')
+    question_ids = models.BinaryField(help_text="id выбранных вопросов, 8 байт на вопрос (см. quiz/attempts.py)")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.quiz.title} - {self.id}"
+
+class QuestionStatistic(models.Model):
+    """
+    Накопленная статистика по вопросу: сколько раз на него отвечали и сколько раз верно.
+    Обновляется вместе с сохранением результата (см. quiz/answer_stats.py).
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='question_statistics')
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, related_name='statistic')
+    attempts = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.question_id}: {self.correct_count}/{self.attempts}"
+
+
+class AnswerStatistic(models.Model):
+    """
+    Накопленная статистика по варианту ответа: сколько раз его выбирали.
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='answer_statistics')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answer_statistics')
+    answer = models.OneToOneField(Answer, on_delete=models.CASCADE, related_name='statistic')
+    selected_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.answer_id}: {self.selected_count}"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Лучший результат пользователя в тесте. Обновляется при сохранении
+    результата (см. quiz/leaderboard.py).
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    best_score = models.IntegerField()
+    max_score = models.IntegerField()
+    achieved_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['quiz', 'user']
+        indexes = [
+            # Топ-K: лучшие баллы, при равенстве - кто раньше набрал
+            models.Index(fields=['quiz', '-best_score', 'achieved_at'], name='leaderboard_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quiz_id} - {self.user_id} - {self.best_score}/{self.max_score}"
+
+
+class LeaderboardScoreBucket(models.Model):
+    """
+    Сколько пользователей имеют данный лучший балл в тесте. Место пользователя
+    считается суммой по корзинам с большим баллом, число корзин не больше
+    числа различных баллов.
+    """
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='leaderboard_buckets')
+    score = models.IntegerField()
+    users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['quiz', 'score']
+
+    def __str__(self):
+        return f"{self.quiz_id} - {self.score}: {self.users}"
+
+
+class LeaderboardState(models.Model):
+    """
+    Версия таблицы лидеров теста для ключа кэша топа (см. quiz/leaderboard.py).
+    Отдельная строка, а не поле Quiz: увеличивается после фиксации каждого
+    улучшения результата и не блокирует строку теста.
+    """
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, primary_key=True, related_name='leaderboard_state')
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.quiz_id}: {self.version}"
@@ -0,0 +1,43 @@
+"""
+Порядок вопросов теста.
+
+Вопросы показываются по Question.position (уникален в пределах теста,
+индекс (quiz, position)); номер вопроса в API - его место в снимке теста
+(quiz/snapshots.py), собранном в этом порядке. Новый вопрос встаёт в конец
+(Question.save), после удаления вопросов в номерах остаются пропуски.
+"""
+from django.db import transaction
+from django.db.models import F, Max
+
+from . import publishing
+from .models import Question
+from .signals import bump_quiz_version
+
+# Строк в одном UPDATE ... CASE при перенумерации
+BATCH_SIZE = 1000
+
+
+def reorder_questions(quiz_id, question_ids):
+    """
+    Нумерует вопросы теста с нуля в порядке question_ids (все id вопросов
+    теста по одному разу) и увеличивает версию теста.
+
+    Номера меняются пакетным UPDATE. Уникальный индекс проверяется на
+    каждой строке, поэтому перед этим все номера теста одним UPDATE
+    сдвигаются выше наибольшего: иначе обмен номерами двух вопросов
+    нарушил бы уникальность посреди запроса.
+    """
+    with transaction.atomic():
+        questions = Question.objects.filter(quiz_id=quiz_id)
+        last = questions.aggregate(last=Max('position'))['last']
+        if last is None:
+            return
+        questions.update(position=F('position') + max(last + 1, len(question_ids)))
+        Question.objects.bulk_update(
+            [Question(id=question_id, position=position) for position, question_id in enumerate(question_ids)],
+            ['position'],
+            batch_size=BATCH_SIZE,
+        )
+        # bulk_update не вызывает сигналы
+        bump_quiz_version(quiz_id)
+        publishing.schedule_publish(quiz_id)
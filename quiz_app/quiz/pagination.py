@@ -0,0 +1,27 @@
+from rest_framework.pagination import CursorPagination
+
+
+class QuizCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация списка тестов в порядке создания.
+    Позиция курсора - первое поле ordering, поэтому оно должно быть
+    уникальным: по created_at тесты с одинаковым временем терялись бы на
+    границе страниц. id возрастает вместе с created_at и идёт по первичному
+    ключу, поэтому любая страница стоит столько же, сколько первая.
+    """
+    ordering = ('id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class QuizResultCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация истории результатов, от новых к старым, по
+    уникальному id (см. QuizCursorPagination). Опирается на первичный ключ
+    и составные индексы (user, id) и (quiz, id).
+    """
+    ordering = ('-id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
@@ -0,0 +1,175 @@
+"""
+Публикация тестов статическими JSON-файлами.
+
+Данные прохождения теста (тот же ответ, что /quizzes/<id>/play/ без
+страниц) записываются в файл с хешем содержимого в имени рядом с
+собранной статикой, STATIC_ROOT/published/quizzes/<id>/<хеш>.json, вместе с
+.gz (и .br, если установлен brotli) вариантами. Такие файлы не меняются,
+поэтому отдаются с бессрочным кэшированием. Указатель на текущий файл -
+маленький STATIC_ROOT/published/quizzes/<id>/index.json:
+
+    {"id": 5, "version": 12, "file": "3f2a9c0d81be.json"}
+
+Его кэш ограничен WHITENOISE_MAX_AGE, после изменения теста клиенты
+видят новую версию не позже чем через это время.
+
+Файлы раздаёт quiz.middleware.StaticFilesMiddleware (WhiteNoise) без
+представления и обращения к БД. Плеер на фронтенде (fetchQuizPlayBundle в
+quiz-frontend/src/api.js) загружает тест из опубликованного файла, а если
+файла нет - через /play/. Тесты со случайной выборкой вопросов плеер берёт
+из попытки (/attempts/<id>/), а не из файла. Публикуются только данные, которые
+/play/ отдаёт любому вошедшему пользователю: при hide_answers признаков
+правильности ответов в файле нет. Файлы доступны без входа в систему.
+
+При QUIZ_PUBLISH_ON_SAVE тест публикуется заново после фиксации
+транзакции, изменившей его (quiz/signals.py), удалённый тест снимается
+с публикации. Полная публикация - команда publish_quizzes. Каталог
+локальный для процесса: при нескольких серверах он должен быть общим,
+иначе после деплоя или на другом сервере нужно запускать команду.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+
+from django.conf import settings
+from whitenoise.compress import Compressor
+
+from .deferred import on_commit_batch
+from .models import Quiz
+from .snapshots import get_quiz_snapshot, quiz_play_data
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_ON_SAVE = getattr(settings, 'QUIZ_PUBLISH_ON_SAVE', False)
+# Каталог внутри STATIC_ROOT и префикс URL внутри STATIC_URL
+PUBLISH_DIR = 'published/quizzes'
+INDEX_NAME = 'index.json'
+# Имя неизменяемого файла: первые 12 символов md5 содержимого, как у
+# ManifestStaticFilesStorage
+HASHED_NAME_RE = re.compile(r'/[0-9a-f]{12}\.json$')
+
+
+def publish_root():
+    return os.path.join(settings.STATIC_ROOT, *PUBLISH_DIR.split('/'))
+
+
+def _quiz_dir(quiz_id):
+    return os.path.join(publish_root(), str(quiz_id))
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_index(quiz_id):
+    """
+    Указатель на опубликованный файл теста или None.
+    """
+    try:
+        with open(os.path.join(_quiz_dir(quiz_id), INDEX_NAME), 'rb') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _prune(directory, keep):
+    keep = keep | {INDEX_NAME.split('.', 1)[0]}
+    for name in os.listdir(directory):
+        # Сравниваем по части до первой точки: так остаются и .gz/.br варианты
+        if name.split('.', 1)[0] in keep:
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def publish_quiz(quiz_id, compressor=None):
+    """
+    Публикует текущую версию теста. Возвращает указатель или None, если
+    теста нет. Уже опубликованная версия не перезаписывается.
+    """
+    snapshot = get_quiz_snapshot(quiz_id)
+    if snapshot is None:
+        unpublish_quiz(quiz_id)
+        return None
+    previous = read_index(quiz_id)
+    if previous and previous['version'] >= snapshot.version:
+        return previous
+
+    data = json.dumps(quiz_play_data(snapshot), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.md5(data, usedforsecurity=False).hexdigest()[:12]
+    directory = _quiz_dir(quiz_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{digest}.json")
+    if not os.path.exists(path):
+        # Сжатые варианты пишутся до указателя: клиент не увидит файл без них
+        _write_atomic(path, data)
+        list((compressor or Compressor(quiet=True)).compress(path))
+
+    index = {'id': quiz_id, 'version': snapshot.version, 'file': f"{digest}.json"}
+    _write_atomic(os.path.join(directory, INDEX_NAME), json.dumps(index).encode())
+    # Предыдущую версию оставляем: клиент мог получить старый указатель из кэша
+    keep = {digest}
+    if previous:
+        keep.add(previous['file'].split('.', 1)[0])
+    _prune(directory, keep)
+    logger.debug("[publishing] quiz=%s version=%s file=%s", quiz_id, snapshot.version, index['file'])
+    return index
+
+
+def unpublish_quiz(quiz_id):
+    shutil.rmtree(_quiz_dir(quiz_id), ignore_errors=True)
+
+
+def schedule_publish(quiz_id):
+    """
+    Публикует тест после фиксации текущей транзакции, если включена
+    публикация при сохранении. Каждый тест, изменённый в транзакции,
+    публикуется один раз (quiz/deferred.py).
+    """
+    if PUBLISH_ON_SAVE:
+        on_commit_batch(_publish_safely, quiz_id)
+
+
+def _publish_safely(quiz_ids):
+    # Ошибка записи файлов не должна ломать уже выполненное сохранение теста:
+    # клиент в этом случае получает данные через API
+    for quiz_id in quiz_ids:
+        try:
+            publish_quiz(quiz_id)
+        except OSError:
+            logger.exception("[publishing] Не удалось опубликовать тест %s", quiz_id)
+
+
+def publish_all(progress=None, chunk_size=500):
+    """
+    Публикует все тесты и снимает с публикации удалённые. Возвращает
+    число опубликованных тестов.
+    """
+    compressor = Compressor(quiet=True)
+    published = set()
+    last_id = 0
+    while True:
+        ids = list(Quiz.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        for quiz_id in ids:
+            if publish_quiz(quiz_id, compressor) is not None:
+                published.add(str(quiz_id))
+        last_id = ids[-1]
+        if progress:
+            progress(len(published))
+
+    if os.path.isdir(publish_root()):
+        for name in os.listdir(publish_root()):
+            # Тест мог быть создан и опубликован уже после обхода
+            if name.isdigit() and name not in published and not Quiz.objects.filter(pk=int(name)).exists():
+                unpublish_quiz(name)
+    return len(published)
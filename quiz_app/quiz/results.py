@@ -0,0 +1,425 @@
+"""
+Сохранение результата прохождения теста.
+
+Общая часть синхронного SaveQuizResult и асинхронного save_quiz_result
+(quiz/async_views.py): одиночный результат проверяется так же, как элемент
+пакета (parse_item), запись результата, статистика ответов и таблица
+лидеров обновляются в одной транзакции. Проверенные ответы сохраняются в
+компактном формате (quiz/answer_codec.py).
+
+Балл считается на сервере по ключу ответов теста: клиент обязан прислать
+user_answers (пустой список - ни одного ответа, балл 0), присланные
+score и max_score принимаются только для теста без ключа ответов.
+
+Клиент передаёт ключ попытки attempt_id (UUID). Результат с ключом
+записывается одним INSERT ... ON CONFLICT (user_id, attempt_id) DO NOTHING:
+повторная отправка той же попытки (ретрай после обрыва связи, двойной
+клик, перезагрузка страницы результатов) ничего не пишет и возвращает уже
+сохранённую запись, в том числе при одновременных запросах. Статистика и
+таблица лидеров обновляются только для действительно вставленной записи.
+В таблицу лидеров попадают только результаты с баллом, посчитанным на
+сервере по ключу ответов; балл от клиента хранится лишь в истории.
+
+store_batch сохраняет пакет результатов одного пользователя (офлайн-клиенты,
+общие планшеты в классе), store_entries - результаты разных пользователей
+(сброс очереди отложенной записи, quiz/spool.py). Все тесты пакета
+проверяются одним запросом, результаты вставляются одним bulk_create,
+статистика ответов обновляется по каждому тесту пакета, таблица лидеров -
+по каждой паре (тест, пользователь), а не по каждому результату.
+"""
+import logging
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from .answer_codec import encode as encode_answers
+from .answer_stats import record_attempt, record_attempts
+from .attempts import attempts_question_ids
+from .grading import get_answer_key, grade
+from .leaderboard import record_score
+from .models import Quiz, QuizResult
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_SIZE = getattr(settings, 'QUIZ_RESULT_BATCH_MAX_SIZE', 500)
+
+# Проверенный элемент пакета: несохранённый QuizResult и данные для статистики
+BatchItem = namedtuple('BatchItem', 'index result answer_key graded')
+
+
+class QuizNotFound(ValueError):
+    pass
+
+
+class AttemptConflict(ValueError):
+    pass
+
+
+def parse_attempt_id(value):
+    """
+    Ключ попытки из запроса: UUID или None, если ключ не передан.
+    Некорректное значение - ValueError.
+    """
+    if value in (None, ''):
+        return None
+    if isinstance(value, uuid.UUID):
+        return value
+    if not isinstance(value, str):
+        raise ValueError(f"attempt_id must be a string: {value!r}")
+    return uuid.UUID(value)
+
+
+def check_score(score, max_score):
+    """
+    Проверяет балл результата: целые числа, 0 <= score <= max_score.
+    Ошибка - ValueError с текстом для клиента.
+    """
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in (score, max_score)):
+        raise ValueError("score и max_score должны быть целыми числами")
+    if not 0 <= score <= max_score:
+        raise ValueError("score должен быть от 0 до max_score")
+
+
+def _insert_new(quiz_result):
+    """
+    Вставляет результат, если попытки с таким ключом у пользователя ещё нет.
+    Возвращает True, если запись вставлена (quiz_result.pk заполняется).
+    """
+    opts = QuizResult._meta
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    features = connection.features
+    if not (features.supports_update_conflicts_with_target and features.can_return_columns_from_insert):
+        # Без ON CONFLICT ... RETURNING: вставка в точке сохранения, конфликт
+        # ключа определяется по IntegrityError
+        try:
+            with transaction.atomic():
+                quiz_result.save(force_insert=True)
+        except IntegrityError:
+            return False
+        return True
+
+    quote = connection.ops.quote_name
+    values = [field.get_db_prep_save(field.pre_save(quiz_result, True), connection) for field in fields]
+    conflict = ', '.join(quote(opts.get_field(name).column) for name in ('user', 'attempt_id'))
+    sql = (
+        f"INSERT INTO {quote(opts.db_table)} ({', '.join(quote(field.column) for field in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"ON CONFLICT ({conflict}) DO NOTHING RETURNING {quote(opts.pk.column)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, values)
+        row = cursor.fetchone()
+    if row is None:
+        return False
+    quiz_result.pk = row[0]
+    quiz_result._state.adding = False
+    return True
+
+
+def store_result(item):
+    """
+    Сохраняет проверенный результат (BatchItem из parse_item) и возвращает
+    пару (QuizResult, created).
+
+    Если попытка уже сохранена, возвращается существующая запись и
+    created=False; её тест может отличаться от теста результата, если
+    клиент использовал ключ повторно - это проверяет вызывающий код.
+    """
+    quiz_result, answer_key, graded = item.result, item.answer_key, item.graded
+    attempt_id = quiz_result.attempt_id
+    with transaction.atomic():
+        if attempt_id is None:
+            quiz_result.save(force_insert=True)
+            created = True
+        else:
+            created = _insert_new(quiz_result)
+
+        if created and graded is not None:
+            record_attempt(answer_key, graded.selections)
+            record_score(
+                quiz_result.quiz_id, quiz_result.user_id, quiz_result.score, quiz_result.max_score,
+                quiz_result.completed_at,
+            )
+
+    if not created:
+        quiz_result = QuizResult.objects.select_related('quiz', 'user').get(
+            user_id=quiz_result.user_id, attempt_id=attempt_id
+        )
+        logger.debug("[store_result] attempt %s already saved as id=%s", attempt_id, quiz_result.id)
+        return quiz_result, False
+
+    logger.debug("[store_result] created id=%s score=%s/%s",
+                 quiz_result.id, quiz_result.score, quiz_result.max_score)
+    return quiz_result, True
+
+
+def save_result(user, raw):
+    """
+    Проверяет и сохраняет одиночный результат (SaveQuizResult и
+    save_quiz_result). Возвращает пару (QuizResult, created); повторная
+    отправка той же попытки возвращает сохранённую запись.
+
+    Ошибки: QuizNotFound, AttemptConflict (ключ попытки уже использован для
+    другого теста) и ValueError с текстом для клиента.
+    """
+    quiz = None
+    try:
+        quiz = Quiz.objects.select_related('author').filter(pk=int(raw.get('quiz_id'))).first()
+    except (AttributeError, TypeError, ValueError):
+        pass
+    quizzes = {quiz.id: quiz} if quiz is not None else {}
+    sampled = {quiz.id} if quiz is not None and quiz.sample_size else set()
+    attempts = attempts_question_ids(attempt_keys([(user, raw)], sampled)) if sampled else {}
+
+    item = parse_item(0, raw, user, quizzes.__contains__, {}, attempts)
+    item.result.quiz = quizzes[item.result.quiz_id]
+    quiz_result, created = store_result(item)
+    if quiz_result.quiz_id != item.result.quiz_id:
+        raise AttemptConflict("attempt_id уже использован для другого теста")
+    return quiz_result, created
+
+
+def _error(index, message):
+    return {'index': index, 'status': 'error', 'error': message}
+
+
+def parse_item(index, raw, user, quiz_exists, answer_keys, attempts=None):
+    """
+    Проверяет элемент пакета и строит BatchItem; ошибка - ValueError с текстом для клиента.
+
+    quiz_exists(quiz_id) сообщает, существует ли тест; answer_keys - общий
+    для пакета словарь уже полученных ключей ответов; attempts - попытки
+    со случайной выборкой вопросов (см. attempts.attempts_question_ids).
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Ожидается объект результата")
+    quiz_id = raw.get('quiz_id')
+    score = raw.get('score')
+    max_score = raw.get('max_score')
+    user_answers = raw.get('user_answers')
+    if not quiz_id or (user_answers is None and (score is None or max_score is None)):
+        raise ValueError("Необходимы quiz_id и user_answers или score и max_score")
+    if user_answers is not None and not isinstance(user_answers, (list, dict)):
+        raise ValueError("user_answers должен быть списком или объектом")
+    try:
+        attempt_id = parse_attempt_id(raw.get('attempt_id'))
+    except ValueError:
+        raise ValueError("Некорректный attempt_id") from None
+    try:
+        quiz_id = int(quiz_id)
+    except (TypeError, ValueError):
+        raise QuizNotFound("Тест не найден") from None
+    if not quiz_exists(quiz_id):
+        raise QuizNotFound("Тест не найден")
+
+    # Балл считается на сервере по ключу ответов, score и max_score клиента
+    # принимаются только для теста без ключа
+    if quiz_id not in answer_keys:
+        answer_keys[quiz_id] = get_answer_key(quiz_id)
+    answer_key = answer_keys[quiz_id]
+    graded = None
+    if answer_key is not None:
+        if user_answers is None:
+            raise ValueError("Необходимы user_answers: балл теста считается на сервере")
+        question_ids = None
+        if answer_key.sample_size:
+            # Тест со случайной выборкой оценивается только по вопросам
+            # попытки: без неё максимальный балл был бы числом всех вопросов
+            attempt = (attempts or {}).get((user.id, attempt_id))
+            if attempt is None or attempt[0] != quiz_id:
+                raise ValueError("Для теста со случайной выборкой вопросов нужен attempt_id начатой попытки")
+            question_ids = attempt[1]
+        graded = grade(answer_key, user_answers, question_ids)
+        score, max_score = graded.score, graded.max_score
+        user_answers = encode_answers(answer_key, user_answers)
+    check_score(score, max_score)
+
+    result = QuizResult(
+        quiz_id=quiz_id,
+        user=user,
+        score=score,
+        max_score=max_score,
+        user_answers=user_answers,
+        attempt_id=attempt_id,
+    )
+    return BatchItem(index, result, answer_key, graded)
+
+
+def _duplicate(item, result_id, quiz_id, score, max_score):
+    """
+    Статус элемента, попытка которого уже сохранена как result_id.
+    """
+    if quiz_id != item.result.quiz_id:
+        return _error(item.index, "attempt_id уже использован для другого теста")
+    return {
+        'index': item.index, 'status': 'duplicate',
+        'id': result_id, 'score': score, 'max_score': max_score,
+    }
+
+
+def _insert_batch(items):
+    """
+    Вставляет элементы, попытки которых ещё не сохранены. Вызывается в транзакции.
+    Возвращает статусы элементов по индексу.
+    """
+    statuses = {}
+    keys = {
+        (item.result.user_id, item.result.attempt_id)
+        for item in items if item.result.attempt_id is not None
+    }
+    saved = {}
+    if keys:
+        rows = QuizResult.objects.filter(
+            user_id__in={user_id for user_id, _ in keys},
+            attempt_id__in={attempt_id for _, attempt_id in keys},
+        ).values_list('user_id', 'attempt_id', 'id', 'quiz_id', 'score', 'max_score')
+        saved = {(row[0], row[1]): row[2:] for row in rows if (row[0], row[1]) in keys}
+
+    new_items = []
+    pending = {}
+    for item in items:
+        result = item.result
+        key = (result.user_id, result.attempt_id)
+        if result.attempt_id is not None and key in saved:
+            result_id, quiz_id, score, max_score = saved[key]
+        elif result.attempt_id is not None and key in pending:
+            # Та же попытка встречается в пакете повторно
+            first = pending[key]
+            result_id, quiz_id, score, max_score = None, first.quiz_id, first.score, first.max_score
+        else:
+            new_items.append(item)
+            if result.attempt_id is not None:
+                pending[key] = result
+            continue
+        statuses[item.index] = _duplicate(item, result_id, quiz_id, score, max_score)
+
+    QuizResult.objects.bulk_create([item.result for item in new_items])
+
+    graded_by_quiz = {}
+    best = {}
+    for item in new_items:
+        result = item.result
+        if item.graded is not None:
+            graded_by_quiz.setdefault(result.quiz_id, (item.answer_key, []))[1].append(item.graded.selections)
+            key = (result.quiz_id, result.user_id)
+            if key not in best or result.score > best[key].score:
+                best[key] = result
+        statuses[item.index] = {
+            'index': item.index, 'status': 'created',
+            'id': result.pk, 'score': result.score, 'max_score': result.max_score,
+        }
+
+    for answer_key, selections_list in graded_by_quiz.values():
+        record_attempts(answer_key, selections_list)
+    # В таблице лидеров важен только лучший результат пакета по каждой паре (тест, пользователь)
+    for (quiz_id, user_id), result in best.items():
+        record_score(quiz_id, user_id, result.score, result.max_score, result.completed_at)
+
+    # Повторы внутри пакета ссылаются на только что созданную запись
+    for item in items:
+        status = statuses[item.index]
+        if status['status'] == 'duplicate' and status['id'] is None:
+            status['id'] = pending[(item.result.user_id, item.result.attempt_id)].pk
+    return statuses
+
+
+def attempt_keys(entries, sampled):
+    """
+    Пары (id пользователя, id попытки) элементов пакета с ответами для
+    тестов sampled со случайной выборкой вопросов.
+    """
+    keys = set()
+    for user, raw in entries:
+        try:
+            if int(raw.get('quiz_id')) not in sampled or not raw.get('user_answers'):
+                continue
+            attempt_id = parse_attempt_id(raw.get('attempt_id'))
+        except (AttributeError, TypeError, ValueError):
+            continue
+        if attempt_id is not None:
+            keys.add((user.id, attempt_id))
+    return keys
+
+
+def _insert_one(item):
+    """
+    Сохраняет элемент своей транзакцией, когда пакет целиком не удалось
+    вставить из-за параллельного запроса. Конфликт и здесь значит, что
+    ту же попытку только что сохранил другой запрос: элемент - duplicate.
+    """
+    result = item.result
+    result.pk = None
+    result._state.adding = True
+    try:
+        with transaction.atomic():
+            return _insert_batch([item])
+    except IntegrityError:
+        row = None
+        if result.attempt_id is not None:
+            row = (
+                QuizResult.objects.filter(user_id=result.user_id, attempt_id=result.attempt_id)
+                .values_list('id', 'quiz_id', 'score', 'max_score')
+                .first()
+            )
+        if row is None:
+            logger.exception("[store_entries] item %s was not saved", item.index)
+            return {item.index: _error(item.index, "Не удалось сохранить результат")}
+        return {item.index: _duplicate(item, *row)}
+
+
+def store_entries(entries):
+    """
+    Сохраняет пары (пользователь, элемент пакета) и возвращает список
+    статусов в порядке пар: created (с id и баллом), duplicate (попытка уже
+    сохранена) или error (с текстом ошибки). Ошибка в одном элементе не
+    мешает сохранению остальных.
+    """
+    quiz_ids = set()
+    for _, raw in entries:
+        try:
+            quiz_ids.add(int(raw.get('quiz_id')))
+        except (AttributeError, TypeError, ValueError):
+            pass
+    rows = Quiz.objects.filter(id__in=quiz_ids).values_list('id', 'sample_size') if quiz_ids else ()
+    existing, sampled = set(), set()
+    for quiz_id, sample_size in rows:
+        existing.add(quiz_id)
+        if sample_size:
+            sampled.add(quiz_id)
+    attempts = attempts_question_ids(attempt_keys(entries, sampled)) if sampled else {}
+
+    statuses = [None] * len(entries)
+    items = []
+    answer_keys = {}
+    for index, (user, raw) in enumerate(entries):
+        try:
+            items.append(parse_item(index, raw, user, existing.__contains__, answer_keys, attempts))
+        except ValueError as exc:
+            statuses[index] = _error(index, str(exc))
+
+    if items:
+        try:
+            with transaction.atomic():
+                inserted = _insert_batch(items)
+        except IntegrityError:
+            # Параллельный запрос успел сохранить часть попыток пакета:
+            # элементы сохраняются по одному, повторная проверка отметит
+            # их как duplicate
+            inserted = {}
+            for item in items:
+                inserted.update(_insert_one(item))
+        for index, status in inserted.items():
+            statuses[index] = status
+
+    logger.debug("[store_entries] items=%d created=%d", len(entries),
+                 sum(1 for status in statuses if status['status'] == 'created'))
+    return statuses
+
+
+def store_batch(user, raw_items):
+    """
+    Сохраняет пакет результатов пользователя (см. store_entries).
+    """
+    return store_entries([(user, raw) for raw in raw_items])
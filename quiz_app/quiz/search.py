@@ -0,0 +1,251 @@
+"""
+Полнотекстовый поиск тестов по названию и тексту вопросов.
+
+Для каждого теста в отдельной таблице quiz_search хранится один поисковый
+документ: название и тексты всех вопросов. Таблица создаётся миграцией
+0014_quiz_search под конкретную СУБД:
+
+- PostgreSQL: столбец tsvector с GIN-индексом. Название входит в документ с
+  весом A, вопросы - с весом B; конфигурация QUIZ_SEARCH_CONFIG ('russian')
+  приводит русские слова к основе, латиницу - английским стеммером.
+  Ранжирование - ts_rank.
+- SQLite: виртуальная таблица FTS5 (rowid - id теста) с токенизатором
+  unicode61 (регистр и ё/е не различаются) и префиксными индексами.
+  Ранжирование - bm25, совпадение в названии весит в 10 раз больше.
+  Стемминга нет, его заменяет поиск по префиксу.
+
+Каждое слово запроса ищется как префикс ("тест" находит "тестирование"),
+все слова должны встретиться в документе. Ранжируются все совпадения
+(ORDER BY ранг LIMIT в том же запросе): первые результаты не зависят от
+того, в каком порядке индекс отдаёт документы. Время запроса с частым
+словом растёт с числом совпадений, но в памяти держатся только limit
+лучших. На других СУБД поиск идёт через icontains без индекса.
+
+Документ пересобирается после фиксации транзакции, изменившей тест или его
+вопросы (quiz/signals.py); пакетные вставки, которые не вызывают сигналы,
+индексируют тесты явно через index_quizzes. Полная перестройка - команда
+rebuild_search_index.
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .deferred import on_commit_batch
+from .models import Quiz, Question
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CONFIG = getattr(settings, 'QUIZ_SEARCH_CONFIG', 'russian')
+MAX_RESULTS = getattr(settings, 'QUIZ_SEARCH_MAX_RESULTS', 50)
+# Больше слов в запросе не учитывается
+MAX_TERMS = 8
+# Тестов в одном запросе пересборки документов
+INDEX_CHUNK_SIZE = 500
+
+TABLE = 'quiz_search'
+
+# Слова так, как их выделяет токенизатор unicode61: буквы и цифры,
+# подчёркивание - разделитель
+WORD_RE = re.compile(r'[^\W_]+')
+
+# Служебные слова встречаются почти в каждом документе и ничего не говорят
+# о тесте, а запрос с ними на FTS5 перебирает весь индекс. PostgreSQL с
+# конфигурацией russian отбрасывает их сам, здесь - для всех СУБД одинаково.
+STOP_WORDS = frozenset("""
+    а без бы в во вот все вы да для до его ее её если же за и из или к как ли
+    мы на над не него нет ни но о об от по под при про с со так то только ты
+    у что чтобы это я
+""".split())
+
+
+def parse_terms(query):
+    """
+    Слова поискового запроса в нижнем регистре, без повторов и служебных
+    слов (если запрос состоит только из них, они остаются).
+    """
+    terms = []
+    for term in WORD_RE.findall(query.lower()):
+        if term not in terms:
+            terms.append(term)
+    return ([term for term in terms if term not in STOP_WORDS] or terms)[:MAX_TERMS]
+
+
+def _table_names():
+    quote = connection.ops.quote_name
+    return {
+        'search': quote(TABLE),
+        'quiz': quote(Quiz._meta.db_table),
+        'question': quote(Question._meta.db_table),
+    }
+
+
+def _chunks(ids):
+    ids = sorted(set(ids))
+    for start in range(0, len(ids), INDEX_CHUNK_SIZE):
+        yield ids[start:start + INDEX_CHUNK_SIZE]
+
+
+def _index_postgresql(cursor, ids):
+    names = _table_names()
+    cursor.execute(
+        f"""
+        INSERT INTO {names['search']} (quiz_id, document)
+        SELECT q.id,
+               setweight(to_tsvector(%s::regconfig, q.title), 'A')
+               || setweight(to_tsvector(%s::regconfig, coalesce(string_agg(qq.text, ' '), '')), 'B')
+        FROM {names['quiz']} q LEFT JOIN {names['question']} qq ON qq.quiz_id = q.id
+        WHERE q.id = ANY(%s)
+        GROUP BY q.id
+        ON CONFLICT (quiz_id) DO UPDATE SET document = EXCLUDED.document
+        """,
+        [SEARCH_CONFIG, SEARCH_CONFIG, ids],
+    )
+    cursor.execute(
+        f"DELETE FROM {names['search']} WHERE quiz_id = ANY(%s) "
+        f"AND NOT EXISTS (SELECT 1 FROM {names['quiz']} q WHERE q.id = quiz_id)",
+        [ids],
+    )
+
+
+def _index_sqlite(cursor, ids):
+    names = _table_names()
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"DELETE FROM {names['search']} WHERE rowid IN ({placeholders})", ids)
+    cursor.execute(
+        f"""
+        INSERT INTO {names['search']} (rowid, title, questions)
+        SELECT q.id, q.title,
+               coalesce((SELECT group_concat(qq.text, char(10)) FROM {names['question']} qq
+                         WHERE qq.quiz_id = q.id), '')
+        FROM {names['quiz']} q
+        WHERE q.id IN ({placeholders})
+        """,
+        ids,
+    )
+
+
+INDEXERS = {
+    'postgresql': _index_postgresql,
+    'sqlite': _index_sqlite,
+}
+# Столбец с id теста в таблице поиска
+KEY_COLUMNS = {
+    'postgresql': 'quiz_id',
+    'sqlite': 'rowid',
+}
+
+
+def index_quizzes(quiz_ids):
+    """
+    Пересобирает поисковые документы тестов; документы удалённых тестов
+    удаляются. Вызывается в транзакции изменения или после неё.
+    """
+    indexer = INDEXERS.get(connection.vendor)
+    if indexer is None or not quiz_ids:
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        for ids in _chunks(quiz_ids):
+            indexer(cursor, ids)
+
+
+def schedule_index(quiz_id):
+    """
+    Пересобирает документ теста после фиксации текущей транзакции
+    (сразу, если транзакции нет). Все тесты, изменённые в транзакции,
+    пересобираются одним вызовом index_quizzes, каждый по одному разу.
+    """
+    if connection.vendor in INDEXERS:
+        on_commit_batch(index_quizzes, quiz_id)
+
+
+def rebuild(progress=None):
+    """
+    Пересобирает документы всех тестов и удаляет документы удалённых.
+    Поиск при этом продолжает работать. Возвращает число тестов.
+    """
+    if connection.vendor not in INDEXERS:
+        return 0
+    total = 0
+    last_id = 0
+    while True:
+        ids = list(
+            Quiz.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:INDEX_CHUNK_SIZE]
+        )
+        if not ids:
+            break
+        index_quizzes(ids)
+        total += len(ids)
+        last_id = ids[-1]
+        if progress:
+            progress(total)
+
+    names = _table_names()
+    key = KEY_COLUMNS[connection.vendor]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {names['search']} WHERE {key} NOT IN (SELECT id FROM {names['quiz']})")
+    return total
+
+
+def _search_postgresql(terms, limit):
+    names = _table_names()
+    # Слова состоят только из букв и цифр, поэтому экранирование не нужно
+    tsquery = ' & '.join(f"{term}:*" for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT s.quiz_id
+            FROM {names['search']} s, to_tsquery(%s::regconfig, %s) query
+            WHERE s.document @@ query
+            ORDER BY ts_rank(s.document, query) DESC, s.quiz_id
+            LIMIT %s
+            """,
+            [SEARCH_CONFIG, tsquery, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_sqlite(terms, limit):
+    names = _table_names()
+    # Для однобуквенных слов нет префиксного индекса, они ищутся целиком
+    match = ' '.join(f'"{term}"*' if len(term) > 1 else f'"{term}"' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid
+            FROM {names['search']}
+            WHERE {names['search']} MATCH %s
+            ORDER BY bm25({names['search']}, 10.0, 1.0), rowid
+            LIMIT %s
+            """,
+            [match, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_fallback(terms, limit):
+    queryset = Quiz.objects.all()
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(questions__text__icontains=term))
+    return list(queryset.order_by('id').values_list('id', flat=True).distinct()[:limit])
+
+
+SEARCHERS = {
+    'postgresql': _search_postgresql,
+    'sqlite': _search_sqlite,
+}
+
+
+def search(query, limit=20):
+    """
+    id тестов, подходящих под запрос, от более релевантных к менее.
+    """
+    terms = parse_terms(query)
+    if not terms:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+    quiz_ids = SEARCHERS.get(connection.vendor, _search_fallback)(terms, limit)
+    logger.debug("[search] terms=%s found=%d", terms, len(quiz_ids))
+    return quiz_ids
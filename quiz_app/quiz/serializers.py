@@ -1,6 +1,12 @@
 from rest_framework import serializers
 from .models import Quiz, Question, Answer, QuizResult
 from django.contrib.auth.models import User
+from django.db import transaction
+from .answer_codec import expand as expand_answers
+from .snapshots import get_quiz_snapshot
+
+# Максимальное число строк в одном INSERT при пакетном создании вопросов и ответов
+BULK_CREATE_BATCH_SIZE = 1000
 
 class AnswerSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,10 +36,12 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         answers_data = validated_data.pop('answers')
-        question = Question.objects.create(**validated_data)
-        
-        for answer_data in answers_data:
-            Answer.objects.create(question=question, **answer_data)
+        with transaction.atomic():
+            question = Question.objects.create(**validated_data)
+            Answer.objects.bulk_create(
+                [Answer(question=question, **answer_data) for answer_data in answers_data],
+                batch_size=BULK_CREATE_BATCH_SIZE
+            )
             
         return question
 
@@ -43,31 +51,45 @@ class QuizCreateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Quiz
-        fields = ('title', 'hide_answers', 'time_limit', 'questions')
+        fields = ('title', 'hide_answers', 'time_limit', 'sample_size', 'questions')
     
     def create(self, validated_data):
+        """
+        Создаёт квиз пакетными вставками: один INSERT для квиза и по одному
+        bulk_create для всех вопросов и всех ответов в одной транзакции.
+        bulk_create возвращает первичные ключи вопросов, по ним ответы
+        привязываются к своим вопросам.
+        """
         questions_data = validated_data.pop('questions')
-        quiz = Quiz.objects.create(**validated_data)
         
-        for question_data in questions_data:
-            answers_data = question_data.pop('answers')
-            question = Question.objects.create(quiz=quiz, **question_data)
-            
-            for answer_data in answers_data:
-                Answer.objects.create(question=question, **answer_data)
+        with transaction.atomic():
+            # bulk_create не вызывает сигналы, поэтому счётчик вопросов задаём сразу
+            quiz = Quiz.objects.create(question_count=len(questions_data), **validated_data)
+            questions = Question.objects.bulk_create(
+                [
+                    Question(quiz=quiz, text=question_data['text'], position=position)
+                    for position, question_data in enumerate(questions_data)
+                ],
+                batch_size=BULK_CREATE_BATCH_SIZE
+            )
+            Answer.objects.bulk_create(
+                [
+                    Answer(question=question, **answer_data)
+                    for question, question_data in zip(questions, questions_data)
+                    for answer_data in question_data['answers']
+                ],
+                batch_size=BULK_CREATE_BATCH_SIZE
+            )
                 
         return quiz
 
 class QuizSerializer(serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
-    questions_count = serializers.SerializerMethodField()
+    questions_count = serializers.IntegerField(source='question_count', read_only=True)
     
     class Meta:
         model = Quiz
-        fields = ('id', 'title', 'author', 'created_at', 'questions_count', 'hide_answers', 'time_limit')
-    
-    def get_questions_count(self, obj):
-        return obj.questions.count()
+        fields = ('id', 'title', 'author', 'created_at', 'questions_count', 'hide_answers', 'time_limit', 'sample_size')
 
 class QuizDetailSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
@@ -75,12 +97,26 @@ class QuizDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Quiz
-        fields = ('id', 'title', 'author', 'created_at', 'questions', 'hide_answers', 'time_limit')
+        fields = ('id', 'title', 'author', 'created_at', 'questions', 'hide_answers', 'time_limit', 'sample_size')
         read_only_fields = ('author',)
 
 class QuizResultSerializer(serializers.ModelSerializer):
     quiz_title = serializers.ReadOnlyField(source='quiz.title')
     username = serializers.ReadOnlyField(source='user.username')
+    user_answers = serializers.SerializerMethodField()
+    
+    def get_user_answers(self, obj):
+        """
+        Ответы в подробном формате, восстановленные из компактного по снимку
+        теста. Версия берётся из obj.quiz (select_related), поэтому снимок
+        обычно читается из кэша без запросов. В списках с контекстом
+        include_answers=False ответы не отдаются (null).
+        """
+        if not self.context.get('include_answers', True):
+            return None
+        if not obj.user_answers:
+            return obj.user_answers
+        return expand_answers(get_quiz_snapshot(obj.quiz_id, obj.quiz.version), obj.user_answers)
     
     class Meta:
         model = QuizResult
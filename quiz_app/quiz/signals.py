@@ -0,0 +1,97 @@
+"""
+Сигналы, поддерживающие актуальность версии квиза.
+
+Любое изменение квиза, его вопросов или ответов увеличивает Quiz.version
+и обновляет Quiz.updated_at, благодаря чему скомпилированные снимки
+(quiz/snapshots.py) со старой версией перестают использоваться, а ETag и
+Last-Modified ответов (quiz/conditional.py) меняются. Добавление и удаление вопросов в том же
+UPDATE поддерживает денормализованный счётчик Quiz.question_count.
+Удаление теста увеличивает счётчик QuizListState: по нему меняется ETag
+списков тестов.
+
+Изменение названия теста или его вопросов, а также удаление теста
+пересобирают поисковый документ теста (quiz/search.py), а при
+QUIZ_PUBLISH_ON_SAVE - и опубликованный статический файл теста
+(quiz/publishing.py). Это делается после фиксации транзакции, один раз на
+транзакцию для каждого теста (quiz/deferred.py).
+"""
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Quiz, QuizListState, Question, Answer
+from . import publishing
+from .search import schedule_index
+
+
+def bump_quiz_version(quiz_id=None, question_delta=0, **filters):
+    """
+    Атомарно увеличивает версию квиза, обновляет время изменения (и при
+    необходимости меняет количество вопросов) одним UPDATE.
+    """
+    if quiz_id is not None:
+        filters['pk'] = quiz_id
+    updates = {'version': F('version') + 1, 'updated_at': timezone.now()}
+    if question_delta:
+        updates['question_count'] = F('question_count') + question_delta
+    Quiz.objects.filter(**filters).update(**updates)
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_saved(sender, instance, created, **kwargs):
+    if not created:
+        bump_quiz_version(instance.pk)
+
+
+@receiver(post_delete, sender=Quiz)
+def quiz_deleted(sender, instance, **kwargs):
+    # Меняет ETag списков тестов (quiz/conditional.py)
+    QuizListState.record_deletion()
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, created, **kwargs):
+    bump_quiz_version(instance.quiz_id, question_delta=1 if created else 0)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, **kwargs):
+    bump_quiz_version(instance.quiz_id, question_delta=-1)
+
+
+@receiver([post_save, post_delete], sender=Answer)
+def answer_changed(sender, instance, **kwargs):
+    # Не обращаемся к instance.question: при каскадном удалении его уже может не быть
+    bump_quiz_version(questions__id=instance.question_id)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_search_changed(sender, instance, **kwargs):
+    # При создании через QuizCreateSerializer вопросы вставляются bulk_create
+    # в той же транзакции, поэтому документ собирается уже с ними
+    schedule_index(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_search_changed(sender, instance, **kwargs):
+    schedule_index(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_publish_changed(sender, instance, **kwargs):
+    publishing.schedule_publish(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_publish_changed(sender, instance, **kwargs):
+    publishing.schedule_publish(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Answer)
+def answer_publish_changed(sender, instance, **kwargs):
+    # Запрос к вопросу нужен только при включённой публикации
+    if publishing.PUBLISH_ON_SAVE:
+        quiz_id = Question.objects.filter(pk=instance.question_id).values_list('quiz_id', flat=True).first()
+        if quiz_id is not None:
+            publishing.schedule_publish(quiz_id)
@@ -0,0 +1,236 @@
+"""
+Скомпилированные снимки квизов.
+
+Квиз (вопросы, ответы, hide_answers, time_limit) один раз собирается в
+неизменяемый снимок, ключом которого служит пара (id квиза, версия).
+Снимки хранятся в LRU-кэше процесса и в общем кэше Django. Любое сохранение
+Quiz, Question или Answer увеличивает Quiz.version (см. quiz/signals.py),
+поэтому устаревший снимок никогда не будет выдан: запрос просто обратится
+к снимку с новым ключом.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from .models import Quiz, Question, Answer
+
+SnapshotAnswer = namedtuple('SnapshotAnswer', 'id text is_correct')
+SnapshotQuestion = namedtuple('SnapshotQuestion', 'id text answers')
+QuizSnapshot = namedtuple(
+    'QuizSnapshot',
+    'id version title author created_at hide_answers time_limit sample_size questions',
+)
+# Меняется вместе с полями снимков: снимки старого формата в общем кэше
+# Django не читаются
+SNAPSHOT_FORMAT = 2
+
+LRU_SIZE = getattr(settings, 'QUIZ_SNAPSHOT_LRU_SIZE', 256)
+CACHE_TIMEOUT = getattr(settings, 'QUIZ_SNAPSHOT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+class SnapshotLRU:
+    """
+    Потокобезопасный LRU-кэш снимков внутри одного процесса.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            snapshot = self._data.get(key)
+            if snapshot is not None:
+                self._data.move_to_end(key)
+            return snapshot
+
+    def set(self, key, snapshot):
+        with self._lock:
+            self._data[key] = snapshot
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_lru = SnapshotLRU(LRU_SIZE)
+_questions_by_id = SnapshotLRU(LRU_SIZE)
+
+
+def snapshot_cache_key(quiz_id, version):
+    return f'quiz:snapshot:{SNAPSHOT_FORMAT}:{quiz_id}:{version}'
+
+
+def get_quiz_version(quiz_id):
+    """
+    Возвращает текущую версию квиза одним запросом по первичному ключу
+    или None, если квиз не существует.
+    """
+    return Quiz.objects.filter(pk=quiz_id).values_list('version', flat=True).first()
+
+
+def compile_quiz_snapshot(quiz_id):
+    """
+    Собирает снимок квиза из БД (три запроса: квиз, вопросы, ответы).
+    Версия снимка берётся из той же строки, что и содержимое.
+    """
+    answers = Prefetch('answers', queryset=Answer.objects.order_by('id'))
+    questions = Prefetch('questions', queryset=Question.objects.order_by('position').prefetch_related(answers))
+    quiz = (
+        Quiz.objects.select_related('author')
+        .prefetch_related(questions)
+        .filter(pk=quiz_id)
+        .first()
+    )
+    if quiz is None:
+        return None
+
+    return QuizSnapshot(
+        id=quiz.id,
+        version=quiz.version,
+        title=quiz.title,
+        author=quiz.author.username,
+        created_at=serializers.DateTimeField().to_representation(quiz.created_at),
+        hide_answers=quiz.hide_answers,
+        time_limit=quiz.time_limit,
+        sample_size=quiz.sample_size,
+        questions=tuple(
+            SnapshotQuestion(
+                id=question.id,
+                text=question.text,
+                answers=tuple(
+                    SnapshotAnswer(id=answer.id, text=answer.text, is_correct=answer.is_correct)
+                    for answer in question.answers.all()
+                ),
+            )
+            for question in quiz.questions.all()
+        ),
+    )
+
+
+def get_quiz_snapshot(quiz_id, version=None):
+    """
+    Возвращает актуальный снимок квиза или None, если квиз не существует.
+
+    Обычно стоит одного запроса (чтение версии, если она не передана);
+    снимок берётся из LRU процесса, затем из общего кэша Django и только в
+    крайнем случае компилируется заново.
+    """
+    if version is None:
+        version = get_quiz_version(quiz_id)
+    if version is None:
+        return None
+
+    key = snapshot_cache_key(quiz_id, version)
+    snapshot = _lru.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = compile_quiz_snapshot(quiz_id)
+        if snapshot is None:
+            return None
+        key = snapshot_cache_key(quiz_id, snapshot.version)
+        cache.set(key, snapshot, CACHE_TIMEOUT)
+
+    _lru.set(key, snapshot)
+    return snapshot
+
+
+async def aget_quiz_snapshot(quiz_id, version=None):
+    """
+    Асинхронный вариант get_quiz_snapshot для async-представлений.
+    Компиляция снимка (редкий промах кэша) выполняется в потоке.
+    """
+    if version is None:
+        version = await Quiz.objects.filter(pk=quiz_id).values_list('version', flat=True).afirst()
+    if version is None:
+        return None
+
+    key = snapshot_cache_key(quiz_id, version)
+    snapshot = _lru.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = await cache.aget(key)
+    if snapshot is None:
+        snapshot = await sync_to_async(compile_quiz_snapshot)(quiz_id)
+        if snapshot is None:
+            return None
+        key = snapshot_cache_key(quiz_id, snapshot.version)
+        await cache.aset(key, snapshot, CACHE_TIMEOUT)
+
+    _lru.set(key, snapshot)
+    return snapshot
+
+
+def get_snapshot_question(snapshot, question_id):
+    """
+    Вопрос снимка по id или None. Словарь вопросов строится один раз на
+    версию квиза.
+    """
+    cache_key = (snapshot.id, snapshot.version)
+    questions = _questions_by_id.get(cache_key)
+    if questions is None:
+        questions = {question.id: question for question in snapshot.questions}
+        _questions_by_id.set(cache_key, questions)
+    return questions.get(question_id)
+
+
+def question_data(question, include_correct=True):
+    """
+    Представление вопроса снимка в формате QuestionSerializer.
+    """
+    if include_correct:
+        answers = [
+            {'id': answer.id, 'text': answer.text, 'is_correct': answer.is_correct}
+            for answer in question.answers
+        ]
+    else:
+        answers = [{'id': answer.id, 'text': answer.text} for answer in question.answers]
+    return {'id': question.id, 'text': question.text, 'answers': answers}
+
+
+def quiz_detail_data(snapshot):
+    """
+    Представление снимка в формате QuizDetailSerializer.
+    """
+    return {
+        'id': snapshot.id,
+        'title': snapshot.title,
+        'author': snapshot.author,
+        'created_at': snapshot.created_at,
+        'questions': [question_data(question) for question in snapshot.questions],
+        'hide_answers': snapshot.hide_answers,
+        'time_limit': snapshot.time_limit,
+        'sample_size': snapshot.sample_size,
+    }
+
+
+def quiz_play_data(snapshot, offset=0, limit=None):
+    """
+    Представление снимка в формате /play/: вопросы начиная с offset, не
+    больше limit (все, если limit не задан). При hide_answers признаки
+    правильности ответов не передаются.
+    """
+    questions = snapshot.questions
+    end = len(questions) if limit is None else offset + limit
+    return {
+        "quiz_id": snapshot.id,
+        "quiz_title": snapshot.title,
+        "total_questions": len(questions),
+        "offset": offset,
+        "next_offset": end if end < len(questions) else None,
+        "questions": [question_data(question, not snapshot.hide_answers) for question in questions[offset:end]],
+        "hide_answers": snapshot.hide_answers,
+        "time_limit": snapshot.time_limit
+    }
@@ -0,0 +1,308 @@
+"""
+Отложенная запись результатов (write-behind) для пиков отправки.
+
+Когда заканчивается тест с ограничением времени, все участники отправляют
+результаты в одни и те же секунды, и отдельная транзакция на каждый
+SaveQuizResult перегружает основную базу. При QUIZ_WRITE_BEHIND=True
+результат проверяется и оценивается по кэшированному снимку теста,
+дописывается в локальную очередь и сразу подтверждается ответом 202.
+
+Очередь - файл SQLite в режиме WAL (QUIZ_RESULT_SPOOL_PATH) с
+synchronous=FULL: подтверждённый результат переживает падение процесса.
+Фоновый поток каждого процесса забирает записи пачками до
+QUIZ_RESULT_SPOOL_BATCH_SIZE и сохраняет их в основную базу одной
+транзакцией через results.store_entries не позже чем через
+QUIZ_RESULT_SPOOL_MAX_DELAY секунд после постановки в очередь (при
+доступной базе).
+
+Записи забираются с арендой (claim): процесс помечает пачку своим токеном
+и удаляет её после фиксации транзакции. Если процесс упал, аренда истекает
+через QUIZ_RESULT_SPOOL_LEASE секунд и пачку забирает другой процесс.
+Повторная запись безопасна: у каждого результата в очереди есть
+attempt_id, поэтому уже сохранённые попытки не дублируются. Очередь,
+оставшуюся после остановки сервера, сбрасывает следующий запуск или
+команда flush_result_spool.
+
+Чтение собственной истории (UserQuizResults) сначала сбрасывает записи
+пользователя из очереди (wait_for_user). Ожидание ограничено
+QUIZ_RESULT_SPOOL_WAIT_TIMEOUT секундами: если пачку пользователя сейчас
+сбрасывает другой процесс или он упал с арендой, история отдаётся без
+этих записей, а не держит запрос до истечения аренды. Остальные чтения
+(QuizResultDetail, таблица лидеров, статистика, списки и выгрузка
+администратора) очередь не ждут и видят результат после фонового сброса.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections
+
+from .attempts import attempts_question_ids
+from .grading import get_answer_key
+from .results import attempt_keys, parse_item, store_entries
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND = getattr(settings, 'QUIZ_WRITE_BEHIND', False)
+SPOOL_PATH = getattr(settings, 'QUIZ_RESULT_SPOOL_PATH', 'result_spool.sqlite3')
+MAX_DELAY = getattr(settings, 'QUIZ_RESULT_SPOOL_MAX_DELAY', 1.0)
+BATCH_SIZE = getattr(settings, 'QUIZ_RESULT_SPOOL_BATCH_SIZE', 500)
+LEASE = getattr(settings, 'QUIZ_RESULT_SPOOL_LEASE', 30)
+WAIT_TIMEOUT = getattr(settings, 'QUIZ_RESULT_SPOOL_WAIT_TIMEOUT', 2.0)
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS spooled_result (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        queued_at REAL NOT NULL,
+        claim TEXT,
+        claimed_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS spooled_result_user_idx ON spooled_result (user_id)",
+)
+
+
+class ResultSpool:
+    """
+    Очередь результатов в файле SQLite. Соединения свои у каждого потока;
+    файл могут одновременно использовать несколько процессов.
+    """
+    def __init__(self, path, lease=LEASE):
+        self.path = path
+        self.lease = lease
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            # isolation_level=None: транзакции открываются явно через BEGIN
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def append(self, user_id, item):
+        self._connection().execute(
+            "INSERT INTO spooled_result (user_id, payload, queued_at) VALUES (?, ?, ?)",
+            (user_id, json.dumps(item, ensure_ascii=False), time.time()),
+        )
+
+    def claim(self, limit, user_id=None):
+        """
+        Забирает до limit свободных записей (или записей с истёкшей арендой)
+        в порядке постановки. Возвращает токен аренды и список
+        (id, user_id, элемент).
+        """
+        token = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            query = "SELECT id, user_id, payload FROM spooled_result WHERE (claim IS NULL OR claimed_at < ?)"
+            params = [now - self.lease]
+            if user_id is not None:
+                query += " AND user_id = ?"
+                params.append(user_id)
+            rows = conn.execute(query + " ORDER BY id LIMIT ?", (*params, limit)).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE spooled_result SET claim = ?, claimed_at = ? WHERE id = ?",
+                    [(token, now, row[0]) for row in rows],
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return token, [(row_id, owner_id, json.loads(payload)) for row_id, owner_id, payload in rows]
+
+    def complete(self, token):
+        self._connection().execute("DELETE FROM spooled_result WHERE claim = ?", (token,))
+
+    def release(self, token):
+        self._connection().execute(
+            "UPDATE spooled_result SET claim = NULL, claimed_at = NULL WHERE claim = ?", (token,)
+        )
+
+    def has_pending(self, user_id):
+        row = self._connection().execute(
+            "SELECT 1 FROM spooled_result WHERE user_id = ? LIMIT 1", (user_id,)
+        ).fetchone()
+        return row is not None
+
+    def size(self):
+        return self._connection().execute("SELECT COUNT(*) FROM spooled_result").fetchone()[0]
+
+
+spool = ResultSpool(SPOOL_PATH)
+
+
+def flush(limit=BATCH_SIZE, user_id=None):
+    """
+    Переносит одну пачку из очереди в основную базу. Возвращает число
+    обработанных записей; при ошибке базы пачка возвращается в очередь.
+    """
+    token, rows = spool.claim(limit, user_id)
+    if not rows:
+        return 0
+    try:
+        users = User.objects.in_bulk({owner_id for _, owner_id, _ in rows})
+        entries = []
+        for row_id, owner_id, item in rows:
+            if owner_id not in users:
+                logger.warning("[spool] user %s deleted, dropping spooled result %s", owner_id, row_id)
+                continue
+            entries.append((users[owner_id], item))
+        statuses = store_entries(entries)
+    except Exception:
+        spool.release(token)
+        raise
+    spool.complete(token)
+
+    for (_, item), status in zip(entries, statuses):
+        if status['status'] == 'error':
+            # Тест удалён, пока результат ждал в очереди
+            logger.warning("[spool] dropping result attempt_id=%s: %s", item.get('attempt_id'), status['error'])
+    logger.debug("[spool] flushed %d results", len(rows))
+    return len(rows)
+
+
+def drain():
+    """
+    Сбрасывает всю очередь. Возвращает число обработанных записей.
+    """
+    total = 0
+    while flushed := flush():
+        total += flushed
+    return total
+
+
+def wait_for_user(user_id, timeout=WAIT_TIMEOUT):
+    """
+    Сбрасывает результаты пользователя из очереди в основную базу. Записи,
+    которые сейчас сбрасывает другой процесс, ожидаются не дольше timeout
+    секунд. Возвращает False, если к этому времени в очереди остались
+    записи пользователя.
+    """
+    if not spool.has_pending(user_id):
+        return True
+    deadline = time.monotonic() + timeout
+    while True:
+        flush(user_id=user_id)
+        if not spool.has_pending(user_id):
+            return True
+        if time.monotonic() > deadline:
+            logger.warning("[spool] results of user %s are still pending", user_id)
+            return False
+        time.sleep(0.05)
+
+
+def enqueue(user, raw):
+    """
+    Проверяет и оценивает результат по кэшированному снимку теста (один
+    запрос версии по первичному ключу) и ставит его в очередь. Возвращает
+    подтверждение для клиента; ошибка - ValueError с текстом для клиента.
+    """
+    # Ключ ответов есть только у существующего теста: одна проверка на оба случая
+    answer_keys = {}
+    attempts = {}
+    try:
+        quiz_id = int(raw.get('quiz_id'))
+    except (AttributeError, TypeError, ValueError):
+        pass
+    else:
+        answer_key = answer_keys[quiz_id] = get_answer_key(quiz_id)
+        if answer_key is not None and answer_key.sample_size:
+            # Попытка со случайной выборкой оценивается по своим вопросам,
+            # как и при сбросе очереди (store_entries)
+            attempts = attempts_question_ids(attempt_keys([(user, raw)], {quiz_id}))
+    item = parse_item(0, raw, user, lambda quiz_id: answer_keys.get(quiz_id) is not None, answer_keys, attempts)
+    result = item.result
+    # Ключ попытки нужен, чтобы повторный сброс пачки не создал дубликат.
+    # Свой ключ создаётся только для теста без выборки: результат теста с
+    # выборкой без попытки parse_item уже отклонил
+    attempt_id = str(result.attempt_id or uuid.uuid4())
+    spool.append(user.id, {
+        'quiz_id': result.quiz_id,
+        'score': result.score,
+        'max_score': result.max_score,
+        'user_answers': result.user_answers,
+        'attempt_id': attempt_id,
+    })
+    _flusher.notify()
+    return {
+        'status': 'queued',
+        'attempt_id': attempt_id,
+        'quiz': result.quiz_id,
+        'score': result.score,
+        'max_score': result.max_score,
+    }
+
+
+class Flusher:
+    """
+    Фоновый поток процесса, сбрасывающий очередь не реже раза в MAX_DELAY
+    секунд и сразу, как только в очереди набирается BATCH_SIZE записей.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        # Записей, поставленных в очередь с последнего сброса; меняется под _lock
+        self._queued = 0
+
+    def start(self):
+        with self._lock:
+            # После fork (gunicorn --preload) потока родителя в дочернем процессе нет
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='result-spool-flusher', daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        self.start()
+        with self._lock:
+            self._queued += 1
+            full = self._queued >= BATCH_SIZE
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(MAX_DELAY)
+            self._wake.clear()
+            with self._lock:
+                self._queued = 0
+            try:
+                while flush() == BATCH_SIZE:
+                    pass
+            except Exception:
+                logger.exception("[spool] flush failed, will retry")
+            finally:
+                close_old_connections()
+
+
+_flusher = Flusher()
+
+
+def start_flusher():
+    """
+    Запускает фоновый сброс очереди в текущем процессе; вызывается при
+    старте сервера (backend/wsgi.py, backend/asgi.py), чтобы очередь,
+    оставшаяся после падения, была сброшена без ожидания новых отправок.
+    """
+    if WRITE_BEHIND:
+        _flusher.start()
@@ -0,0 +1,55 @@
+"""
+Общие данные тестов приложения quiz.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from quiz import grading, snapshots
+from quiz.models import Answer, Question, Quiz
+
+
+def create_quiz(author, questions=3, answers=3, **fields):
+    """
+    Тест из questions вопросов по answers вариантов; правильный вариант в
+    каждом вопросе - первый.
+    """
+    quiz = Quiz.objects.create(title='Тест', author=author, **fields)
+    for n in range(questions):
+        question = Question.objects.create(quiz=quiz, text=f'Вопрос {n + 1}')
+        for k in range(answers):
+            Answer.objects.create(question=question, text=f'Вариант {k + 1}', is_correct=k == 0)
+    return quiz
+
+
+def answers_for(quiz, correct=True, questions=None):
+    """
+    user_answers в формате фронтенда: правильный (или первый неправильный)
+    вариант на каждый вопрос теста или на вопросы questions (id).
+    """
+    payload = []
+    for question in quiz.questions.order_by('position'):
+        if questions is not None and question.id not in questions:
+            continue
+        answer = question.answers.filter(is_correct=correct).order_by('id').first()
+        payload.append({'question_id': question.id, 'answer_id': answer.id})
+    return payload
+
+
+class QuizTestCase(TestCase):
+    """
+    Сбрасывает кэши снимков и ключей ответов: после отката транзакции
+    теста id и версии тестов повторяются, и снимок из прошлого теста
+    выглядел бы актуальным.
+    """
+    def setUp(self):
+        cache.clear()
+        snapshots._lru.clear()
+        snapshots._questions_by_id.clear()
+        grading._keys.clear()
+        self.user = User.objects.create_user('student', password='password')
+        self.author = User.objects.create_user('author', password='password')
+        self.client.force_login(self.user)
+
+    def post_json(self, path, data):
+        return self.client.post(path, data, content_type='application/json')
@@ -0,0 +1,93 @@
+from quiz.answer_codec import DELETED_ANSWER, DELETED_QUESTION, UNANSWERED, encode, expand
+from quiz.grading import get_answer_key
+from quiz.models import Question, QuizResult
+from quiz.snapshots import get_quiz_snapshot
+
+from .base import QuizTestCase, answers_for, create_quiz
+
+
+class AnswerCodecTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=2)
+        self.key = get_answer_key(self.quiz.id)
+        self.snapshot = get_quiz_snapshot(self.quiz.id)
+        self.first, self.second = self.quiz.questions.order_by('position')
+
+    def test_encode_compact_entries(self):
+        right = self.first.answers.get(is_correct=True)
+        wrong = self.second.answers.filter(is_correct=False).order_by('id').first()
+        encoded = encode(self.key, [
+            {'question_id': self.first.id, 'answer_id': right.id},
+            {'question_text': self.second.text, 'user_answer': wrong.text},
+        ])
+        self.assertEqual(encoded, [[self.first.id, [right.id], 1], [self.second.id, [wrong.id], 0]])
+
+    def test_round_trip(self):
+        answers = answers_for(self.quiz)
+        answers[1] = {'question_id': self.second.id, 'answer_ids': list(
+            self.second.answers.order_by('id').values_list('id', flat=True)[:2]
+        )}
+        compact = encode(self.key, answers)
+        expanded = expand(self.snapshot, compact)
+
+        self.assertEqual(expanded[0]['question_text'], 'Вопрос 1')
+        self.assertEqual(expanded[0]['user_answer'], 'Вариант 1')
+        self.assertEqual(expanded[0]['correct_answer'], 'Вариант 1')
+        self.assertTrue(expanded[0]['is_correct'])
+        self.assertEqual(expanded[1]['user_answer'], 'Вариант 1, Вариант 2')
+        self.assertIsNone(expanded[1]['answer_id'])
+        self.assertFalse(expanded[1]['is_correct'])
+        self.assertEqual(encode(self.key, expanded), compact)
+
+    def test_unresolved_and_verbose_entries_are_kept(self):
+        verbose = {'question_text': 'Чужой вопрос', 'user_answer': 'да', 'is_correct': True}
+        compact = encode(self.key, [verbose])
+        self.assertEqual(compact, [verbose])
+        self.assertEqual(expand(self.snapshot, compact), [verbose])
+        self.assertIsNone(encode(self.key, None))
+        self.assertEqual(expand(self.snapshot, []), [])
+
+    def test_expand_without_quiz_or_answer(self):
+        compact = [[self.first.id, [], 0], [10 ** 9, [1], 1]]
+        expanded = expand(self.snapshot, compact)
+        self.assertEqual(expanded[0]['user_answer'], UNANSWERED)
+        self.assertEqual(expanded[1]['question_text'], DELETED_QUESTION)
+        self.assertEqual(expand(None, compact)[0]['question_text'], DELETED_QUESTION)
+
+    def test_api_stores_compact_and_returns_verbose(self):
+        answers = answers_for(self.quiz)
+        response = self.post_json('/api/save-quiz-result/', {'quiz_id': self.quiz.id, 'user_answers': answers})
+        self.assertEqual(response.status_code, 201)
+        stored = QuizResult.objects.get().user_answers
+        self.assertEqual(stored, encode(self.key, answers))
+
+        history = self.client.get('/api/quiz-results/').data['results']
+        self.assertEqual(
+            [(entry['question_id'], entry['answer_id'], entry['is_correct']) for entry in history[0]['user_answers']],
+            [(entry['question_id'], entry['answer_id'], True) for entry in answers],
+        )
+
+    def test_history_shows_current_texts_after_quiz_edits(self):
+        # Тексты не хранятся в результате: после правок теста история
+        # показывает текущие тексты и пометки, балл и верность не меняются
+        response = self.post_json('/api/save-quiz-result/', {
+            'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz),
+        })
+        self.assertEqual(response.status_code, 201)
+        self.first.text = 'Вопрос 1 (исправлен)'
+        self.first.save()
+        self.second.answers.get(is_correct=True).delete()
+        Question.objects.create(quiz=self.quiz, text='Вопрос 3')
+
+        result = self.client.get('/api/quiz-results/').data['results'][0]
+        self.assertEqual((result['score'], result['max_score']), (2, 2))
+        first, second = result['user_answers']
+        self.assertEqual(first['question_text'], 'Вопрос 1 (исправлен)')
+        self.assertEqual(second['user_answer'], DELETED_ANSWER)
+        self.assertTrue(first['is_correct'] and second['is_correct'])
+
+        self.first.delete()
+        result = self.client.get('/api/quiz-results/').data['results'][0]
+        self.assertEqual(result['user_answers'][0]['question_text'], DELETED_QUESTION)
+        self.assertTrue(result['user_answers'][0]['is_correct'])
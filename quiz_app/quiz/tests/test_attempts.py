@@ -0,0 +1,131 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+
+from quiz import spool
+from quiz.attempts import pack_ids, unpack_ids
+from quiz.models import QuizAttempt, QuizResult
+from quiz.results import store_batch
+from quiz.spool import ResultSpool
+
+from .base import QuizTestCase, answers_for, create_quiz
+
+
+class QuizAttemptTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=5, sample_size=2)
+        self.question_ids = set(self.quiz.questions.values_list('id', flat=True))
+
+    def start(self):
+        response = self.post_json(f'/api/quizzes/{self.quiz.id}/attempts/', {})
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def test_pack_round_trip(self):
+        ids = [2 ** 40, 7, 1]
+        self.assertEqual(unpack_ids(pack_ids(ids)), tuple(ids))
+        self.assertEqual(len(pack_ids(ids)), 8 * len(ids))
+
+    def test_attempt_draws_distinct_questions_of_quiz(self):
+        data = self.start()
+        drawn = [question['id'] for question in data['questions']]
+        self.assertEqual(data['total_questions'], 2)
+        self.assertEqual(len(set(drawn)), 2)
+        self.assertLessEqual(set(drawn), self.question_ids)
+        attempt = QuizAttempt.objects.get(pk=data['attempt_id'])
+        self.assertEqual(list(unpack_ids(attempt.question_ids)), drawn)
+
+    def test_attempt_question_by_index(self):
+        data = self.start()
+        url = f"/api/attempts/{data['attempt_id']}/questions/"
+        response = self.client.get(url + '1/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['question']['id'], data['questions'][1]['id'])
+        self.assertEqual(self.client.get(url + '2/').status_code, 400)
+
+        self.client.force_login(User.objects.create_user('classmate', password='password'))
+        self.assertEqual(self.client.get(url + '0/').status_code, 404)
+
+    def test_attempt_play_returns_all_drawn_questions(self):
+        data = self.start()
+        url = f"/api/attempts/{data['attempt_id']}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([question['id'] for question in response.data['questions']],
+                         [question['id'] for question in data['questions']])
+        self.assertEqual(response.data['total_questions'], 2)
+        self.assertIsNone(response.data['next_offset'])
+
+        self.client.force_login(User.objects.create_user('classmate', password='password'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_quiz_without_sample_has_no_attempts(self):
+        quiz = create_quiz(self.author, questions=2)
+        response = self.post_json(f'/api/quizzes/{quiz.id}/attempts/', {})
+        self.assertEqual(response.status_code, 400)
+
+    def test_result_is_graded_against_drawn_questions(self):
+        data = self.start()
+        # Ответы на все вопросы теста: засчитываются только вопросы попытки
+        response = self.post_json('/api/save-quiz-result/', {
+            'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz), 'attempt_id': data['attempt_id'],
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['score'], response.data['max_score']), (2, 2))
+
+    def test_batch_item_is_graded_against_drawn_questions(self):
+        data = self.start()
+        drawn = [question['id'] for question in data['questions']]
+        statuses = store_batch(self.user, [
+            {'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz, questions=drawn[:1]),
+             'attempt_id': data['attempt_id']},
+        ])
+        self.assertEqual((statuses[0]['score'], statuses[0]['max_score']), (1, 2))
+
+    def test_queued_result_is_graded_against_drawn_questions(self):
+        data = self.start()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        queue = ResultSpool(os.path.join(directory.name, 'spool.sqlite3'))
+        with mock.patch.object(spool, 'spool', queue), mock.patch.object(spool, '_flusher'):
+            ack = spool.enqueue(self.user, {
+                'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz), 'attempt_id': data['attempt_id'],
+            })
+            spool.flush()
+        # Подтверждение совпадает с сохранённым результатом
+        self.assertEqual((ack['score'], ack['max_score']), (2, 2))
+        result = QuizResult.objects.get()
+        self.assertEqual((result.score, result.max_score), (2, 2))
+
+    def test_result_without_attempt_is_rejected(self):
+        other = create_quiz(self.author, questions=5, sample_size=2)
+        foreign = self.post_json(f'/api/quizzes/{other.id}/attempts/', {}).data['attempt_id']
+        for attempt_id in (None, '9b2f7c4e-1d3a-4f5b-8c6d-7e8f9a0b1c2d', foreign):
+            with self.subTest(attempt_id=attempt_id):
+                response = self.post_json('/api/save-quiz-result/', {
+                    'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz), 'attempt_id': attempt_id,
+                })
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(QuizResult.objects.exists())
+
+    def test_batch_item_without_attempt_is_rejected(self):
+        data = self.start()
+        statuses = store_batch(self.user, [
+            {'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz)},
+            {'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz), 'attempt_id': data['attempt_id']},
+        ])
+        self.assertEqual([status['status'] for status in statuses], ['error', 'created'])
+        self.assertEqual(QuizResult.objects.get().max_score, 2)
+
+    def test_queued_result_without_attempt_is_rejected(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        queue = ResultSpool(os.path.join(directory.name, 'spool.sqlite3'))
+        with mock.patch.object(spool, 'spool', queue), mock.patch.object(spool, '_flusher'):
+            with self.assertRaises(ValueError):
+                spool.enqueue(self.user, {'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz)})
+            spool.flush()
+        self.assertFalse(QuizResult.objects.exists())
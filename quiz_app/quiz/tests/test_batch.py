@@ -0,0 +1,105 @@
+import uuid
+from unittest import mock
+
+from django.db import IntegrityError
+
+from quiz import results
+from quiz.models import LeaderboardEntry, QuizResult
+from quiz.results import BATCH_MAX_SIZE, store_batch
+
+from .base import QuizTestCase, answers_for, create_quiz
+
+
+class SaveQuizResultsBatchTests(QuizTestCase):
+    url = '/api/save-quiz-result/batch/'
+
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=2)
+
+    def item(self, correct=True, attempt_id=None, **fields):
+        return {
+            'quiz_id': self.quiz.id,
+            'user_answers': answers_for(self.quiz, correct),
+            'attempt_id': attempt_id or str(uuid.uuid4()),
+            **fields,
+        }
+
+    def test_statuses_follow_item_order(self):
+        repeated = str(uuid.uuid4())
+        response = self.post_json(self.url, {'results': [
+            self.item(attempt_id=repeated),
+            {'quiz_id': self.quiz.id, 'score': 2, 'max_score': 2},
+            self.item(correct=False),
+            self.item(attempt_id=repeated),
+            {'quiz_id': self.quiz.id + 1, 'user_answers': []},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        statuses = response.data['results']
+        self.assertEqual([status['index'] for status in statuses], [0, 1, 2, 3, 4])
+        self.assertEqual(
+            [status['status'] for status in statuses],
+            ['created', 'error', 'created', 'duplicate', 'error'],
+        )
+        self.assertEqual(statuses[0]['score'], 2)
+        self.assertEqual(statuses[2]['score'], 0)
+        # Повтор внутри пакета ссылается на запись первого вхождения
+        self.assertEqual(statuses[3]['id'], statuses[0]['id'])
+        self.assertEqual(QuizResult.objects.count(), 2)
+
+    def test_resubmitted_batch_is_all_duplicates(self):
+        batch = {'results': [self.item(), self.item(correct=False)]}
+        first = self.post_json(self.url, batch).data['results']
+        second = self.post_json(self.url, batch).data['results']
+        self.assertEqual([status['status'] for status in second], ['duplicate', 'duplicate'])
+        self.assertEqual([status['id'] for status in second], [status['id'] for status in first])
+        self.assertEqual(QuizResult.objects.count(), 2)
+
+    def test_leaderboard_keeps_best_result_of_batch(self):
+        self.post_json(self.url, {'results': [self.item(correct=False), self.item(), self.item(correct=False)]})
+        entry = LeaderboardEntry.objects.get(quiz=self.quiz, user=self.user)
+        self.assertEqual(entry.best_score, 2)
+
+    def test_invalid_batches(self):
+        for body in ({}, {'results': []}, {'results': 'все'}, {'results': [self.item()] * (BATCH_MAX_SIZE + 1)}):
+            with self.subTest(size=len(body.get('results') or ())):
+                self.assertEqual(self.post_json(self.url, body).status_code, 400)
+        self.assertFalse(QuizResult.objects.exists())
+
+
+class ConcurrentBatchTests(QuizTestCase):
+    """
+    Конфликт уникального ключа попытки при вставке пакета: параллельный
+    запрос сохранил ту же попытку между проверкой и INSERT.
+    """
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=1)
+        self.saved = {'quiz_id': self.quiz.id, 'user_answers': [], 'attempt_id': str(uuid.uuid4())}
+        self.saved_id = store_batch(self.user, [self.saved])[0]['id']
+        self.new = {'quiz_id': self.quiz.id, 'user_answers': [], 'attempt_id': str(uuid.uuid4())}
+
+    def test_first_conflict_retries_items_one_by_one(self):
+        insert_batch = results._insert_batch
+        calls = []
+
+        def conflict_once(items):
+            calls.append(len(items))
+            if len(calls) == 1:
+                raise IntegrityError('UNIQUE constraint failed')
+            return insert_batch(items)
+
+        with mock.patch('quiz.results._insert_batch', side_effect=conflict_once):
+            statuses = store_batch(self.user, [self.saved, self.new])
+        self.assertEqual(calls, [2, 1, 1])
+        self.assertEqual([status['status'] for status in statuses], ['duplicate', 'created'])
+        self.assertEqual(statuses[0]['id'], self.saved_id)
+
+    def test_repeated_conflict_is_reported_as_duplicate(self):
+        with mock.patch('quiz.results._insert_batch', side_effect=IntegrityError('UNIQUE constraint failed')):
+            statuses = store_batch(self.user, [self.saved, self.new])
+        self.assertEqual(statuses[0]['status'], 'duplicate')
+        self.assertEqual(statuses[0]['id'], self.saved_id)
+        # Записи с таким ключом нет: конфликт не с попыткой, сохранить не удалось
+        self.assertEqual(statuses[1]['status'], 'error')
+        self.assertEqual(QuizResult.objects.count(), 1)
@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.db import transaction
+
+from quiz import publishing, search
+from quiz.deferred import on_commit_batch
+
+from .base import QuizTestCase, create_quiz
+
+
+class OnCommitBatchTests(QuizTestCase):
+    def test_ids_of_transaction_are_passed_once(self):
+        calls = []
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for quiz_id in (2, 1, 2, 1):
+                on_commit_batch(calls.append, quiz_id)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(calls, [[1, 2]])
+
+    def test_new_batch_after_rolled_back_savepoint(self):
+        calls = []
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    on_commit_batch(calls.append, 1)
+                    raise ValueError
+            except ValueError:
+                pass
+            # on_commit пакета выброшен вместе с точкой сохранения:
+            # id из неё не передаются, следующий вызов начинает новый пакет
+            on_commit_batch(calls.append, 2)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(calls, [[2]])
+
+    def test_quiz_with_questions_is_indexed_once(self):
+        with mock.patch.object(search, 'index_quizzes') as index_quizzes:
+            with self.captureOnCommitCallbacks(execute=True):
+                quiz = create_quiz(self.author, questions=10)
+        index_quizzes.assert_called_once_with([quiz.id])
+
+    def test_quiz_with_questions_is_published_once(self):
+        with mock.patch.object(publishing, 'PUBLISH_ON_SAVE', True), \
+                mock.patch.object(publishing, 'publish_quiz') as publish_quiz:
+            with self.captureOnCommitCallbacks(execute=True):
+                quiz = create_quiz(self.author, questions=10)
+        publish_quiz.assert_called_once_with(quiz.id)
@@ -0,0 +1,81 @@
+from quiz.grading import get_answer_key, grade
+from quiz.models import QuizResult
+
+from .base import QuizTestCase, answers_for, create_quiz
+
+
+class GradeTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=3)
+        self.key = get_answer_key(self.quiz.id)
+
+    def test_all_correct(self):
+        result = grade(self.key, answers_for(self.quiz))
+        self.assertEqual((result.score, result.max_score, result.unresolved), (3, 3, 0))
+
+    def test_wrong_and_missing_answers(self):
+        answers = answers_for(self.quiz, correct=False)[:2]
+        result = grade(self.key, answers)
+        self.assertEqual((result.score, result.max_score), (0, 3))
+
+    def test_text_format_and_dict_payload(self):
+        question = self.quiz.questions.order_by('position').first()
+        answers = {'0': {'question_text': question.text, 'user_answer': 'Вариант 1'}}
+        result = grade(self.key, answers)
+        self.assertEqual(result.score, 1)
+        self.assertEqual(result.selections, {question.id: frozenset([question.answers.get(is_correct=True).id])})
+
+    def test_answer_of_another_question_is_ignored(self):
+        first, second = self.quiz.questions.order_by('position')[:2]
+        foreign = second.answers.get(is_correct=True).id
+        result = grade(self.key, [{'question_id': first.id, 'answer_id': foreign}])
+        self.assertEqual(result.score, 0)
+        self.assertEqual(result.selections, {first.id: frozenset()})
+
+    def test_unresolved_entries_are_counted(self):
+        result = grade(self.key, [{'question_id': 10 ** 9, 'answer_id': 1}, 'мусор'])
+        self.assertEqual((result.score, result.unresolved), (0, 2))
+
+
+class SaveQuizResultTests(QuizTestCase):
+    url = '/api/save-quiz-result/'
+
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=3)
+
+    def test_score_is_graded_on_server(self):
+        answers = answers_for(self.quiz)
+        answers[0] = answers_for(self.quiz, correct=False)[0]
+        response = self.post_json(self.url, {
+            'quiz_id': self.quiz.id, 'score': 3, 'max_score': 3, 'user_answers': answers,
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['score'], response.data['max_score']), (2, 3))
+        result = QuizResult.objects.get()
+        self.assertEqual((result.score, result.max_score), (2, 3))
+
+    def test_empty_answers_score_zero(self):
+        response = self.post_json(self.url, {'quiz_id': self.quiz.id, 'user_answers': []})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['score'], 0)
+
+    def test_score_only_payload_is_rejected(self):
+        response = self.post_json(self.url, {'quiz_id': self.quiz.id, 'score': 3, 'max_score': 3})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(QuizResult.objects.exists())
+
+    def test_invalid_payloads(self):
+        for payload in (
+            {'quiz_id': self.quiz.id, 'user_answers': 'ответы'},
+            {'quiz_id': self.quiz.id, 'user_answers': [], 'attempt_id': 'не uuid'},
+            {'user_answers': []},
+        ):
+            with self.subTest(payload=payload):
+                self.assertEqual(self.post_json(self.url, payload).status_code, 400)
+        self.assertFalse(QuizResult.objects.exists())
+
+    def test_unknown_quiz(self):
+        response = self.post_json(self.url, {'quiz_id': self.quiz.id + 1, 'user_answers': []})
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,62 @@
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from quiz.models import LeaderboardScoreBucket, QuestionStatistic, QuizResult
+
+from .base import QuizTestCase, answers_for, create_quiz
+
+
+class AttemptIdempotencyTests(QuizTestCase):
+    url = '/api/save-quiz-result/'
+
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=2)
+        self.attempt_id = str(uuid.uuid4())
+        self.payload = {'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz), 'attempt_id': self.attempt_id}
+
+    def assert_saved_once(self):
+        self.assertEqual(QuizResult.objects.filter(attempt_id=self.attempt_id).count(), 1)
+        # Статистика и таблица лидеров учитывают попытку один раз
+        self.assertEqual(
+            sorted(QuestionStatistic.objects.filter(quiz=self.quiz).values_list('attempts', flat=True)), [1, 1]
+        )
+        self.assertEqual(LeaderboardScoreBucket.objects.get(quiz=self.quiz, score=2).users, 1)
+
+    def test_repeated_attempt_returns_saved_result(self):
+        first = self.post_json(self.url, self.payload)
+        second = self.post_json(self.url, self.payload)
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assert_saved_once()
+
+    def test_repeat_without_on_conflict_support(self):
+        # Путь для баз без INSERT ... ON CONFLICT ... RETURNING: вставка в точке сохранения
+        with mock.patch.object(connection.features, 'can_return_columns_from_insert', False):
+            first = self.post_json(self.url, self.payload)
+            second = self.post_json(self.url, self.payload)
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assert_saved_once()
+
+    def test_attempt_id_of_another_quiz_is_conflict(self):
+        other = create_quiz(self.author, questions=1)
+        self.assertEqual(self.post_json(self.url, self.payload).status_code, 201)
+        response = self.post_json(self.url, {'quiz_id': other.id, 'user_answers': [], 'attempt_id': self.attempt_id})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(QuizResult.objects.count(), 1)
+
+    def test_attempt_id_is_scoped_to_user(self):
+        self.assertEqual(self.post_json(self.url, self.payload).status_code, 201)
+        self.client.force_login(User.objects.create_user('classmate', password='password'))
+        self.assertEqual(self.post_json(self.url, self.payload).status_code, 201)
+        self.assertEqual(QuizResult.objects.filter(attempt_id=self.attempt_id).count(), 2)
+
+    def test_results_without_attempt_id_are_not_deduplicated(self):
+        del self.payload['attempt_id']
+        self.post_json(self.url, self.payload)
+        self.post_json(self.url, self.payload)
+        self.assertEqual(QuizResult.objects.count(), 2)
@@ -0,0 +1,43 @@
+from quiz import leaderboard
+from quiz.models import LeaderboardState
+
+from .base import QuizTestCase, answers_for, create_quiz
+
+
+class LeaderboardVersionTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=2)
+
+    def save(self, correct=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_json('/api/save-quiz-result/', {
+                'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz, correct=correct),
+            })
+        self.assertEqual(response.status_code, 201)
+
+    def test_version_is_bumped_after_commit(self):
+        self.assertEqual(leaderboard.current_version(self.quiz.id), 0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post_json('/api/save-quiz-result/', {
+                'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz, correct=False),
+            })
+            # До фиксации версия не меняется и строка версии не блокируется
+            self.assertFalse(LeaderboardState.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(leaderboard.current_version(self.quiz.id), 1)
+
+    def test_only_improvement_bumps_version(self):
+        self.save(correct=False)
+        self.save()
+        self.assertEqual(leaderboard.current_version(self.quiz.id), 2)
+        self.save()
+        self.assertEqual(leaderboard.current_version(self.quiz.id), 2)
+
+    def test_improvement_replaces_cached_top(self):
+        self.save(correct=False)
+        self.assertEqual(leaderboard.get_top(self.quiz.id, 10)[0]['score'], 0)
+        self.save()
+        self.assertEqual(leaderboard.get_top(self.quiz.id, 10)[0]['score'], 2)
+
@@ -0,0 +1,122 @@
+from importlib import import_module
+from unittest import mock
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from quiz import snapshots
+
+
+class MigrationTestCase(TransactionTestCase):
+    """
+    Данные создаются историческими моделями состояния migrate_from, затем
+    база мигрируется до migrate_to. После теста схема возвращается к
+    последней миграции.
+    """
+    migrate_from = None
+    migrate_to = None
+
+    def setUp(self):
+        snapshots._questions_by_id.clear()
+        self.latest = MigrationExecutor(connection).loader.graph.leaf_nodes('quiz')
+        self.apps = self.migrate(self.migrate_from)
+
+    def tearDown(self):
+        self.migrate_latest()
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('quiz', target)])
+        return executor.loader.project_state([('quiz', target)]).apps
+
+    def migrate_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.latest)
+
+    def create_quiz(self, questions, title='Тест'):
+        """
+        Тест историческими моделями; правильный вариант в каждом вопросе - первый.
+        """
+        User = self.apps.get_model('auth', 'User')
+        Quiz = self.apps.get_model('quiz', 'Quiz')
+        Question = self.apps.get_model('quiz', 'Question')
+        Answer = self.apps.get_model('quiz', 'Answer')
+        author, _ = User.objects.get_or_create(username='author')
+        quiz = Quiz.objects.create(title=title, author=author)
+        created = []
+        for n in range(questions):
+            question = Question.objects.create(quiz=quiz, text=f'Вопрос {n + 1}')
+            Answer.objects.bulk_create([
+                Answer(question=question, text=f'Вариант {k + 1}', is_correct=k == 0) for k in range(3)
+            ])
+            created.append(question)
+        return quiz, created
+
+
+class CompactUserAnswersMigrationTests(MigrationTestCase):
+    migrate_from = '0012_quizresult_attempt_id'
+    migrate_to = '0013_compact_user_answers'
+
+    def test_forward_and_backward(self):
+        quiz, questions = self.create_quiz(2)
+        right = questions[0].answers.get(is_correct=True)
+        wrong = questions[1].answers.filter(is_correct=False).order_by('id').first()
+        verbose = [
+            {'question_id': questions[0].id, 'answer_id': right.id, 'question_text': 'Вопрос 1',
+             'user_answer': 'Вариант 1', 'correct_answer': 'Вариант 1', 'is_correct': True},
+            {'question_text': 'Вопрос 2', 'user_answer': wrong.text},
+            {'question_text': 'Удалённый вопрос', 'user_answer': 'да'},
+        ]
+        QuizResult = self.apps.get_model('quiz', 'QuizResult')
+        result = QuizResult.objects.create(
+            quiz=quiz, user=quiz.author, score=1, max_score=2, user_answers=verbose,
+        )
+        empty = QuizResult.objects.create(quiz=quiz, user=quiz.author, score=0, max_score=2, user_answers=None)
+
+        apps = self.migrate(self.migrate_to)
+        QuizResult = apps.get_model('quiz', 'QuizResult')
+        self.assertEqual(QuizResult.objects.get(pk=result.pk).user_answers, [
+            [questions[0].id, [right.id], 1],
+            [questions[1].id, [wrong.id], 0],
+            verbose[2],
+        ])
+        self.assertIsNone(QuizResult.objects.get(pk=empty.pk).user_answers)
+
+        # Повторный запуск не меняет уже сжатые записи
+        import_module(f'quiz.migrations.{self.migrate_to}').compact_user_answers(apps, None)
+        self.assertEqual(QuizResult.objects.get(pk=result.pk).user_answers[0], [questions[0].id, [right.id], 1])
+
+        apps = self.migrate(self.migrate_from)
+        restored = apps.get_model('quiz', 'QuizResult').objects.get(pk=result.pk).user_answers
+        self.assertEqual(restored[0], verbose[0])
+        self.assertEqual(
+            (restored[1]['question_id'], restored[1]['user_answer'], restored[1]['is_correct']),
+            (questions[1].id, wrong.text, False),
+        )
+        self.assertEqual(restored[2], verbose[2])
+
+
+class QuestionPositionMigrationTests(MigrationTestCase):
+    migrate_from = '0015_quiz_attempts'
+    migrate_to = '0016_question_position'
+
+    def test_positions_follow_question_ids(self):
+        first, first_questions = self.create_quiz(3)
+        second, second_questions = self.create_quiz(2, title='Второй')
+        # Вопросы тестов вперемешку по id
+        Question = self.apps.get_model('quiz', 'Question')
+        first_questions.append(Question.objects.create(quiz=first, text='Вопрос 4'))
+        first_questions[1].delete()
+
+        # Порции по два вопроса: границы порций проходят и внутри теста, и между тестами
+        with mock.patch.object(import_module(f'quiz.migrations.{self.migrate_to}'), 'CHUNK_SIZE', 2):
+            apps = self.migrate(self.migrate_to)
+        Question = apps.get_model('quiz', 'Question')
+        for quiz, questions in ((first, first_questions[:1] + first_questions[2:]), (second, second_questions)):
+            self.assertEqual(
+                list(Question.objects.filter(quiz_id=quiz.id).order_by('position').values_list('id', 'position')),
+                [(question.id, position) for position, question in enumerate(questions)],
+            )
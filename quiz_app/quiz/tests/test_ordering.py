@@ -0,0 +1,81 @@
+from django.db import IntegrityError, transaction
+
+from quiz.models import Question, Quiz
+from quiz.ordering import reorder_questions
+from quiz.snapshots import get_quiz_snapshot
+
+from .base import QuizTestCase, create_quiz
+
+
+class QuestionPositionTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=3)
+
+    def positions(self):
+        return list(self.quiz.questions.order_by('id').values_list('position', flat=True))
+
+    def test_new_questions_go_to_the_end(self):
+        self.assertEqual(self.positions(), [0, 1, 2])
+        self.quiz.questions.get(position=1).delete()
+        question = Question.objects.create(quiz=self.quiz, text='Новый')
+        # Пропуск после удаления остаётся, новый вопрос встаёт после последнего
+        self.assertEqual(question.position, 3)
+        self.assertEqual(self.positions(), [0, 2, 3])
+
+    def test_positions_are_per_quiz(self):
+        other = create_quiz(self.author, questions=1)
+        self.assertEqual(other.questions.get().position, 0)
+
+    def test_position_is_unique_in_quiz(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Question.objects.create(quiz=self.quiz, text='Дубликат', position=0)
+
+    def test_reorder_renumbers_and_bumps_version(self):
+        ids = list(self.quiz.questions.order_by('position').values_list('id', flat=True))
+        version = Quiz.objects.get(pk=self.quiz.pk).version
+        reorder_questions(self.quiz.id, [ids[2], ids[0], ids[1]])
+        self.assertEqual(
+            list(self.quiz.questions.order_by('position').values_list('id', 'position')),
+            [(ids[2], 0), (ids[0], 1), (ids[1], 2)],
+        )
+        self.assertEqual(Quiz.objects.get(pk=self.quiz.pk).version, version + 1)
+        snapshot = get_quiz_snapshot(self.quiz.id)
+        self.assertEqual([question.id for question in snapshot.questions], [ids[2], ids[0], ids[1]])
+
+    def test_reorder_with_gaps_and_swaps(self):
+        # Номера с пропусками: [0, 2, 3, 4]; обмен номерами не должен нарушить уникальность
+        self.quiz.questions.get(position=1).delete()
+        Question.objects.create(quiz=self.quiz, text='Четвёртый')
+        Question.objects.create(quiz=self.quiz, text='Пятый')
+        ids = list(self.quiz.questions.order_by('position').values_list('id', flat=True))
+        reorder_questions(self.quiz.id, ids[::-1])
+        self.assertEqual(list(self.quiz.questions.order_by('position').values_list('id', flat=True)), ids[::-1])
+        self.assertEqual(sorted(self.quiz.questions.values_list('position', flat=True)), [0, 1, 2, 3])
+
+
+class ReorderQuizQuestionsViewTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=3)
+        self.url = f'/api/quizzes/{self.quiz.id}/questions/order/'
+        self.ids = list(self.quiz.questions.order_by('position').values_list('id', flat=True))
+        self.client.force_login(self.author)
+
+    def put(self, data):
+        return self.client.put(self.url, data, content_type='application/json')
+
+    def test_author_reorders(self):
+        response = self.put({'question_ids': self.ids[::-1]})
+        self.assertEqual(response.status_code, 200)
+        play = self.client.get(f'/api/quizzes/{self.quiz.id}/play/').data
+        self.assertEqual([question['id'] for question in play['questions']], self.ids[::-1])
+
+    def test_invalid_orders(self):
+        for question_ids in (self.ids[:2], self.ids + self.ids[:1], [self.ids[0]] * 3, 'все', [True, 1, 2]):
+            with self.subTest(question_ids=question_ids):
+                self.assertEqual(self.put({'question_ids': question_ids}).status_code, 400)
+
+    def test_only_author_reorders(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.put({'question_ids': self.ids[::-1]}).status_code, 404)
@@ -0,0 +1,64 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from quiz import leaderboard
+from quiz.models import LeaderboardEntry, LeaderboardScoreBucket, QuestionStatistic, QuizResult
+
+from .base import QuizTestCase, answers_for, create_quiz
+
+
+class RegradeResultsTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        self.quiz = create_quiz(self.author, questions=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post_json('/api/save-quiz-result/', {
+                'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz),
+            })
+        self.assertEqual(response.status_code, 201)
+
+    def regrade(self, *args):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('regrade_results', self.quiz.id, *args, stdout=out)
+        return out.getvalue()
+
+    def change_correct_answer(self):
+        # Правильным становится второй вариант первого вопроса: сохранённый
+        # ответ на этот вопрос больше не засчитывается
+        first, second = self.quiz.questions.order_by('position').first().answers.order_by('id')[:2]
+        first.is_correct, second.is_correct = False, True
+        first.save()
+        second.save()
+
+    def test_regrade_rebuilds_leaderboard_and_statistics(self):
+        self.assertEqual(leaderboard.get_top(self.quiz.id, 10)[0]['score'], 2)
+        version = leaderboard.current_version(self.quiz.id)
+        self.change_correct_answer()
+
+        self.regrade()
+
+        result = QuizResult.objects.get()
+        self.assertEqual((result.score, result.max_score), (1, 2))
+        self.assertEqual(LeaderboardEntry.objects.get(quiz=self.quiz).best_score, 1)
+        self.assertEqual(
+            list(LeaderboardScoreBucket.objects.filter(quiz=self.quiz).values_list('score', 'users')),
+            [(1, 1)],
+        )
+        self.assertGreater(leaderboard.current_version(self.quiz.id), version)
+        self.assertEqual(leaderboard.get_top(self.quiz.id, 10)[0]['score'], 1)
+        self.assertEqual(
+            sorted(QuestionStatistic.objects.filter(quiz=self.quiz).values_list('attempts', 'correct_count')),
+            [(1, 0), (1, 1)],
+        )
+
+    def test_dry_run_changes_nothing(self):
+        version = leaderboard.current_version(self.quiz.id)
+        self.change_correct_answer()
+
+        self.regrade('--dry-run')
+
+        self.assertEqual(QuizResult.objects.get().score, 2)
+        self.assertEqual(LeaderboardEntry.objects.get(quiz=self.quiz).best_score, 2)
+        self.assertEqual(leaderboard.current_version(self.quiz.id), version)
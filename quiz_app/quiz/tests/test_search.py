@@ -0,0 +1,24 @@
+from django.db import connection
+
+from quiz import search
+from quiz.models import Question, Quiz
+
+from .base import QuizTestCase
+
+
+class SearchRankingTests(QuizTestCase):
+    def create(self, title, question):
+        quiz = Quiz.objects.create(title=title, author=self.author)
+        Question.objects.create(quiz=quiz, text=question)
+        return quiz
+
+    def test_all_matches_are_ranked(self):
+        if connection.vendor not in search.SEARCHERS:
+            self.skipTest("Ранжирование есть только у полнотекстового индекса")
+        with self.captureOnCommitCallbacks(execute=True):
+            in_questions = [self.create(f'Тест {n}', 'Вопрос про интегралы') for n in range(30)]
+            # Совпадение в названии весит больше, хотя тест найден последним
+            in_title = self.create('Интегралы', 'Вопрос без совпадений')
+        found = search.search('интеграл', limit=5)
+        self.assertEqual(found[0], in_title.id)
+        self.assertEqual(found[1:], [quiz.id for quiz in in_questions[:4]])
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import time
+import uuid
+from unittest import mock
+
+from quiz import spool
+from quiz.models import QuizResult
+from quiz.spool import ResultSpool, enqueue, flush, wait_for_user
+
+from .base import QuizTestCase, answers_for, create_quiz
+
+
+class ResultSpoolTests(QuizTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'spool.sqlite3')
+        self.spool = ResultSpool(self.path)
+        # Очередь во временном файле, фоновый поток сброса не запускается
+        for patcher in (mock.patch.object(spool, 'spool', self.spool), mock.patch.object(spool, '_flusher')):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.quiz = create_quiz(self.author, questions=2)
+
+    def enqueue(self, **fields):
+        return enqueue(self.user, {'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz), **fields})
+
+    def test_enqueue_grades_and_flush_stores(self):
+        ack = self.enqueue()
+        self.assertEqual((ack['status'], ack['score'], ack['max_score']), ('queued', 2, 2))
+        self.assertFalse(QuizResult.objects.exists())
+
+        self.assertEqual(flush(), 1)
+        result = QuizResult.objects.get()
+        self.assertEqual(str(result.attempt_id), ack['attempt_id'])
+        self.assertEqual((result.score, result.max_score), (2, 2))
+        self.assertEqual(self.spool.size(), 0)
+
+    def test_enqueue_rejects_invalid_results(self):
+        with self.assertRaises(ValueError):
+            enqueue(self.user, {'quiz_id': self.quiz.id, 'score': 2, 'max_score': 2})
+        with self.assertRaises(ValueError):
+            enqueue(self.user, {'quiz_id': self.quiz.id + 1, 'user_answers': []})
+        self.assertEqual(self.spool.size(), 0)
+
+    def test_replay_after_expired_lease_does_not_duplicate(self):
+        attempt_id = self.enqueue()['attempt_id']
+        # Процесс забрал пачку, сохранил её и упал до удаления из очереди
+        token, rows = self.spool.claim(10)
+        self.assertEqual(len(rows), 1)
+        flush_rows = ResultSpool(self.path, lease=0)
+        with mock.patch.object(spool, 'spool', flush_rows):
+            self.assertEqual(flush(), 1)
+            # Повторная постановка той же попытки тоже не создаёт дубликат
+            self.enqueue(attempt_id=attempt_id)
+            self.assertEqual(flush(), 1)
+        self.assertEqual(QuizResult.objects.filter(attempt_id=attempt_id).count(), 1)
+        self.assertEqual(self.spool.size(), 0)
+
+    def test_database_error_returns_batch_to_queue(self):
+        self.enqueue()
+        with mock.patch.object(spool, 'store_entries', side_effect=RuntimeError('база недоступна')):
+            with self.assertRaises(RuntimeError):
+                flush()
+        self.assertEqual(flush(), 1)
+        self.assertEqual(QuizResult.objects.count(), 1)
+
+    def test_wait_for_user_flushes_own_results(self):
+        self.enqueue()
+        self.assertTrue(wait_for_user(self.user.id))
+        self.assertEqual(QuizResult.objects.filter(user=self.user).count(), 1)
+
+    def test_wait_for_user_is_bounded_by_timeout(self):
+        self.enqueue()
+        # Пачку пользователя держит другой процесс
+        self.spool.claim(10, self.user.id)
+        started = time.monotonic()
+        self.assertFalse(wait_for_user(self.user.id, timeout=0.2))
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertFalse(QuizResult.objects.exists())
+
+    def test_write_behind_endpoints(self):
+        with mock.patch('quiz.views.WRITE_BEHIND', True):
+            response = self.post_json('/api/save-quiz-result/', {
+                'quiz_id': self.quiz.id, 'user_answers': answers_for(self.quiz), 'attempt_id': str(uuid.uuid4()),
+            })
+            self.assertEqual(response.status_code, 202)
+            history = self.client.get('/api/quiz-results/')
+        self.assertEqual(history.status_code, 200)
+        self.assertEqual([result['score'] for result in history.data['results']], [2])
@@ -1,21 +1,46 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.QUIZ_ASYNC_VIEWS:
+    # Асинхронные варианты нагруженных эндпоинтов для запуска под ASGI (uvicorn)
+    from . import async_views
+    check_auth_view = async_views.check_auth
+    quiz_detail_view = async_views.quiz_detail
+    get_question_view = async_views.get_question
+    save_quiz_result_view = async_views.save_quiz_result
+else:
+    check_auth_view = views.check_auth
+    quiz_detail_view = views.QuizDetail.as_view()
+    get_question_view = views.get_question
+    save_quiz_result_view = views.SaveQuizResult.as_view()
+
 urlpatterns = [
     path('quizzes/', views.QuizListCreate.as_view(), name='quiz-list-create'),
+    path('quizzes/search/', views.search_quizzes, name='quiz-search'),  # Полнотекстовый поиск по названию и вопросам
     path('quizzes/<int:pk>/', views.QuizRetrieveUpdateDestroy.as_view(), name='quiz-retrieve-update-destroy'),
     path('accounts/google/login/callback/', views.google_login_callback, name='google_login_callback'), #Убедитесь, что этот путь существует
-    path('auth/check/', views.check_auth, name='check-auth'), # Новый маршрут для проверки аутентификации
+    path('auth/check/', check_auth_view, name='check-auth'), # Новый маршрут для проверки аутентификации
     path('auth/logout/', views.logout_view, name='logout'), # Маршрут для выхода из системы
     path('get-csrf-token/', views.get_csrf_token, name='get-csrf-token'),  # Новый маршрут для CSRF-токена
-    path('quizzes/<int:pk>/details/', views.QuizDetail.as_view(), name='quiz-detail'),
-    path('quizzes/<int:quiz_id>/questions/<int:question_index>/', views.get_question, name='quiz-question'),
+    path('quizzes/<int:pk>/details/', quiz_detail_view, name='quiz-detail'),
+    path('quizzes/<int:quiz_id>/questions/<int:question_index>/', get_question_view, name='quiz-question'),
+    path('quizzes/<int:quiz_id>/questions/order/', views.reorder_quiz_questions, name='quiz-questions-order'),  # Порядок вопросов (только автор)
+    path('quizzes/<int:quiz_id>/play/', views.get_quiz_play, name='quiz-play'),  # Все вопросы квиза одним запросом
+    path('quizzes/<int:quiz_id>/attempts/', views.start_quiz_attempt, name='quiz-attempt-start'),  # Попытка со случайной выборкой вопросов
+    path('attempts/<uuid:attempt_id>/', views.get_attempt_play, name='attempt-play'),  # Все вопросы попытки одним запросом
+    path('attempts/<uuid:attempt_id>/questions/<int:question_index>/', views.get_attempt_question, name='attempt-question'),
+    path('quizzes/<int:quiz_id>/statistics/', views.get_quiz_statistics, name='quiz-statistics'),  # Статистика ответов по вопросам
+    path('quizzes/<int:quiz_id>/leaderboard/', views.get_quiz_leaderboard, name='quiz-leaderboard'),  # Топ и место пользователя
     path('quiz-results/', views.UserQuizResults.as_view(), name='user-quiz-results'),
     path('quiz-results/<int:pk>/', views.QuizResultDetail.as_view(), name='quiz-result-detail'),
-    path('save-quiz-result/', views.SaveQuizResult.as_view(), name='save-quiz-result'),
+    path('save-quiz-result/', save_quiz_result_view, name='save-quiz-result'),
+    path('save-quiz-result/batch/', views.SaveQuizResultsBatch.as_view(), name='save-quiz-result-batch'),  # Пакет результатов одним запросом
     
     # URL для администраторов
     path('admin/users/', views.UsersList.as_view(), name='admin-users-list'),
     path('admin/quiz-results/', views.AdminUserQuizResults.as_view(), name='admin-quiz-results'),
+    path('admin/quiz-results/export/', views.export_quiz_results, name='admin-quiz-results-export'),
     path('admin/quiz-results/<int:pk>/', views.AdminQuizResultDetail.as_view(), name='admin-quiz-result-detail'),
+    path('metrics/', views.metrics_view, name='metrics'),  # Метрики производительности (Prometheus)
 ]
\ No newline at end of file
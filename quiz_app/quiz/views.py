@@ -1,21 +1,33 @@
 from rest_framework import generics, permissions, status
 from .models import Quiz, Question, Answer, QuizResult
 from .serializers import QuizSerializer, QuizDetailSerializer, QuestionSerializer, AnswerSerializer, QuizResultSerializer, QuizCreateSerializer
+from .pagination import QuizCursorPagination, QuizResultCursorPagination
+from . import auth_status, leaderboard, search
+from .metrics import registry as metrics_registry
+from .export import CONTENT_TYPES as EXPORT_CONTENT_TYPES, filter_results, iter_export
+from .answer_stats import quiz_statistics_data
+from .ordering import reorder_questions
+from .attempts import attempt_data, get_attempt, start_attempt, unpack_ids
+from .results import BATCH_MAX_SIZE, AttemptConflict, QuizNotFound, save_result, store_batch
+from .spool import WRITE_BEHIND, enqueue, wait_for_user
+from .snapshots import get_quiz_snapshot, get_snapshot_question, question_data, quiz_detail_data, quiz_play_data
+from .conditional import not_modified, quiz_list_validators, quiz_state, quiz_validators, set_validators
 from django.contrib.auth.models import User
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.shortcuts import redirect, get_object_or_404
-from django.http import HttpResponse, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from django.db.models import Q
 from django.contrib.auth import logout
-import copy
 import os
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.utils.decorators import method_decorator
+from django.conf import settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -51,15 +63,15 @@ def google_login_callback(request):
     is_production = 'RENDER' in os.environ
     
     # Проверяем, что пользователь получен и авторизован
-    print(f"User authenticated: {request.user.is_authenticated}")
-    print(f"User: {request.user.username} / {request.user.email}")
+    logger.debug("[google_login_callback] authenticated=%s user=%s email=%s",
+                 request.user.is_authenticated, request.user.username, request.user.email)
     
     # Создаем сессию для пользователя, если еще не создана
     if not request.session.session_key:
         request.session.save()
-        print(f"Created new session: {request.session.session_key}")
+        logger.debug("[google_login_callback] new session=%s", request.session.session_key)
     else:
-        print(f"Existing session: {request.session.session_key}")
+        logger.debug("[google_login_callback] existing session=%s", request.session.session_key)
 
     # Выбираем URL в зависимости от окружения
     if is_production:
@@ -87,77 +99,71 @@ def google_login_callback(request):
     response["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-CSRFToken"
     
     # Вывод cookies, которые будут установлены
-    print(f"Response cookies: {response.cookies}")
+    logger.debug("[google_login_callback] response cookies=%s", response.cookies)
     
     return response
 
 # Новый API-эндпоинт для проверки аутентификации
+# (повторные проверки отвечают по подписанному статусу, см. quiz/auth_status.py)
+@auth_status.fast_path
 @api_view(['GET'])
 def check_auth(request):
     """
     API-эндпоинт для проверки аутентификации пользователя.
     """
-    logger.info(f"[check_auth] User authenticated: {request.user.is_authenticated}")
-    logger.info(f"[check_auth] Session key: {request.session.session_key}")
-    logger.info(f"[check_auth] Cookies: {request.COOKIES}")
-    
-    # Добавляем заголовки запроса для отладки
-    for key, value in request.META.items():
-        if key.startswith('HTTP_'):
-            logger.debug(f"[check_auth] Header {key}: {value}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[check_auth] authenticated=%s session=%s cookies=%s",
+                     request.user.is_authenticated, request.session.session_key, request.COOKIES)
+        # Добавляем заголовки запроса для отладки
+        for key, value in request.META.items():
+            if key.startswith('HTTP_'):
+                logger.debug("[check_auth] Header %s: %s", key, value)
     
     # Проверка наличия сессии
     if not request.session.session_key:
         # Создаем сессию, если её нет
         request.session.save()
-        logger.info(f"[check_auth] Created new session: {request.session.session_key}")
+        logger.debug("[check_auth] Created new session: %s", request.session.session_key)
     
-    if request.user.is_authenticated:
-        # Если у нас есть аутентифицированный пользователь, но нет cookie
-        # установим cookie, чтобы frontend мог проверить статус аутентификации
-        response = JsonResponse({
-            'authenticated': True,
-            'username': request.user.username,
-            'email': request.user.email,
-            'sessionid': request.session.session_key,
-            'is_staff': request.user.is_staff,
-            'is_superuser': request.user.is_superuser
-        })
-        
-        # Устанавливаем cookie для JS доступа
-        response.set_cookie(
-            'is_authenticated', 'true', 
-            httponly=False, 
-            secure=True, 
-            samesite='None',
-            max_age=2592000  # 30 дней
-        )
-        
-        # Добавляем CORS заголовки
-        response["Access-Control-Allow-Origin"] = "https://dimenicetry.github.io"
-        response["Access-Control-Allow-Credentials"] = "true"
-        
-        return response
-    else:
-        return JsonResponse({
-            'authenticated': False,
-            'session_exists': bool(request.session.session_key)
-        })
+    return auth_status_response(request, request.user)
+
+def auth_status_response(request, user):
+    """
+    Ответ check_auth для уже загруженного пользователя и сессии.
+    Используется и асинхронным вариантом (quiz/async_views.py).
+    """
+    data = auth_status.status_data(request, user)
+    response = auth_status.status_response(data, request.session.session_key)
+    auth_status.issue(response, request, data)
+    return response
+
+class ConditionalQuizListMixin:
+    """
+    Условные запросы для списков тестов: 304 решается одним запросом по
+    индексу updated_at, до пагинации и сериализации.
+    """
+    def list(self, request, *args, **kwargs):
+        validators = quiz_list_validators(self.get_queryset(), request)
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), validators)
 
 @method_decorator(csrf_exempt, name='dispatch')
-class QuizListCreate(generics.ListCreateAPIView):
+class QuizListCreate(ConditionalQuizListMixin, generics.ListCreateAPIView):
     """
     API endpoint для просмотра списка квизов и создания нового квиза.
     Доступно только авторизованным пользователям.
     Автор квиза устанавливается автоматически как текущий пользователь.
     """
     permission_classes = [permissions.IsAuthenticated]  # Требуется аутентификация
+    pagination_class = QuizCursorPagination
 
     def get_queryset(self):
         """
         Возвращает все доступные тесты для пользователя.
         """
-        return Quiz.objects.all()
+        return Quiz.objects.select_related('author')
         
     def get_serializer_class(self):
         """
@@ -172,10 +178,10 @@ class QuizListCreate(generics.ListCreateAPIView):
         Переопределяем метод create для добавления дополнительного логирования
         и обработки ошибок аутентификации
         """
-        logger.info(f"[QuizListCreate] Пользователь: {request.user}, авторизован: {request.user.is_authenticated}")
-        logger.info(f"[QuizListCreate] Метод: {request.method}")
-        logger.info(f"[QuizListCreate] Данные: {request.data}")
-        logger.info(f"[QuizListCreate] Заголовки: {request.headers}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[QuizListCreate] user=%s authenticated=%s method=%s",
+                         request.user, request.user.is_authenticated, request.method)
+            logger.debug("[QuizListCreate] data=%s headers=%s", request.data, request.headers)
         
         # Проверяем аутентификацию
         if not request.user.is_authenticated:
@@ -187,7 +193,7 @@ class QuizListCreate(generics.ListCreateAPIView):
         
         # Проверка CSRF токена
         csrf_token = request.META.get("HTTP_X_CSRFTOKEN")
-        logger.info(f"[QuizListCreate] CSRF токен в запросе: {csrf_token}")
+        logger.debug("[QuizListCreate] CSRF токен в запросе: %s", csrf_token)
         
         # Продолжаем стандартную обработку
         serializer = self.get_serializer(data=request.data)
@@ -204,7 +210,7 @@ class QuizListCreate(generics.ListCreateAPIView):
         """
         Автоматически устанавливаем автора теста как текущего пользователя.
         """
-        logger.info(f"[QuizListCreate.perform_create] Сохраняем квиз с автором: {self.request.user}")
+        logger.info("[QuizListCreate.perform_create] Сохраняем квиз с автором: %s", self.request.user)
         serializer.save(author=self.request.user)
 
 
@@ -218,44 +224,69 @@ class QuizRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
        user = self.request.user
-       return Quiz.objects.filter(author=user) # Только свои тесты
+       return Quiz.objects.filter(author=user).select_related('author') # Только свои тесты
 
-class TestListView(generics.ListAPIView):
-    queryset = Quiz.objects.all()
+class TestListView(ConditionalQuizListMixin, generics.ListAPIView):
+    queryset = Quiz.objects.select_related('author')
     serializer_class = QuizSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = QuizCursorPagination
 
 class QuizDetail(generics.RetrieveAPIView):
     """
     API endpoint для получения детальной информации о квизе с вопросами и ответами.
+    Данные берутся из скомпилированного снимка квиза (см. quiz/snapshots.py).
+    Поддерживает условные запросы (If-None-Match / If-Modified-Since).
     """
     serializer_class = QuizDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
     queryset = Quiz.objects.all()
 
+    def retrieve(self, request, *args, **kwargs):
+        state = quiz_state(kwargs['pk'])
+        if state is None:
+            raise Http404
+        validators = quiz_validators(kwargs['pk'], state, 'detail')
+        response = not_modified(request, validators)
+        if response is not None:
+            return response
+
+        snapshot = get_quiz_snapshot(kwargs['pk'], state.version)
+        if snapshot is None:
+            raise Http404
+        return set_validators(Response(quiz_detail_data(snapshot)), validators)
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_question(request, quiz_id, question_index):
     """
     Получить конкретный вопрос квиза по его индексу.
+    Данные берутся из скомпилированного снимка квиза (см. quiz/snapshots.py).
+    Поддерживает условные запросы (If-None-Match / If-Modified-Since).
     """
-    quiz = get_object_or_404(Quiz, pk=quiz_id)
-    questions = quiz.questions.all()
+    state = quiz_state(quiz_id)
+    if state is None:
+        raise Http404
+    validators = quiz_validators(quiz_id, state, 'question', question_index)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    snapshot = get_quiz_snapshot(quiz_id, state.version)
+    if snapshot is None:
+        raise Http404
+    questions = snapshot.questions
     
     # Проверяем, что индекс находится в пределах допустимого диапазона
-    if question_index < 0 or question_index >= questions.count():
+    if question_index < 0 or question_index >= len(questions):
         return Response({"error": "Индекс вопроса вне допустимого диапазона"}, status=400)
     
-    question = questions[question_index]
-    serializer = QuestionSerializer(question)
-    
-    # Создаем копию данных, чтобы не модифицировать оригинальный сериализатор
-    data = copy.deepcopy(serializer.data)
+    data = question_data(questions[question_index])
 
     # Отладочный вывод
-    print("Оригинальные данные вопроса с ответами:")
-    for i, answer in enumerate(data['answers']):
-        print(f"Ответ {i+1}: {answer['text']} (is_correct: {answer.get('is_correct', 'отсутствует')})")
+    if logger.isEnabledFor(logging.DEBUG):
+        for i, answer in enumerate(data['answers']):
+            logger.debug("[get_question] Ответ %d: %s (is_correct: %s)", i + 1, answer['text'], answer['is_correct'])
     
     # Больше не удаляем информацию о правильности, просто отмечаем, что ответы нужно скрыть
     # Фронтенд сам определит, показывать ли правильность ответа пользователю
@@ -263,15 +294,134 @@ def get_question(request, quiz_id, question_index):
     # Добавляем информацию о текущем индексе и общем количестве вопросов
     result_data = {
         "quiz_id": quiz_id,
-        "quiz_title": quiz.title,
+        "quiz_title": snapshot.title,
         "current_index": question_index,
-        "total_questions": questions.count(),
+        "total_questions": len(questions),
         "question": data,
-        "hide_answers": quiz.hide_answers,
-        "time_limit": quiz.time_limit
+        "hide_answers": snapshot.hide_answers,
+        "time_limit": snapshot.time_limit
     }
     
-    return Response(result_data)
+    return set_validators(Response(result_data), validators)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_quiz_play(request, quiz_id):
+    """
+    Получить все вопросы квиза для прохождения одним запросом.
+    Для больших квизов поддерживаются страницы через query-параметры
+    'offset' и 'limit' (не больше QUIZ_PLAY_MAX_PAGE_SIZE вопросов).
+    Если у квиза включено hide_answers, признаки правильности ответов не передаются.
+    Поддерживает условные запросы (If-None-Match / If-Modified-Since).
+    """
+    state = quiz_state(quiz_id)
+    if state is None:
+        raise Http404
+    validators = quiz_validators(
+        quiz_id, state, 'play', request.query_params.get('offset'), request.query_params.get('limit')
+    )
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+
+    snapshot = get_quiz_snapshot(quiz_id, state.version)
+    if snapshot is None:
+        raise Http404
+    max_page_size = getattr(settings, 'QUIZ_PLAY_MAX_PAGE_SIZE', 500)
+    try:
+        offset = int(request.query_params.get('offset', 0))
+        limit = int(request.query_params.get('limit', max_page_size))
+    except ValueError:
+        return Response({"error": "offset и limit должны быть целыми числами"}, status=400)
+    if offset < 0 or limit < 1:
+        return Response({"error": "offset должен быть >= 0, limit >= 1"}, status=400)
+    limit = min(limit, max_page_size)
+
+    return set_validators(Response(quiz_play_data(snapshot, offset, limit)), validators)
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def reorder_quiz_questions(request, quiz_id):
+    """
+    Задать порядок вопросов квиза. Доступно только автору.
+    Тело запроса: {"question_ids": [...]} - все вопросы квиза в новом порядке.
+    """
+    quiz = get_object_or_404(Quiz, pk=quiz_id, author=request.user)
+    question_ids = request.data.get('question_ids')
+    if not isinstance(question_ids, list) or not all(
+        isinstance(question_id, int) and not isinstance(question_id, bool) for question_id in question_ids
+    ):
+        return Response({"error": "question_ids должен быть списком id вопросов"}, status=400)
+    current = set(Question.objects.filter(quiz=quiz).values_list('id', flat=True))
+    if len(question_ids) != len(current) or set(question_ids) != current:
+        return Response({"error": "Нужно передать каждый вопрос квиза ровно один раз"}, status=400)
+
+    reorder_questions(quiz.id, question_ids)
+    return Response({"quiz_id": quiz.id, "question_ids": question_ids})
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def start_quiz_attempt(request, quiz_id):
+    """
+    Начать попытку теста со случайной выборкой вопросов (sample_size).
+    Возвращает id попытки и её вопросы в формате /play/.
+    """
+    snapshot = get_quiz_snapshot(quiz_id)
+    if snapshot is None:
+        raise Http404
+    if not snapshot.sample_size:
+        return Response({"error": "В тесте нет случайной выборки вопросов"}, status=400)
+    attempt = start_attempt(request.user, snapshot)
+    return Response(attempt_data(snapshot, attempt.id, unpack_ids(attempt.question_ids)), status=201)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_attempt_play(request, attempt_id):
+    """
+    Все вопросы попытки со случайной выборкой одним запросом, в формате
+    /play/. Один запрос к БД по первичному ключу попытки, вопросы берутся
+    из снимка квиза той версии, с которой попытка читается.
+    """
+    attempt = get_attempt(request.user, attempt_id)
+    if attempt is None:
+        raise Http404
+    quiz_id, version, question_ids = attempt
+    snapshot = get_quiz_snapshot(quiz_id, version)
+    if snapshot is None:
+        raise Http404
+    return Response(attempt_data(snapshot, attempt_id, question_ids))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_attempt_question(request, attempt_id, question_index):
+    """
+    Получить вопрос попытки по его номеру в выборке. Один запрос к БД по
+    первичному ключу попытки, сам вопрос берётся из снимка квиза.
+    """
+    attempt = get_attempt(request.user, attempt_id)
+    if attempt is None:
+        raise Http404
+    quiz_id, version, question_ids = attempt
+    snapshot = get_quiz_snapshot(quiz_id, version)
+    if snapshot is None:
+        raise Http404
+    if question_index < 0 or question_index >= len(question_ids):
+        return Response({"error": "Индекс вопроса вне допустимого диапазона"}, status=400)
+    question = get_snapshot_question(snapshot, question_ids[question_index])
+    if question is None:
+        # Вопрос удалён из теста после начала попытки
+        raise Http404
+
+    return Response({
+        "attempt_id": str(attempt_id),
+        "quiz_id": quiz_id,
+        "quiz_title": snapshot.title,
+        "current_index": question_index,
+        "total_questions": len(question_ids),
+        "question": question_data(question),
+        "hide_answers": snapshot.hide_answers,
+        "time_limit": snapshot.time_limit
+    })
 
 class SaveQuizResult(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -282,54 +432,142 @@ class SaveQuizResult(APIView):
         max_score = request.data.get('max_score')
         user_answers = request.data.get('user_answers')
         
-        print(f"Сохранение результата: quiz_id={quiz_id}, score={score}, max_score={max_score}")
-        print(f"Пользователь: {request.user.username}, user_answers: {user_answers}")
+        logger.debug("[SaveQuizResult] save quiz_id=%s score=%s max_score=%s user=%s user_answers=%s",
+                     quiz_id, score, max_score, request.user.username, user_answers)
         
-        if not all([quiz_id, score is not None, max_score is not None]):
-            return Response(
-                {"error": "Необходимы quiz_id, score и max_score"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        if WRITE_BEHIND:
+            # Результат ставится в очередь и сохраняется фоновым сбросом (см. quiz/spool.py)
+            try:
+                return Response(enqueue(request.user, request.data), status=status.HTTP_202_ACCEPTED)
+            except QuizNotFound as exc:
+                return Response({"error": str(exc)}, status=status.HTTP_404_NOT_FOUND)
+            except ValueError as exc:
+                return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Проверка та же, что у элементов пакета (results.parse_item): балл
+        # считается на сервере по user_answers
         try:
-            quiz = Quiz.objects.get(id=quiz_id)
-        except Quiz.DoesNotExist:
-            return Response(
-                {"error": "Тест не найден"}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Если есть предыдущие результаты с тем же набором полей, удаляем их
-        # чтобы избежать дублирования
-        existing_results = QuizResult.objects.filter(
-            quiz=quiz,
-            user=request.user,
-            score=score,
-            max_score=max_score
-        )
-        if existing_results.exists():
-            print(f"Удаление существующих результатов: {len(existing_results)}")
-            existing_results.delete()
-        
-        quiz_result = QuizResult.objects.create(
-            quiz=quiz,
-            user=request.user,
-            score=score,
-            max_score=max_score,
-            user_answers=user_answers
-        )
-        
-        print(f"Создан результат: id={quiz_result.id}, score={quiz_result.score}/{quiz_result.max_score}")
+            quiz_result, created = save_result(request.user, request.data)
+        except QuizNotFound as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_404_NOT_FOUND)
+        except AttemptConflict as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Повторная отправка той же попытки возвращает сохранённый результат
         serializer = QuizResultSerializer(quiz_result)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+class SaveQuizResultsBatch(APIView):
+    """
+    Пакетная отправка результатов для офлайн-клиентов и общих планшетов:
+    {"results": [{"quiz_id", "user_answers" или "score" и "max_score", "attempt_id"}, ...]}.
+    Возвращает статус каждого элемента в том же порядке (см. results.store_batch).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get('results') if isinstance(request.data, dict) else None
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Необходим непустой список results"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BATCH_MAX_SIZE:
+            return Response(
+                {"error": f"Не больше {BATCH_MAX_SIZE} результатов за запрос"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        logger.debug("[SaveQuizResultsBatch] user=%s items=%d", request.user.username, len(items))
+        return Response({'results': store_batch(request.user, items)})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_quiz_statistics(request, quiz_id):
+    """
+    Статистика ответов по вопросам квиза: доля верных ответов и частота
+    выбора каждого варианта. Доступно автору квиза и администраторам.
+    """
+    snapshot = get_quiz_snapshot(quiz_id)
+    if snapshot is None:
+        raise Http404
+    if not request.user.is_staff and snapshot.author != request.user.username:
+        return Response({"error": "Статистика доступна только автору теста"}, status=status.HTTP_403_FORBIDDEN)
+    return Response(quiz_statistics_data(snapshot))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_quiz_leaderboard(request, quiz_id):
+    """
+    Таблица лидеров квиза: первые места (query-параметр 'limit', по умолчанию 10)
+    и место текущего пользователя.
+    """
+    if not Quiz.objects.filter(pk=quiz_id).exists():
+        raise Http404
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({"error": "limit должен быть целым числом"}, status=400)
+    limit = max(1, min(limit, leaderboard.TOP_SIZE))
+
+    return Response({
+        "quiz_id": quiz_id,
+        "top": leaderboard.get_top(quiz_id, limit),
+        "me": leaderboard.get_rank(quiz_id, request.user.id),
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_quizzes(request):
+    """
+    Полнотекстовый поиск тестов по названию и вопросам (query-параметр 'q',
+    см. quiz/search.py). Результаты - от более релевантных к менее,
+    не больше 'limit' (по умолчанию 20).
+    """
+    query = request.query_params.get('q', '')
+    if not search.parse_terms(query):
+        return Response({"error": "Пустой поисковый запрос"}, status=400)
+    try:
+        limit = int(request.query_params.get('limit', 20))
+    except ValueError:
+        return Response({"error": "limit должен быть целым числом"}, status=400)
+
+    quiz_ids = search.search(query, limit)
+    quizzes = Quiz.objects.select_related('author').in_bulk(quiz_ids)
+    # Документ удалённого теста может пережить тест до фиксации транзакции
+    ranked = [quizzes[quiz_id] for quiz_id in quiz_ids if quiz_id in quizzes]
+    return Response({"results": QuizSerializer(ranked, many=True).data})
+
+class ResultAnswersMixin:
+    """
+    Списки результатов с query-параметром answers=none: ответы не читаются
+    из базы и не отдаются (user_answers: null). Фронтенд загружает их
+    запросом к результату при раскрытии карточки.
+    """
+    def include_answers(self):
+        return self.request.query_params.get('answers') != 'none'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return queryset if self.include_answers() else queryset.defer('user_answers')
 
-class UserQuizResults(generics.ListAPIView):
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include_answers'] = self.include_answers()
+        return context
+
+class UserQuizResults(ResultAnswersMixin, generics.ListAPIView):
     serializer_class = QuizResultSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = QuizResultCursorPagination
     
     def get_queryset(self):
-        return QuizResult.objects.filter(user=self.request.user).order_by('-completed_at')
+        return QuizResult.objects.filter(user=self.request.user).select_related('quiz', 'user')
+    
+    def list(self, request, *args, **kwargs):
+        if WRITE_BEHIND:
+            # Только что отправленные результаты пользователя могут ждать в очереди
+            wait_for_user(request.user.id)
+        return super().list(request, *args, **kwargs)
 
 class QuizResultDetail(generics.RetrieveAPIView):
     queryset = QuizResult.objects.all()
@@ -338,34 +576,66 @@ class QuizResultDetail(generics.RetrieveAPIView):
     
     def get_queryset(self):
         # Пользователь может видеть только свои результаты
-        return QuizResult.objects.filter(user=self.request.user)
+        return QuizResult.objects.filter(user=self.request.user).select_related('quiz', 'user')
 
 # Новые представления для администраторов
-class AdminUserQuizResults(generics.ListAPIView):
+class AdminUserQuizResults(ResultAnswersMixin, generics.ListAPIView):
     """
     API endpoint для получения результатов всех пользователей.
     Доступно только администраторам.
-    Поддерживает фильтрацию по пользователю через query-параметр 'user_id'.
+    Поддерживает фильтрацию через query-параметры 'user_id', 'quiz_id',
+    'date_from' и 'date_to' (ISO-дата или дата со временем).
     """
     serializer_class = QuizResultSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = QuizResultCursorPagination
     
     def get_queryset(self):
-        queryset = QuizResult.objects.all().order_by('-completed_at')
+        queryset = QuizResult.objects.select_related('quiz', 'user')
         
-        # Фильтрация по пользователю, если указан параметр user_id
-        user_id = self.request.query_params.get('user_id', None)
-        if user_id:
-            queryset = queryset.filter(user_id=user_id)
-            
-        return queryset
+        try:
+            return filter_results(queryset, **result_filters(self.request))
+        except ValueError as e:
+            raise ValidationError({"error": str(e)})
+
+def result_filters(request):
+    """
+    Фильтры результатов из query-параметров запроса администратора.
+    """
+    params = request.query_params
+    return {
+        'user_id': params.get('user_id'),
+        'quiz_id': params.get('quiz_id'),
+        'date_from': params.get('date_from'),
+        'date_to': params.get('date_to'),
+    }
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def export_quiz_results(request):
+    """
+    Потоковая выгрузка результатов в CSV или NDJSON (query-параметр 'output').
+    Фильтры те же, что у списка результатов администратора; с 'flatten=1'
+    каждый ответ из user_answers выгружается отдельной строкой.
+    Доступно только администраторам.
+    """
+    output_format = request.query_params.get('output', 'csv')
+    flatten_answers = request.query_params.get('flatten') in ('1', 'true')
+    try:
+        chunks = iter_export(output_format, flatten_answers, **result_filters(request))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[output_format])
+    response['Content-Disposition'] = f'attachment; filename="quiz-results.{output_format}"'
+    return response
 
 class AdminQuizResultDetail(generics.RetrieveAPIView):
     """
     API endpoint для получения детальной информации о результате теста.
     Доступно только администраторам.
     """
-    queryset = QuizResult.objects.all()
+    queryset = QuizResult.objects.select_related('quiz', 'user')
     serializer_class = QuizResultSerializer
     permission_classes = [IsAdminUser]
 
@@ -384,6 +654,15 @@ class UsersList(generics.ListAPIView):
                  for user in queryset]
         return Response(users)
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    Гистограммы производительности по эндпоинтам в текстовом формате Prometheus.
+    Доступно только администраторам.
+    """
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # Обработчик выхода из системы
 @api_view(['GET'])
 def logout_view(request):
@@ -393,8 +672,9 @@ def logout_view(request):
     # Создаем ответ для перенаправления
     response = JsonResponse({'success': True, 'message': 'Успешный выход из системы'})
     
-    # Удаляем cookie is_authenticated
+    # Удаляем cookie is_authenticated и подписанный статус входа
     response.delete_cookie('is_authenticated')
+    auth_status.revoke(response)
     
     return response
 
@@ -406,7 +686,7 @@ def get_csrf_token(request):
     """
     # Устанавливаем CSRF в cookie через ensure_csrf_cookie decorator
     csrf_token = get_token(request)
-    logger.info(f"[get_csrf_token] Генерация CSRF токена: {csrf_token}")
+    logger.debug("[get_csrf_token] Генерация CSRF токена: %s", csrf_token)
     
     # Для OPTIONS запросов возвращаем пустой ответ со статусом 200
     if request.method == 'OPTIONS':